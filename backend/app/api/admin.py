@@ -0,0 +1,57 @@
+"""Administrative/system API endpoints."""
+from fastapi import APIRouter, Depends
+
+from app.core.authentication import auth_stats
+from app.core.bulkhead import bulkheads
+from app.core.deps import get_current_admin_principal, require_scopes
+from app.core.ldap_client import ldap_client
+from app.core.ldap_service import ldap_service
+from app.core.ldap_sync import ldap_sync
+from app.core.login_routing import login_routes, login_stats
+from app.core.principal import Principal, principal_cache
+from app.core.rate_limit import rate_limiters
+from app.core.security import jwt_decode_cache, password_hasher, revoked_tokens
+from app.core.token_security import pat_cache, pat_negative_cache
+from app.core.token_usage import token_usage
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/stats", dependencies=[Depends(require_scopes("admin"))])
+async def runtime_stats(current_admin: Principal = Depends(get_current_admin_principal)):
+    """
+    Get runtime statistics for in-process services (admin only).
+    
+    Requires: Admin JWT token
+    """
+    return {
+        "password_hashing": password_hasher.stats(),
+        "authentication": auth_stats.stats(),
+        "logins": login_stats.stats(),
+        "ldap": ldap_client.stats(),
+        "ldap_user_cache": ldap_service.user_cache_stats(),
+        "ldap_sync": ldap_sync.stats(),
+        "principal_cache": principal_cache.stats(),
+        "jwt_decode_cache": jwt_decode_cache.stats(),
+        "jwt_revocations": revoked_tokens.stats(),
+        "pat_usage": token_usage.stats(),
+        "pat_cache": pat_cache.stats(),
+        "pat_negative_cache": pat_negative_cache.stats(),
+        "bulkheads": {name: bulkhead.stats() for name, bulkhead in bulkheads.items()},
+        "rate_limits": {name: limiter.stats() for name, limiter in rate_limiters.items()},
+    }
+
+
+@router.delete("/ldap/cache", dependencies=[Depends(require_scopes("admin"))])
+async def flush_ldap_cache(current_admin: Principal = Depends(get_current_admin_principal)):
+    """
+    Flush cached LDAP user lookups and learned login routes (admin only).
+    
+    Use after changing users or group memberships in the directory to apply
+    the change before LDAP_USER_CACHE_TTL runs out.
+    
+    Requires: Admin JWT token
+    """
+    flushed = ldap_service.clear_user_cache()
+    login_routes.clear()
+    return {"message": "LDAP cache flushed", "flushed": flushed}
@@ -1,26 +1,59 @@
 """Authentication API endpoints."""
-from datetime import timedelta
-from typing import Annotated
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Annotated, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session
 
 from app.core.config import settings
 from app.core.database import get_session
-from app.core.security import create_access_token, validate_password_strength, get_password_hash
-from app.core.deps import get_current_user
-from app.core.ldap_service import ldap_service
+from app.core.authentication import AuthState, PATBackend
+from app.core.security import (
+    create_access_token,
+    password_hasher,
+    revoke_access_token,
+    validate_password_strength,
+)
+from app.core.deps import get_auth_state, get_current_claims, get_current_user, require_scopes
+from app.core.ldap_client import UNAVAILABLE_ERRORS, ldap_client
+from app.core.ldap_service import USER_NOT_FOUND, ldap_service
+from app.core.login_routing import (
+    LDAP,
+    LOCAL,
+    OFFLINE,
+    RACE,
+    login_stats,
+    remember_route,
+    route_login,
+)
+from app.core.principal import Principal, cache_principal
+from app.crud import refresh_token as crud_refresh_token
 from app.crud import user as crud_user
+from app.models.refresh_token import LogoutRequest, RefreshRequest
 from app.models.user import User, UserCreate, UserInDB
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
+write_scope = Depends(require_scopes("write"))
+admin_scope = Depends(require_scopes("admin"))
+
 
 class Token(BaseModel):
     """Token response model."""
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+
+class TokenSubject(BaseModel):
+    """Identity asserted by a valid access token."""
+    id: int
+    email: Optional[str] = None
+    is_admin: bool
 
 
 @router.post("/register", response_model=UserInDB, status_code=status.HTTP_201_CREATED)
@@ -54,7 +87,8 @@ async def register(
         )
     
     # Create user
-    user = crud_user.create_user(session, user_create)
+    hashed_password = await password_hasher.hash(user_create.password)
+    user = crud_user.create_user(session, user_create, hashed_password=hashed_password)
     
     return user
 
@@ -68,49 +102,25 @@ async def login(
     Login with email and password to get an access token.
     
     Supports both local authentication and LDAP/Active Directory.
-    When LDAP is enabled, tries LDAP first, then falls back to local DB.
+    When LDAP is enabled, LDAP accounts are checked against the directory
+    and local accounts against the local database (see LDAP_LOGIN_RACE).
     
     - **username**: User's email address or username
     - **password**: User's password
     
     Returns JWT access token for authentication.
     """
-    user = None
+    user = crud_user.get_user_by_email(session, form_data.username)
+    route = route_login(form_data.username, user)
     
-    # Try LDAP authentication first (if enabled)
-    if settings.LDAP_ENABLED:
-        success, ldap_user_info, error = ldap_service.authenticate(
-            form_data.username, 
-            form_data.password
-        )
-        
-        if success and ldap_user_info:
-            # LDAP authentication successful - provision/update user in local DB
-            user = crud_user.get_user_by_email(session, ldap_user_info['email'])
-            
-            if not user:
-                # Create new user from LDAP info
-                user_create = UserCreate(
-                    email=ldap_user_info['email'],
-                    full_name=ldap_user_info['full_name'] or ldap_user_info['username'],
-                    password=form_data.password,  # Will be hashed but not used for LDAP users
-                    is_active=True,
-                    is_admin=ldap_user_info.get('is_admin', False),
-                    is_ldap_user=True
-                )
-                user = crud_user.create_user(session, user_create)
-            else:
-                # Update existing user with LDAP info
-                user.full_name = ldap_user_info['full_name'] or user.full_name
-                user.is_admin = ldap_user_info.get('is_admin', user.is_admin)
-                user.is_ldap_user = True
-                session.add(user)
-                session.commit()
-                session.refresh(user)
-    
-    # If LDAP auth failed or is disabled, try local authentication
-    if not user:
-        user = crud_user.authenticate_user(session, form_data.username, form_data.password)
+    start = time.perf_counter()
+    if route == LDAP:
+        user, route = await _ldap_login(session, user, form_data.username, form_data.password)
+    elif route == RACE:
+        user = await _race_login(session, user, form_data.username, form_data.password)
+    elif user is not None and not await crud_user.check_user_password(session, user, form_data.password):
+        user = None
+    login_stats.record(route, "success" if user else "failure", time.perf_counter() - start)
     
     if not user:
         raise HTTPException(
@@ -125,27 +135,240 @@ async def login(
             detail="Inactive user"
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Create access and refresh tokens
+    refresh_token, _ = crud_refresh_token.create_refresh_token(session, user.id)
+    
+    return {
+        "access_token": _create_user_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
+
+async def _ldap_login(
+    session: Session,
+    user: Optional[User],
+    username: str,
+    password: str
+) -> Tuple[Optional[User], str]:
+    """
+    Authenticate against LDAP and provision or update the local user.
+    
+    While the directory is unavailable, LDAP accounts are checked against
+    the local copy of their last directory password if LDAP_OFFLINE_LOGIN
+    is enabled.
+    
+    Returns:
+        (user or None, login path taken)
+    """
+    success, ldap_user_info, error = await ldap_client.authenticate(username, password)
+    if success and ldap_user_info:
+        remember_route(username, LDAP)
+        return await _provision_ldap_user(session, ldap_user_info, password), LDAP
+    
+    if error == USER_NOT_FOUND:
+        remember_route(username, LOCAL)
+    elif (
+        error in UNAVAILABLE_ERRORS
+        and settings.LDAP_OFFLINE_LOGIN
+        and user is not None
+        and user.is_ldap_user
+    ):
+        if await crud_user.check_user_password(session, user, password):
+            return user, OFFLINE
+        return None, OFFLINE
+    return None, LDAP
+
+
+async def _race_login(session: Session, user: User, username: str, password: str) -> Optional[User]:
+    """
+    Check a local account's password and LDAP concurrently.
+    
+    The first check to succeed wins; a successful LDAP login turns the
+    account into an LDAP account.
+    """
+    local_check = asyncio.ensure_future(crud_user.check_user_password(session, user, password))
+    ldap_check = asyncio.ensure_future(ldap_client.authenticate(username, password))
+    pending = {local_check, ldap_check}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if local_check in done and local_check.result():
+                return user
+            if ldap_check in done:
+                success, ldap_user_info, error = ldap_check.result()
+                if success and ldap_user_info:
+                    remember_route(username, LDAP)
+                    return await _provision_ldap_user(session, ldap_user_info, password)
+                if error == USER_NOT_FOUND:
+                    remember_route(username, LOCAL)
+        return None
+    finally:
+        for check in pending:
+            check.cancel()
+
+
+async def _provision_ldap_user(session: Session, ldap_user_info: dict, password: str) -> User:
+    """Create or update the local copy of a directory user."""
+    user = crud_user.get_user_by_email(session, ldap_user_info['email'])
+    
+    if not user:
+        # Create new user from LDAP info
+        user_create = UserCreate(
+            email=ldap_user_info['email'],
+            full_name=ldap_user_info['full_name'] or ldap_user_info['username'],
+            password=password,  # Will be hashed but not used for LDAP users
+            is_active=True,
+            is_admin=ldap_user_info.get('is_admin', False),
+            is_ldap_user=True
+        )
+        hashed_password = await password_hasher.hash(password)
+        return crud_user.create_user(session, user_create, hashed_password=hashed_password)
+    
+    # Update existing user with LDAP info
+    user.full_name = ldap_user_info['full_name'] or user.full_name
+    is_admin = ldap_user_info.get('is_admin', user.is_admin)
+    if is_admin != user.is_admin:
+        user.is_admin = is_admin
+        user.token_epoch += 1
+    user.is_ldap_user = True
+    # Keep the local hash in step with the directory password for offline logins
+    if settings.LDAP_OFFLINE_LOGIN and not await password_hasher.verify(password, user.hashed_password):
+        user.hashed_password = await password_hasher.hash(password)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    cache_principal(user)
+    return user
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    refresh_request: RefreshRequest,
+    session: Session = Depends(get_session)
+):
+    """
+    Exchange a refresh token for a new access token.
+    
+    Refresh tokens are single use: each call returns a new refresh token
+    and invalidates the one presented. Reusing an old refresh token revokes
+    every token issued from the same login.
+    
+    - **refresh_token**: Refresh token from login or a previous refresh
+    """
+    invalid_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    rotated = crud_refresh_token.rotate_refresh_token(session, refresh_request.refresh_token)
+    if rotated is None:
+        raise invalid_exception
+    refresh_token, db_token = rotated
+    
+    user = crud_user.get_user_by_id(session, db_token.user_id)
+    if user is None or not user.is_active:
+        crud_refresh_token.revoke_user_refresh_tokens(session, db_token.user_id)
+        raise invalid_exception
+    
+    return {
+        "access_token": _create_user_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
+
+@router.post("/token-exchange", response_model=Token)
+async def exchange_token(
+    auth: AuthState = Depends(get_auth_state),
+    session: Session = Depends(get_session)
+):
+    """
+    Exchange a Personal Access Token for a short-lived access token.
+    
+    Send the PAT as the Bearer token. The returned JWT carries the PAT's
+    scopes and expires after PAT_EXCHANGE_TOKEN_EXPIRE_MINUTES (or when the
+    PAT expires, if sooner), so high-volume clients can authenticate once
+    and then use the stateless JWT path. Revoking the PAT does not revoke
+    JWTs already exchanged for it; they simply run out.
+    
+    Requires: Valid Personal Access Token
+    """
+    principal = auth.resolve(session) if isinstance(auth.backend, PATBackend) else None
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="A valid personal access token is required",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    record = auth.pat_record
+    
+    expires_delta = timedelta(minutes=settings.PAT_EXCHANGE_TOKEN_EXPIRE_MINUTES)
+    if record.expires_at is not None:
+        expires_delta = min(expires_delta, record.expires_at - datetime.utcnow())
+    
     access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email, "is_admin": user.is_admin},
-        expires_delta=access_token_expires
+        data={
+            "sub": str(principal.id),
+            "email": principal.email,
+            "is_admin": principal.is_admin,
+            "epoch": principal.token_epoch,
+            "scp": principal.scopes,
+        },
+        expires_delta=expires_delta
     )
     
     return {
         "access_token": access_token,
-        "token_type": "bearer"
+        "token_type": "bearer",
+        "expires_in": int(expires_delta.total_seconds())
     }
 
 
-@router.post("/logout")
-async def logout(current_user: User = Depends(get_current_user)):
+def _create_user_access_token(user: User) -> str:
+    """Create an access token carrying the user's identity claims."""
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return create_access_token(
+        data={
+            "sub": str(user.id),
+            "email": user.email,
+            "is_admin": user.is_admin,
+            "epoch": user.token_epoch,
+        },
+        expires_delta=access_token_expires
+    )
+
+
+@router.post("/logout", dependencies=[write_scope])
+async def logout(
+    logout_request: Optional[LogoutRequest] = None,
+    auth: AuthState = Depends(get_auth_state),
+    current_user: User = Depends(get_current_user),
+    session: Session = Depends(get_session)
+):
     """
     Logout current user.
     
-    Note: With JWT tokens, logout is typically handled client-side
-    by removing the token. This endpoint is provided for API completeness.
+    Revokes the access token used for this request (until it would have
+    expired) and the refresh token family of the given **refresh_token**,
+    or all of the user's refresh tokens if none is given.
     """
+    if auth.payload is not None:
+        revoke_access_token(auth.payload)
+    
+    refresh_token = logout_request.refresh_token if logout_request else None
+    db_token = (
+        crud_refresh_token.get_refresh_token(session, refresh_token)
+        if refresh_token else None
+    )
+    if db_token is not None and db_token.user_id == current_user.id:
+        crud_refresh_token.revoke_refresh_token_family(session, db_token.family_id)
+    else:
+        crud_refresh_token.revoke_user_refresh_tokens(session, current_user.id)
+    
     return {
         "message": "Successfully logged out",
         "user": current_user.email
@@ -162,14 +385,19 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-@router.post("/test-token", response_model=UserInDB)
-async def test_token(current_user: User = Depends(get_current_user)):
+@router.post("/test-token", response_model=TokenSubject)
+async def test_token(current_principal: Principal = Depends(get_current_claims)):
     """
     Test if the access token is valid.
     
-    Returns current user if token is valid.
+    Returns the identity asserted by the token. Fresh JWTs are checked from
+    their signed claims alone, without loading the user.
     """
-    return current_user
+    return TokenSubject(
+        id=current_principal.id,
+        email=current_principal.email,
+        is_admin=current_principal.is_admin,
+    )
 
 
 @router.get("/ldap/health")
@@ -179,8 +407,11 @@ async def ldap_health_check():
     
     Returns status information about LDAP configuration and connection.
     Useful for troubleshooting LDAP authentication issues.
+    
+    Served from the last background probe, with the latency and outcome of
+    recent probes in ``history``, so monitoring does not load the directory.
     """
-    health = ldap_service.health_check()
+    health = await ldap_client.cached_health()
     
     # Return appropriate status code based on health
     if not health.get('healthy', False):
@@ -192,7 +423,7 @@ async def ldap_health_check():
     return health
 
 
-@router.get("/ldap/config")
+@router.get("/ldap/config", dependencies=[admin_scope])
 async def ldap_config_info(current_user: User = Depends(get_current_user)):
     """
     Get LDAP configuration information (sanitized).
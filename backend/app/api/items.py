@@ -3,20 +3,23 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlmodel import Session
 
 from app.core.database import get_session
-from app.core.deps import get_current_user
-from app.models.user import User
+from app.core.deps import get_current_claims, get_current_principal, require_scopes
+from app.core.principal import Principal
 from app.models.item import Item, ItemCreate, ItemUpdate, ItemRead
 from app.crud import item as crud_item
 
 
 router = APIRouter(prefix="/api/items", tags=["items"])
 
+read_scope = Depends(require_scopes("read"))
+write_scope = Depends(require_scopes("write"))
 
-@router.post("", response_model=ItemRead, status_code=201)
+
+@router.post("", response_model=ItemRead, status_code=201, dependencies=[write_scope])
 def create_item(
     *,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     item_in: ItemCreate
 ):
     """Create a new item owned by the current user"""
@@ -24,11 +27,11 @@ def create_item(
     return item
 
 
-@router.get("", response_model=List[ItemRead])
+@router.get("", response_model=List[ItemRead], dependencies=[read_scope])
 def list_items(
     *,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_claims),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=100),
     all: bool = Query(default=False, description="Admin only: list all items")
@@ -42,11 +45,11 @@ def list_items(
     return items
 
 
-@router.get("/{item_id}", response_model=ItemRead)
+@router.get("/{item_id}", response_model=ItemRead, dependencies=[read_scope])
 def get_item(
     *,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     item_id: int
 ):
     """Get a specific item"""
@@ -61,11 +64,11 @@ def get_item(
     return item
 
 
-@router.put("/{item_id}", response_model=ItemRead)
+@router.put("/{item_id}", response_model=ItemRead, dependencies=[write_scope])
 def update_item(
     *,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     item_id: int,
     item_in: ItemUpdate
 ):
@@ -82,11 +85,11 @@ def update_item(
     return item
 
 
-@router.delete("/{item_id}", status_code=204)
+@router.delete("/{item_id}", status_code=204, dependencies=[write_scope])
 def delete_item(
     *,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     item_id: int
 ):
     """Delete an item"""
@@ -1,18 +1,23 @@
 """Personal Access Token API endpoints."""
+import secrets
 from typing import List
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
 from ..core.database import get_session
-from ..core.deps import get_current_active_user
+from ..core.deps import get_current_principal, require_scopes
+from ..core.principal import Principal
 from ..core.token_security import (
+    compile_scopes,
+    digest_token,
     generate_token,
     hash_token,
     calculate_expiry,
+    invalidate_pat,
     validate_scopes,
 )
-from ..models.user import User
+from ..core.token_usage import token_usage
 from ..models.token import (
     PersonalAccessToken,
     TokenCreate,
@@ -22,11 +27,19 @@ from ..models.token import (
 
 router = APIRouter()
 
+read_scope = Depends(require_scopes("read"))
+write_scope = Depends(require_scopes("write"))
 
-@router.post("/me/tokens", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
+
+@router.post(
+    "/me/tokens",
+    response_model=TokenResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[write_scope],
+)
 def create_personal_access_token(
     token_data: TokenCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session),
 ):
     """
@@ -41,6 +54,14 @@ def create_personal_access_token(
             detail="Invalid scopes. Valid scopes are: read, write, admin",
         )
     
+    # A PAT can only mint tokens with scopes it holds itself
+    scope_mask = compile_scopes(token_data.scopes)
+    if scope_mask & ~current_user.scopes:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot grant scopes the current token does not have",
+        )
+    
     # Check if user already has a token with this name
     statement = select(PersonalAccessToken).where(
         PersonalAccessToken.user_id == current_user.id,
@@ -53,24 +74,32 @@ def create_personal_access_token(
             detail=f"You already have a token named '{token_data.name}'",
         )
     
-    # Generate token
-    plaintext_token = generate_token()
-    token_hash = hash_token(plaintext_token)
-    
     # Calculate expiry
     expires_at = calculate_expiry(token_data.expires_in_days)
     
-    # Create token record
+    # Create token record; the token embeds the row id, so insert first
+    # with a random placeholder hash and fill in the real digest once the
+    # id is known
     db_token = PersonalAccessToken(
         name=token_data.name,
-        token_hash=token_hash,
+        token_hash=hash_token(secrets.token_hex(32)),
         user_id=current_user.id,
         scopes=token_data.scopes,
+        scope_mask=scope_mask,
         expires_at=expires_at,
     )
     session.add(db_token)
+    session.flush()
+    
+    # Generate token
+    plaintext_token = generate_token(db_token.id)
+    token_digest = digest_token(plaintext_token)
+    token_hash = token_digest.hex()
+    db_token.token_hash = token_hash
+    db_token.token_digest = token_digest
     session.commit()
     session.refresh(db_token)
+    invalidate_pat(token_hash)
     
     # Return response with plaintext token
     return TokenResponse(
@@ -83,9 +112,9 @@ def create_personal_access_token(
     )
 
 
-@router.get("/me/tokens", response_model=List[TokenInfo])
+@router.get("/me/tokens", response_model=List[TokenInfo], dependencies=[read_scope])
 def list_personal_access_tokens(
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session),
 ):
     """
@@ -105,7 +134,7 @@ def list_personal_access_tokens(
             name=token.name,
             scopes=token.scopes,
             expires_at=token.expires_at,
-            last_used_at=token.last_used_at,
+            last_used_at=token_usage.last_used(token.id, token.last_used_at),
             created_at=token.created_at,
             is_active=token.is_active,
         )
@@ -113,10 +142,14 @@ def list_personal_access_tokens(
     ]
 
 
-@router.delete("/me/tokens/{token_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/me/tokens/{token_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[write_scope],
+)
 def revoke_personal_access_token(
     token_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session),
 ):
     """
@@ -138,14 +171,20 @@ def revoke_personal_access_token(
     
     session.delete(token)
     session.commit()
+    invalidate_pat(token.token_hash)
+    token_usage.discard(token_id)
     
     return None
 
 
-@router.patch("/me/tokens/{token_id}/deactivate", response_model=TokenInfo)
+@router.patch(
+    "/me/tokens/{token_id}/deactivate",
+    response_model=TokenInfo,
+    dependencies=[write_scope],
+)
 def deactivate_personal_access_token(
     token_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     session: Session = Depends(get_session),
 ):
     """
@@ -169,13 +208,14 @@ def deactivate_personal_access_token(
     session.add(token)
     session.commit()
     session.refresh(token)
+    invalidate_pat(token.token_hash)
     
     return TokenInfo(
         id=token.id,
         name=token.name,
         scopes=token.scopes,
         expires_at=token.expires_at,
-        last_used_at=token.last_used_at,
+        last_used_at=token_usage.last_used(token.id, token.last_used_at),
         created_at=token.created_at,
         is_active=token.is_active,
     )
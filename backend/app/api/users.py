@@ -4,14 +4,24 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
 from app.core.database import get_session
-from app.core.deps import get_current_user, get_current_admin_user
+from app.core.bulkhead import use_bulkhead
+from app.core.deps import get_current_user, get_current_admin_principal, require_scopes
+from app.core.principal import Principal
 from app.crud import user as crud_user
 from app.models.user import User, UserUpdate, UserInDB
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
+# Password changes do argon2 work, so they share the auth bulkhead
+auth_bulkhead = Depends(use_bulkhead("auth"))
+admin_bulkhead = Depends(use_bulkhead("admin"))
 
-@router.get("/me", response_model=UserInDB)
+read_scope = Depends(require_scopes("read"))
+write_scope = Depends(require_scopes("write"))
+admin_scope = Depends(require_scopes("admin"))
+
+
+@router.get("/me", response_model=UserInDB, dependencies=[read_scope])
 async def read_user_me(current_user: User = Depends(get_current_user)):
     """
     Get current user profile.
@@ -21,7 +31,7 @@ async def read_user_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
-@router.put("/me", response_model=UserInDB)
+@router.put("/me", response_model=UserInDB, dependencies=[auth_bulkhead, write_scope])
 async def update_user_me(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
@@ -52,11 +62,11 @@ async def update_user_me(
                 detail="Email already registered"
             )
     
-    updated_user = crud_user.update_user(session, current_user, user_update)
+    updated_user = await crud_user.update_user(session, current_user, user_update)
     return updated_user
 
 
-@router.post("/me/password")
+@router.post("/me/password", dependencies=[auth_bulkhead, write_scope])
 async def change_password(
     current_password: str,
     new_password: str,
@@ -71,10 +81,10 @@ async def change_password(
     
     Requires: Valid JWT token
     """
-    from app.core.security import verify_password, validate_password_strength
+    from app.core.security import password_hasher, validate_password_strength
     
     # Verify current password
-    if not verify_password(current_password, current_user.hashed_password):
+    if not await password_hasher.verify(current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect password"
@@ -90,17 +100,17 @@ async def change_password(
     
     # Update password
     user_update = UserUpdate(password=new_password)
-    crud_user.update_user(session, current_user, user_update)
+    await crud_user.update_user(session, current_user, user_update)
     
     return {"message": "Password updated successfully"}
 
 
-@router.get("/", response_model=List[UserInDB])
+@router.get("/", response_model=List[UserInDB], dependencies=[admin_bulkhead, admin_scope])
 async def list_users(
     skip: int = 0,
     limit: int = 100,
     session: Session = Depends(get_session),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
     """
     List all users (admin only).
@@ -115,11 +125,11 @@ async def list_users(
     return users
 
 
-@router.get("/{user_id}", response_model=UserInDB)
+@router.get("/{user_id}", response_model=UserInDB, dependencies=[admin_bulkhead, admin_scope])
 async def read_user(
     user_id: int,
     session: Session = Depends(get_session),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
     """
     Get a specific user by ID (admin only).
@@ -135,12 +145,12 @@ async def read_user(
     return user
 
 
-@router.put("/{user_id}", response_model=UserInDB)
+@router.put("/{user_id}", response_model=UserInDB, dependencies=[admin_bulkhead, admin_scope])
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
     session: Session = Depends(get_session),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
     """
     Update a user (admin only).
@@ -154,15 +164,15 @@ async def update_user(
             detail="User not found"
         )
     
-    updated_user = crud_user.update_user(session, user, user_update)
+    updated_user = await crud_user.update_user(session, user, user_update)
     return updated_user
 
 
-@router.delete("/{user_id}")
+@router.delete("/{user_id}", dependencies=[admin_bulkhead, admin_scope])
 async def delete_user(
     user_id: int,
     session: Session = Depends(get_session),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_principal)
 ):
     """
     Delete a user (admin only).
@@ -0,0 +1,281 @@
+"""
+Request authentication middleware and credential backends.
+
+``AuthenticationMiddleware`` parses the ``Authorization`` header once per
+request, picks the first backend that recognises the token (PAT or JWT)
+and tries to resolve the principal from in-process caches alone. The
+result is stored as ``request.state.auth`` (an ``AuthState``); the
+``get_current_*`` dependencies in ``app.core.deps`` read it and only fall
+back to a database session when the caches missed.
+
+Backends are pluggable: pass ``backends=[...]`` to the middleware with
+any ``AuthBackend`` subclasses. Per-backend timings are exposed through
+``auth_stats`` on the admin stats endpoint.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session
+
+from app.core.cache import CacheMiss
+from app.core.principal import Principal, get_principal, principal_from_claims
+from app.core.security import decode_access_token, is_access_token_revoked
+from app.core.token_security import TOKEN_PREFIX, PATRecord, get_pat_record, is_token_expired
+from app.core.token_usage import token_usage
+
+
+class AuthBackend(ABC):
+    """
+    Base class for credential backends.
+
+    ``authenticate`` is first called by the middleware with ``session=None``
+    and must then only use in-process caches, raising ``CacheMiss`` if it
+    needs the database; it is called again with a session from the request
+    dependency in that case.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def matches(self, token: str) -> bool:
+        """Return True if this backend handles token."""
+
+    @abstractmethod
+    def authenticate(self, state: "AuthState", session: Optional[Session]) -> Optional[Principal]:
+        """Resolve the principal for state.token, or None if the token is invalid."""
+
+    def claims_principal(self, state: "AuthState") -> Optional[Principal]:
+        """Principal trusted from signed claims alone, if this backend supports it."""
+        return None
+
+
+class JWTBackend(AuthBackend):
+    """JWT access tokens issued by login, refresh or token exchange."""
+
+    name = "jwt"
+
+    def matches(self, token: str) -> bool:
+        return not token.startswith(TOKEN_PREFIX)
+
+    def _payload(self, state: "AuthState") -> Optional[dict]:
+        if state.payload is None:
+            payload = decode_access_token(state.token)
+            if payload is None or is_access_token_revoked(payload):
+                return None
+            state.payload = payload
+        return state.payload
+
+    def authenticate(self, state: "AuthState", session: Optional[Session]) -> Optional[Principal]:
+        payload = self._payload(state)
+        if payload is None:
+            return None
+
+        try:
+            user_id = int(payload.get("sub"))
+        except (TypeError, ValueError):
+            return None
+
+        principal = get_principal(session, user_id)
+        if principal is None or not principal.is_active:
+            return None
+
+        # Tokens minted before the user's last epoch bump are no longer valid
+        if payload.get("epoch", 0) < principal.token_epoch:
+            return None
+
+        # Tokens exchanged for a PAT keep that PAT's scopes
+        if "scp" in payload:
+            return principal.with_scopes(payload["scp"])
+
+        return principal
+
+    def claims_principal(self, state: "AuthState") -> Optional[Principal]:
+        payload = self._payload(state)
+        if payload is None:
+            return None
+        return principal_from_claims(payload)
+
+
+class PATBackend(AuthBackend):
+    """Personal Access Tokens (``pat_`` prefix)."""
+
+    name = "pat"
+
+    def matches(self, token: str) -> bool:
+        return token.startswith(TOKEN_PREFIX)
+
+    def authenticate(self, state: "AuthState", session: Optional[Session]) -> Optional[Principal]:
+        resolved = authenticate_pat(state.token, session)
+        if resolved is None:
+            return None
+        state.pat_record, principal = resolved
+        return principal
+
+
+def authenticate_pat(
+    token: str,
+    session: Optional[Session]
+) -> Optional[Tuple[PATRecord, Principal]]:
+    """
+    Validate a Personal Access Token and resolve its owner.
+
+    Returns:
+        (token record, principal restricted to the token's scopes), or None
+        if the token is unknown, inactive, expired or its user is inactive
+
+    Raises:
+        CacheMiss: If session is None and the database is needed
+    """
+    # Look up token (malformed tokens never reach the cache or database)
+    record = get_pat_record(session, token)
+
+    if not record or not record.is_active:
+        return None
+
+    if is_token_expired(record.expires_at):
+        return None
+
+    # Get user
+    principal = get_principal(session, record.user_id)
+    if principal is None or not principal.is_active:
+        return None
+
+    # Record usage; last_used_at is flushed to the database in batches
+    token_usage.record(record.id)
+
+    return record, principal.with_scopes(record.scope_mask)
+
+
+class AuthState:
+    """Credentials presented with a request and what they resolved to."""
+
+    __slots__ = ("token", "backend", "principal", "resolved", "payload", "pat_record")
+
+    def __init__(self, token: Optional[str], backend: Optional[AuthBackend]):
+        self.token = token
+        self.backend = backend
+        self.principal: Optional[Principal] = None
+        self.resolved = backend is None
+        self.payload: Optional[dict] = None
+        self.pat_record: Optional[PATRecord] = None
+
+    def resolve(self, session: Optional[Session]) -> Optional[Principal]:
+        """
+        Resolve the principal, using the database only if session is given.
+
+        Raises:
+            CacheMiss: If session is None and the caches could not decide
+        """
+        if not self.resolved:
+            start = time.perf_counter()
+            try:
+                self.principal = self.backend.authenticate(self, session)
+            except CacheMiss:
+                auth_stats.record(self.backend.name, "deferred", time.perf_counter() - start)
+                raise
+            self.resolved = True
+            outcome = "authenticated" if self.principal is not None else "rejected"
+            if session is not None:
+                outcome = f"db_{outcome}"
+            auth_stats.record(self.backend.name, outcome, time.perf_counter() - start)
+        return self.principal
+
+    def claims_principal(self) -> Optional[Principal]:
+        """Principal from signed claims alone, without any lookup."""
+        if self.backend is None:
+            return None
+        return self.backend.claims_principal(self)
+
+
+def parse_authorization(header: Optional[str]) -> Optional[str]:
+    """Extract the token from a ``Bearer`` Authorization header value."""
+    if not header:
+        return None
+    scheme, _, token = header.partition(" ")
+    token = token.strip()
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+class AuthStats:
+    """Thread-safe per-backend outcome counters and cumulative timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, list]] = {}
+
+    def record(self, backend: str, outcome: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(backend, {}).setdefault(outcome, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def stats(self) -> dict:
+        """Return count, mean and max milliseconds per backend and outcome."""
+        with self._lock:
+            return {
+                backend: {
+                    outcome: {
+                        "count": count,
+                        "mean_ms": round(total / count * 1000, 3),
+                        "max_ms": round(slowest * 1000, 3),
+                    }
+                    for outcome, (count, total, slowest) in outcomes.items()
+                }
+                for backend, outcomes in self._stats.items()
+            }
+
+
+# Global authentication timings
+auth_stats = AuthStats()
+
+DEFAULT_BACKENDS: Tuple[AuthBackend, ...] = (PATBackend(), JWTBackend())
+
+
+def authenticate_header(
+    header: Optional[str],
+    backends: Sequence[AuthBackend] = DEFAULT_BACKENDS
+) -> AuthState:
+    """Build the auth state for an Authorization header value, using caches only."""
+    token = parse_authorization(header)
+    backend = None
+    if token:
+        backend = next((b for b in backends if b.matches(token)), None)
+    state = AuthState(token, backend)
+    try:
+        state.resolve(None)
+    except CacheMiss:
+        pass
+    return state
+
+
+class AuthenticationMiddleware:
+    """
+    ASGI middleware that authenticates each HTTP request from the cache.
+
+    Always sets ``request.state.auth``. Invalid credentials are not
+    rejected here; routes decide through their dependencies whether
+    authentication is required.
+    """
+
+    def __init__(self, app, backends: Sequence[AuthBackend] = DEFAULT_BACKENDS):
+        self.app = app
+        self.backends: List[AuthBackend] = list(backends)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            header = None
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    header = value.decode("latin-1")
+                    break
+            scope.setdefault("state", {})["auth"] = authenticate_header(header, self.backends)
+        await self.app(scope, receive, send)
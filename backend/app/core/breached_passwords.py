@@ -0,0 +1,170 @@
+"""
+Offline breached-password check against a local SHA-1 hash list.
+
+The list is a compact binary file built from a Have I Been Pwned style
+``SHA1HEX:COUNT`` dump with ``build_breached_passwords.py``:
+
+- 16-byte header: magic ``b"PWNDSHA1"`` and the record count (uint64 LE)
+- fan-out table: 65537 uint64 LE record indexes, entry ``p`` being the
+  number of hashes whose first two bytes are below ``p``
+- the sorted 20-byte SHA-1 digests
+
+The file is memory-mapped read-only, so every worker shares the same page
+cache instead of loading the list onto its heap, and a lookup is one
+fan-out read plus a binary search over a few hundred records.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import Iterable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PWNDSHA1"
+DIGEST_SIZE = 20
+_HEADER = struct.Struct("<8sQ")
+_FANOUT_ENTRIES = 65537
+_FANOUT_OFFSET = _HEADER.size
+_RECORDS_OFFSET = _FANOUT_OFFSET + _FANOUT_ENTRIES * 8
+
+
+class BreachedPasswordList:
+    """Read-only, lazily opened view of a breached-password file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._count = 0
+
+    def _open(self) -> mmap.mmap:
+        with self._lock:
+            if self._mmap is None:
+                with open(self.path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, count = _HEADER.unpack_from(mapped, 0)
+                if magic != MAGIC or len(mapped) != _RECORDS_OFFSET + count * DIGEST_SIZE:
+                    mapped.close()
+                    raise ValueError(f"{self.path} is not a breached-password file")
+                self._count = count
+                self._mmap = mapped
+            return self._mmap
+
+    def __len__(self) -> int:
+        self._open()
+        return self._count
+
+    def contains_digest(self, digest: bytes) -> bool:
+        """Check whether a SHA-1 digest is in the list."""
+        mapped = self._open()
+        prefix = int.from_bytes(digest[:2], "big")
+        lo, hi = struct.unpack_from("<QQ", mapped, _FANOUT_OFFSET + prefix * 8)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = _RECORDS_OFFSET + mid * DIGEST_SIZE
+            record = mapped[start:start + DIGEST_SIZE]
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def contains(self, password: str) -> bool:
+        """Check whether a password's SHA-1 is in the list."""
+        return self.contains_digest(hashlib.sha1(password.encode()).digest())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+
+def build_breached_password_file(lines: Iterable[str], output_path: str, min_count: int = 1) -> int:
+    """
+    Convert a sorted ``SHA1HEX[:COUNT]`` text dump into the binary format.
+
+    Hashes seen fewer than min_count times are skipped; duplicates are
+    written once. The file is written to a temporary name and renamed, so
+    running servers never map a partial file.
+
+    Returns:
+        Number of hashes written
+
+    Raises:
+        ValueError: If a line is malformed or the input is not sorted by hash
+    """
+    fanout = [0] * (_FANOUT_ENTRIES - 1)
+    count = 0
+    previous = b""
+    tmp_path = f"{output_path}.tmp"
+
+    with open(tmp_path, "wb") as out:
+        out.write(b"\0" * _RECORDS_OFFSET)
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            hex_digest, _, seen = line.partition(":")
+            try:
+                digest = bytes.fromhex(hex_digest)
+                seen_count = int(seen) if seen else min_count
+            except ValueError:
+                raise ValueError(f"Line {line_number}: expected SHA1HEX[:COUNT], got {line[:60]!r}")
+            if len(digest) != DIGEST_SIZE:
+                raise ValueError(f"Line {line_number}: expected a 40 character SHA-1 hash")
+            if digest < previous:
+                raise ValueError(
+                    f"Line {line_number}: input is not sorted by hash "
+                    "(download the ordered-by-hash dump or sort it first)"
+                )
+            if digest == previous or seen_count < min_count:
+                continue
+            out.write(digest)
+            fanout[int.from_bytes(digest[:2], "big")] += 1
+            previous = digest
+            count += 1
+
+        # Turn per-prefix counts into cumulative start indexes
+        offsets = [0] * _FANOUT_ENTRIES
+        for prefix, prefix_count in enumerate(fanout):
+            offsets[prefix + 1] = offsets[prefix] + prefix_count
+        out.seek(0)
+        out.write(_HEADER.pack(MAGIC, count))
+        out.write(struct.pack(f"<{_FANOUT_ENTRIES}Q", *offsets))
+
+    os.replace(tmp_path, output_path)
+    return count
+
+
+_breached_passwords: Optional[BreachedPasswordList] = None
+_warned = False
+
+
+def is_password_breached(password: str) -> bool:
+    """
+    Check a password against BREACHED_PASSWORDS_FILE, if configured.
+
+    A configured but unreadable file is logged once and the check skipped,
+    so a missing list does not block registration.
+    """
+    global _breached_passwords, _warned
+    path = settings.BREACHED_PASSWORDS_FILE
+    if not path:
+        return False
+    if _breached_passwords is None or _breached_passwords.path != path:
+        _breached_passwords = BreachedPasswordList(path)
+    try:
+        return _breached_passwords.contains(password)
+    except (OSError, ValueError) as e:
+        if not _warned:
+            logger.warning(f"Breached-password check disabled: {e}")
+            _warned = True
+        return False
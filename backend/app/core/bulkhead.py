@@ -0,0 +1,149 @@
+"""
+Concurrency bulkheads per route group.
+
+Each route group (auth, admin, items, tokens) gets its own concurrency
+limit and bounded wait queue, so a burst in one group (e.g. a login storm
+doing argon2 and LDAP binds) cannot consume the event loop and threadpool
+capacity the other groups need. Requests that cannot be queued, or wait
+longer than the queue timeout, get 503 with Retry-After.
+"""
+import asyncio
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+# Queue-time histogram bucket upper bounds in milliseconds (last bucket is +inf)
+QUEUE_TIME_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class Bulkhead:
+    """Async concurrency limiter with a bounded FIFO wait queue."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._admitted = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._histogram = [0] * (len(QUEUE_TIME_BUCKETS_MS) + 1)
+
+    def _overloaded(self, detail: str) -> HTTPException:
+        retry_after = max(1, math.ceil(self.queue_timeout))
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def _record_admission(self, queued_seconds: float) -> None:
+        bucket = bisect.bisect_left(QUEUE_TIME_BUCKETS_MS, queued_seconds * 1000)
+        self._admitted += 1
+        self._histogram[bucket] += 1
+
+    async def acquire(self) -> None:
+        """Wait for a slot, raising 503 if the queue is full or the wait times out."""
+        start = time.perf_counter()
+        with self._lock:
+            if self._active < self.max_concurrent and not self._waiters:
+                self._active += 1
+                self._record_admission(0.0)
+                return
+            if len(self._waiters) >= self.max_queue:
+                self._rejected += 1
+                raise self._overloaded(f"Too many concurrent {self.name} requests")
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+
+        try:
+            # release() hands its slot directly to the waiter
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done() or waiter.cancelled():
+                with self._lock:
+                    self._timeouts += 1
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                raise self._overloaded(f"Timed out waiting for {self.name} capacity")
+            # The slot was granted just as the timeout fired; keep it
+
+        with self._lock:
+            self._record_admission(time.perf_counter() - start)
+
+    def release(self) -> None:
+        """Release a slot, handing it to the oldest live waiter if any."""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+                    return
+            self._active -= 1
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # The waiter timed out after the slot was handed over; pass it on
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    def stats(self) -> dict:
+        """Return concurrency counters and the queue-time histogram."""
+        with self._lock:
+            bounds = [f"le_{bound}ms" for bound in QUEUE_TIME_BUCKETS_MS] + ["le_inf"]
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "active": self._active,
+                "queued": len(self._waiters),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "queue_time_histogram": dict(zip(bounds, self._histogram)),
+            }
+
+
+# Global bulkheads per route group
+bulkheads: Dict[str, Bulkhead] = {
+    name: Bulkhead(name, max_concurrent, max_queue, settings.BULKHEAD_QUEUE_TIMEOUT)
+    for name, max_concurrent, max_queue in (
+        ("auth", settings.BULKHEAD_AUTH_CONCURRENCY, settings.BULKHEAD_AUTH_QUEUE),
+        ("admin", settings.BULKHEAD_ADMIN_CONCURRENCY, settings.BULKHEAD_ADMIN_QUEUE),
+        ("items", settings.BULKHEAD_ITEMS_CONCURRENCY, settings.BULKHEAD_ITEMS_QUEUE),
+        ("tokens", settings.BULKHEAD_TOKENS_CONCURRENCY, settings.BULKHEAD_TOKENS_QUEUE),
+    )
+}
+
+_dependencies: Dict[str, Callable] = {}
+
+
+def use_bulkhead(name: str) -> Callable:
+    """
+    Get a FastAPI dependency that holds a slot in the named bulkhead.
+
+    Usage: ``dependencies=[Depends(use_bulkhead("items"))]``
+    """
+    if name not in _dependencies:
+        bulkhead = bulkheads[name]
+
+        async def bulkhead_slot():
+            await bulkhead.acquire()
+            try:
+                yield
+            finally:
+                bulkhead.release()
+
+        _dependencies[name] = bulkhead_slot
+    return _dependencies[name]
@@ -0,0 +1,134 @@
+"""
+Circuit breaker for calls to an external dependency.
+
+After ``failure_threshold`` consecutive failures the breaker opens and
+callers fail fast instead of waiting out timeouts. Once
+``recovery_timeout`` seconds have passed it lets up to
+``half_open_max_calls`` trial calls through (half-open): a success closes
+the breaker, a failure opens it again for another ``recovery_timeout``.
+"""
+import threading
+import time
+from typing import Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised by callers when the breaker rejects a call."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed/open/half-open circuit breaker.
+
+    Args:
+        name: Dependency name (used in stats and errors)
+        failure_threshold: Consecutive failures that open the breaker
+        recovery_timeout: Seconds the breaker stays open before a trial call
+        half_open_max_calls: Trial calls allowed at once while half-open
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._rejected = 0
+        self._times_opened = 0
+        self._last_failure: Optional[str] = None
+
+    def _refresh(self, now: float) -> None:
+        """Move from open to half-open once the recovery timeout has passed."""
+        if self._state == OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected (does not use up a trial call)."""
+        return self.state == OPEN
+
+    def allow(self) -> bool:
+        """
+        Ask to make a call.
+
+        Every allowed call must be followed by ``record_success`` or
+        ``record_failure``.
+        """
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record a call that reached the dependency; closes a half-open breaker."""
+        with self._lock:
+            self._failures = 0
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._trial_calls = 0
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """Record a failed call; may open the breaker."""
+        with self._lock:
+            self._failures += 1
+            if error is not None:
+                self._last_failure = str(error)
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._times_opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def reset(self) -> None:
+        """Close the breaker and reset counters."""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_calls = 0
+            self._rejected = 0
+            self._times_opened = 0
+            self._last_failure = None
+
+    def stats(self) -> dict:
+        """Return breaker state and counters."""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "retry_in": (
+                    round(max(0.0, self.recovery_timeout - (now - self._opened_at)), 3)
+                    if self._state == OPEN else None
+                ),
+                "times_opened": self._times_opened,
+                "rejected": self._rejected,
+                "last_failure": self._last_failure,
+            }
@@ -21,7 +21,72 @@ class Settings(BaseSettings):
         description="Secret key for JWT signing"
     )
     ALGORITHM: str = "HS256"
+    JWT_BACKEND: str = "jose"  # jose, pyjwt (requires PyJWT) or hs256 (built-in)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    JWT_DECODE_CACHE_SIZE: int = 10000  # Verified tokens kept until their exp
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    JWT_REVOCATION_CAPACITY: int = 100000  # Expected logouts per token lifetime
+    JWT_REVOCATION_ERROR_RATE: float = 0.001  # Bloom filter false positive rate
+    
+    # Breached-password list built with build_breached_passwords.py (None = no check)
+    BREACHED_PASSWORDS_FILE: Optional[str] = None
+    
+    # Password hashing (argon2 runs in a process pool off the event loop)
+    PASSWORD_HASH_WORKERS: int = 0  # Worker processes (0 = one per CPU core)
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Max queued + running hash operations
+    PASSWORD_HASH_TIMEOUT: float = 5.0  # Per-call timeout in seconds
+    
+    # Argon2 cost parameters (tune per host with tune_argon2.py; hashes made
+    # with other parameters are transparently rehashed on successful login)
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    
+    # Principal cache (per-process snapshot of id/email/is_active/is_admin)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60.0  # Seconds
+    
+    # Concurrency bulkheads per route group (concurrent requests / queued requests)
+    BULKHEAD_QUEUE_TIMEOUT: float = 5.0  # Max seconds a request waits for a slot
+    BULKHEAD_AUTH_CONCURRENCY: int = 8
+    BULKHEAD_AUTH_QUEUE: int = 64
+    BULKHEAD_ADMIN_CONCURRENCY: int = 4
+    BULKHEAD_ADMIN_QUEUE: int = 16
+    BULKHEAD_ITEMS_CONCURRENCY: int = 32
+    BULKHEAD_ITEMS_QUEUE: int = 128
+    BULKHEAD_TOKENS_CONCURRENCY: int = 8
+    BULKHEAD_TOKENS_QUEUE: int = 32
+    
+    # Token-bucket rate limits per route group (requests per second / burst size,
+    # a rate of 0 disables the group's limit). Authenticated requests are
+    # limited per user or PAT, others per client IP.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Tracked clients per group (LRU evicted)
+    RATE_LIMIT_AUTH_RATE: float = 5.0
+    RATE_LIMIT_AUTH_BURST: int = 50
+    RATE_LIMIT_USERS_RATE: float = 20.0
+    RATE_LIMIT_USERS_BURST: int = 100
+    RATE_LIMIT_ADMIN_RATE: float = 20.0
+    RATE_LIMIT_ADMIN_BURST: int = 100
+    RATE_LIMIT_ITEMS_RATE: float = 50.0
+    RATE_LIMIT_ITEMS_BURST: int = 200
+    RATE_LIMIT_TOKENS_RATE: float = 10.0
+    RATE_LIMIT_TOKENS_BURST: int = 50
+    
+    # Claims-only authorization: trust JWT claims for tokens younger than this
+    CLAIMS_MAX_AGE_SECONDS: int = 300
+    
+    # Lifetime of JWTs minted by /api/auth/token-exchange for a PAT (minutes)
+    PAT_EXCHANGE_TOKEN_EXPIRE_MINUTES: int = 5
+    
+    # PAT last_used_at write-behind flush interval (seconds)
+    PAT_USAGE_FLUSH_INTERVAL: float = 30.0
+    
+    # PAT lookup caches (token hash -> token record, and unknown hashes)
+    PAT_CACHE_SIZE: int = 10000
+    PAT_CACHE_TTL: float = 60.0
+    PAT_NEGATIVE_CACHE_SIZE: int = 50000
+    PAT_NEGATIVE_CACHE_TTL: float = 300.0
     
     # Database
     DATABASE_URL: str = "sqlite:///./app.db"
@@ -38,7 +103,7 @@ class Settings(BaseSettings):
     
     # LDAP Configuration
     LDAP_ENABLED: bool = False
-    LDAP_SERVER: Optional[str] = None
+    LDAP_SERVER: Optional[str] = None  # Comma-separated list of servers for failover
     LDAP_PORT: int = 389
     LDAP_USE_SSL: bool = False
     LDAP_BIND_DN: Optional[str] = None
@@ -50,6 +115,38 @@ class Settings(BaseSettings):
     LDAP_GROUP_SEARCH_FILTER: str = "(member={user_dn})"
     LDAP_ADMIN_GROUPS: str = ""  # Comma-separated list of admin groups
     LDAP_ALLOWED_GROUPS: str = ""  # Comma-separated list of allowed groups (empty = all)
+    LDAP_POOL_SIZE: int = 10  # Max open connections per pool (service account / user binds)
+    LDAP_POOL_MAX_LIFETIME: float = 300.0  # Seconds before a connection is replaced
+    LDAP_POOL_IDLE_CHECK: float = 30.0  # Idle seconds after which a connection is checked before reuse
+    LDAP_USER_CACHE_SIZE: int = 10000  # Cached user lookups (DN, attributes, groups)
+    LDAP_USER_CACHE_TTL: float = 300.0  # Seconds; group and admin changes apply after this
+    LDAP_USER_NEGATIVE_CACHE_TTL: float = 60.0  # Seconds users not in the directory are remembered
+    LDAP_HEDGE_SEARCHES: bool = False  # Repeat slow searches on a second server (first answer wins)
+    LDAP_HEDGE_MIN_DELAY: float = 0.05  # Min seconds before hedging (otherwise the server's p95)
+    LDAP_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failed operations that open the breaker
+    LDAP_BREAKER_RECOVERY_TIMEOUT: float = 30.0  # Seconds before a trial call after opening
+    LDAP_BREAKER_HALF_OPEN_CALLS: int = 1  # Trial calls allowed while half-open
+    # Let LDAP accounts log in with their last directory password (kept as a
+    # local hash) while the directory is unavailable
+    LDAP_OFFLINE_LOGIN: bool = False
+    LDAP_WORKERS: int = 10  # Threads running LDAP calls off the event loop
+    LDAP_MAX_PENDING: int = 64  # Queued + running LDAP calls before new ones fail
+    LDAP_CALL_TIMEOUT: float = 15.0  # Deadline per LDAP call (search + bind), in seconds
+    LDAP_HEALTH_CHECK_INTERVAL: float = 30.0  # Seconds between background health probes
+    LDAP_HEALTH_HISTORY_SIZE: int = 20  # Probe results kept for the health endpoint
+    
+    # Directory sync: pre-provision users changed since the last run
+    LDAP_SYNC_INTERVAL: float = 0.0  # Seconds between scheduled syncs (0 = disabled)
+    LDAP_SYNC_PAGE_SIZE: int = 500  # Entries per LDAP page and per database batch
+    LDAP_SYNC_FILTER: str = "(&(objectCategory=person)(objectClass=user)(mail=*))"
+    LDAP_SYNC_CHANGE_ATTRIBUTE: str = "uSNChanged"  # Or modifyTimestamp (non-AD directories)
+    
+    # Login routing: LDAP accounts go to the directory, local accounts to the
+    # password database. With LDAP_LOGIN_RACE, local accounts not yet known to
+    # be missing from the directory are checked against both concurrently.
+    LDAP_LOGIN_RACE: bool = False
+    LDAP_LOGIN_ROUTE_CACHE_SIZE: int = 10000
+    LDAP_LOGIN_ROUTE_CACHE_TTL: float = 300.0  # Seconds a learned route is trusted
     
     # Email Configuration
     SMTP_ENABLED: bool = False
@@ -1,109 +1,134 @@
 """FastAPI dependencies for authentication and database."""
-from typing import Optional
-from fastapi import Depends, HTTPException, status, Request
-from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from typing import Callable
+from fastapi import Depends, HTTPException, status, Request, Security
+from fastapi.security import OAuth2PasswordBearer
+from sqlmodel import Session
 
+from app.core.authentication import AuthState, authenticate_header
 from app.core.database import get_session
-from app.core.security import decode_access_token
+from app.core.principal import Principal, invalidate_principal
+from app.core.token_security import SCOPE_BITS, compile_scopes
 from app.models.user import User
 
-# OAuth2 scheme for token authentication
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
-http_bearer = HTTPBearer(auto_error=False)
 
+class _DocumentedBearer(OAuth2PasswordBearer):
+    """
+    OAuth2 bearer scheme that only documents authentication in OpenAPI.
+    
+    The Authorization header is parsed once by AuthenticationMiddleware.
+    """
+    
+    async def __call__(self, request: Request) -> None:
+        return None
 
-def get_current_user(
-    jwt_token: Optional[str] = Depends(oauth2_scheme),
-    bearer_credentials: Optional[HTTPAuthorizationCredentials] = Depends(http_bearer),
-    session: Session = Depends(get_session)
-) -> User:
+
+# OAuth2 scheme for the OpenAPI "Authorize" button
+oauth2_scheme = _DocumentedBearer(
+    tokenUrl="/api/auth/login",
+    scheme_name="OAuth2PasswordBearer",
+    auto_error=False,
+)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_auth_state(request: Request) -> AuthState:
+    """
+    Get the credentials AuthenticationMiddleware parsed for this request.
+    
+    Falls back to parsing the header here if the middleware is not installed.
+    """
+    state = request.scope.get("state", {}).get("auth")
+    if state is None:
+        state = authenticate_header(request.headers.get("authorization"))
+        request.scope.setdefault("state", {})["auth"] = state
+    return state
+
+
+def get_current_principal(
+    request: Request,
+    session: Session = Depends(get_session),
+    _: None = Security(oauth2_scheme)
+) -> Principal:
     """
-    Get current authenticated user from JWT token or Personal Access Token.
+    Get the authenticated principal from JWT token or Personal Access Token.
     
-    Supports two authentication methods:
-    1. JWT token (from OAuth2 password flow)
-    2. Personal Access Token (PAT) with "pat_" prefix
+    Usually a plain accessor: AuthenticationMiddleware has already resolved
+    the principal from the in-process caches. The database session is only
+    used when those caches missed.
     
     Args:
-        jwt_token: JWT access token (from OAuth2PasswordBearer)
-        bearer_credentials: Bearer token credentials (for PAT)
-        session: Database session
+        request: Current request
+        session: Database session (only queried on a cache miss)
         
     Returns:
-        Current user
+        Current principal
         
     Raises:
         HTTPException: If no valid credentials provided
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    # Try PAT authentication first
-    if bearer_credentials and bearer_credentials.credentials.startswith("pat_"):
-        user = _authenticate_with_pat(bearer_credentials.credentials, session)
-        if user:
-            return user
-    
-    # Fall back to JWT authentication
-    if jwt_token:
-        user = _authenticate_with_jwt(jwt_token, session)
-        if user:
-            return user
-    
-    raise credentials_exception
+    principal = get_auth_state(request).resolve(session)
+    if principal is None:
+        raise _credentials_exception()
+    return principal
 
 
-def _authenticate_with_jwt(token: str, session: Session) -> Optional[User]:
-    """Authenticate using JWT token."""
-    payload = decode_access_token(token)
-    if payload is None:
-        return None
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    session: Session = Depends(get_session)
+) -> User:
+    """
+    Get current authenticated user row.
     
-    user_id: Optional[int] = payload.get("sub")
-    if user_id is None:
-        return None
+    Use this only when the full profile is needed; authorization-only
+    routes should depend on get_current_principal instead.
     
-    user = session.get(User, user_id)
+    Args:
+        principal: Authenticated principal
+        session: Database session
+        
+    Returns:
+        Current user
+        
+    Raises:
+        HTTPException: If the user no longer exists or is inactive
+    """
+    user = session.get(User, principal.id)
     if user is None or not user.is_active:
-        return None
-    
+        invalidate_principal(principal.id)
+        raise _credentials_exception()
     return user
 
 
-def _authenticate_with_pat(token: str, session: Session) -> Optional[User]:
-    """Authenticate using Personal Access Token."""
-    from app.models.token import PersonalAccessToken
-    from app.core.token_security import hash_token, is_token_expired
-    from datetime import datetime
-    
-    # Hash and look up token
-    token_hash = hash_token(token)
-    statement = select(PersonalAccessToken).where(
-        PersonalAccessToken.token_hash == token_hash
-    )
-    db_token = session.exec(statement).first()
-    
-    if not db_token or not db_token.is_active:
-        return None
-    
-    if is_token_expired(db_token.expires_at):
-        return None
+def get_current_claims(
+    request: Request,
+    session: Session = Depends(get_session),
+    _: None = Security(oauth2_scheme)
+) -> Principal:
+    """
+    Get the current principal from signed JWT claims alone.
     
-    # Update last used timestamp
-    db_token.last_used_at = datetime.utcnow()
-    session.add(db_token)
-    session.commit()
+    For fresh JWTs (younger than CLAIMS_MAX_AGE_SECONDS, epoch not
+    superseded) ``sub``/``email``/``is_admin`` are taken straight from the
+    token without any cache or database lookup. Older JWTs and PATs fall
+    back to get_current_principal. Use only where acting on claims up to
+    the staleness bound old is acceptable.
     
-    # Get user
-    user = session.get(User, db_token.user_id)
-    if user is None or not user.is_active:
-        return None
+    Raises:
+        HTTPException: If no valid credentials provided
+    """
+    state = get_auth_state(request)
+    principal = state.claims_principal()
+    if principal is not None:
+        return principal
     
-    return user
+    return get_current_principal(request, session)
 
 
 def get_current_active_user(
@@ -150,3 +175,51 @@ def get_current_admin_user(
             detail="Admin access required"
         )
     return current_user
+
+
+def get_current_admin_principal(
+    principal: Principal = Depends(get_current_principal)
+) -> Principal:
+    """
+    Get current principal if they are an admin.
+    
+    Same check as get_current_admin_user without loading the user row.
+    
+    Raises:
+        HTTPException: If user is not an admin
+    """
+    if not principal.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return principal
+
+
+def require_scopes(*scopes: str) -> Callable:
+    """
+    Get a dependency that rejects principals lacking any of the given scopes.
+    
+    Scopes are compiled to a bitmask once, here, so the per-request check
+    is a single bitwise AND. JWT sessions carry every scope; PATs carry
+    the scopes they were created with.
+    
+    Usage: ``dependencies=[Depends(require_scopes("write"))]``
+    
+    Raises:
+        ValueError: If a scope name is unknown
+    """
+    unknown = [scope for scope in scopes if scope not in SCOPE_BITS]
+    if unknown:
+        raise ValueError(f"Unknown scopes: {', '.join(unknown)}")
+    mask = compile_scopes(",".join(scopes))
+    
+    def check_scopes(principal: Principal = Depends(get_current_claims)) -> Principal:
+        if not principal.has_scopes(mask):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Token lacks required scope: {', '.join(scopes)}"
+            )
+        return principal
+    
+    return check_scopes
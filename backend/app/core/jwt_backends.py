@@ -0,0 +1,212 @@
+"""
+Pluggable JWT codecs.
+
+The codec used by ``create_access_token``/``decode_access_token`` is chosen
+with ``Settings.JWT_BACKEND``:
+
+- ``jose``: python-jose (default, always installed)
+- ``pyjwt``: PyJWT (optional dependency, ``pip install PyJWT``)
+- ``hs256``: minimal built-in HS256 codec using ``hmac``/``base64``
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from calendar import timegm
+from datetime import datetime
+from typing import Dict, Type
+
+# Registered claims that hold NumericDate values
+_TIME_CLAIMS = ("exp", "iat", "nbf")
+
+
+class JWTDecodeError(Exception):
+    """Raised when a token is malformed, has a bad signature or invalid claims."""
+
+
+def _normalize_claims(claims: dict) -> dict:
+    """Convert datetime time claims to integer timestamps."""
+    normalized = dict(claims)
+    for claim in _TIME_CLAIMS:
+        value = normalized.get(claim)
+        if isinstance(value, datetime):
+            normalized[claim] = timegm(value.utctimetuple())
+    return normalized
+
+
+class JWTCodec(ABC):
+    """Base class for JWT codecs bound to a key and algorithm."""
+
+    name = "base"
+
+    def __init__(self, key: str, algorithm: str):
+        self.key = key
+        self.algorithm = algorithm
+
+    @abstractmethod
+    def encode(self, claims: dict) -> str:
+        """Sign claims and return the compact token."""
+
+    @abstractmethod
+    def decode(self, token: str) -> dict:
+        """Verify a token and return its claims, raising JWTDecodeError if invalid."""
+
+
+class JoseCodec(JWTCodec):
+    """Codec backed by python-jose."""
+
+    name = "jose"
+
+    def __init__(self, key: str, algorithm: str):
+        super().__init__(key, algorithm)
+        from jose import JWTError, jwt
+        self._jwt = jwt
+        self._error = JWTError
+
+    def encode(self, claims: dict) -> str:
+        return self._jwt.encode(_normalize_claims(claims), self.key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return self._jwt.decode(token, self.key, algorithms=[self.algorithm])
+        except self._error as e:
+            raise JWTDecodeError(str(e)) from e
+
+
+class PyJWTCodec(JWTCodec):
+    """Codec backed by PyJWT (optional dependency)."""
+
+    name = "pyjwt"
+
+    def __init__(self, key: str, algorithm: str):
+        super().__init__(key, algorithm)
+        try:
+            import jwt
+        except ImportError as e:
+            raise RuntimeError("JWT_BACKEND=pyjwt requires the PyJWT package") from e
+        self._jwt = jwt
+        self._error = jwt.PyJWTError
+
+    def encode(self, claims: dict) -> str:
+        return self._jwt.encode(_normalize_claims(claims), self.key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            claims = self._jwt.decode(
+                token,
+                self.key,
+                algorithms=[self.algorithm],
+                options={"verify_aud": False},
+            )
+        except self._error as e:
+            raise JWTDecodeError(str(e)) from e
+        # python-jose (the default) rejects non-string subjects; keep that contract
+        if "sub" in claims and not isinstance(claims["sub"], str):
+            raise JWTDecodeError("Subject must be a string")
+        return claims
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(segment: str) -> bytes:
+    if not segment or "=" in segment:
+        raise JWTDecodeError("Invalid base64 segment")
+    try:
+        return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise JWTDecodeError("Invalid base64 segment") from e
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class HS256Codec(JWTCodec):
+    """
+    Minimal built-in HS256 codec.
+
+    Only accepts ``alg: HS256`` tokens (no ``none``, no algorithm switching,
+    no ``crit`` extensions) and enforces the same claim checks the app
+    relies on from python-jose: numeric ``exp``/``nbf``/``iat``, ``exp`` in
+    the future, ``nbf`` in the past and a string ``sub``.
+    """
+
+    name = "hs256"
+
+    _HEADER = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+
+    def __init__(self, key: str, algorithm: str):
+        if algorithm != "HS256":
+            raise ValueError(f"hs256 JWT backend does not support algorithm {algorithm}")
+        super().__init__(key, algorithm)
+        self._key = key.encode()
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        return hmac.new(self._key, signing_input, hashlib.sha256).digest()
+
+    def encode(self, claims: dict) -> str:
+        payload = _b64encode(
+            json.dumps(_normalize_claims(claims), separators=(",", ":")).encode()
+        )
+        signing_input = f"{self._HEADER}.{payload}"
+        signature = _b64encode(self._sign(signing_input.encode("ascii")))
+        return f"{signing_input}.{signature}"
+
+    def decode(self, token: str) -> dict:
+        try:
+            signing_input, _, signature = token.rpartition(".")
+            header_segment, _, payload_segment = signing_input.partition(".")
+            signing_bytes = signing_input.encode("ascii")
+        except (AttributeError, UnicodeEncodeError) as e:
+            raise JWTDecodeError("Malformed token") from e
+        if not header_segment or "." in payload_segment or not signature:
+            raise JWTDecodeError("Malformed token")
+
+        # Check the signature before parsing anything attacker controlled
+        if not hmac.compare_digest(self._sign(signing_bytes), _b64decode(signature)):
+            raise JWTDecodeError("Signature verification failed")
+
+        try:
+            header = json.loads(_b64decode(header_segment))
+            claims = json.loads(_b64decode(payload_segment))
+        except ValueError as e:
+            raise JWTDecodeError("Malformed token") from e
+        if not isinstance(header, dict) or not isinstance(claims, dict):
+            raise JWTDecodeError("Malformed token")
+        if header.get("alg") != "HS256" or "crit" in header:
+            raise JWTDecodeError("Unsupported token header")
+
+        now = time.time()
+        for claim in _TIME_CLAIMS:
+            if claim in claims and not _is_number(claims[claim]):
+                raise JWTDecodeError(f"Invalid {claim} claim")
+        if "exp" in claims and now >= claims["exp"]:
+            raise JWTDecodeError("Signature has expired")
+        if "nbf" in claims and now < claims["nbf"]:
+            raise JWTDecodeError("The token is not yet valid")
+        if "sub" in claims and not isinstance(claims["sub"], str):
+            raise JWTDecodeError("Subject must be a string")
+        return claims
+
+
+JWT_BACKENDS: Dict[str, Type[JWTCodec]] = {
+    JoseCodec.name: JoseCodec,
+    PyJWTCodec.name: PyJWTCodec,
+    HS256Codec.name: HS256Codec,
+}
+
+
+def get_codec(name: str, key: str, algorithm: str) -> JWTCodec:
+    """Create the codec registered under name."""
+    try:
+        codec_class = JWT_BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown JWT_BACKEND {name!r}; expected one of {', '.join(JWT_BACKENDS)}"
+        )
+    return codec_class(key, algorithm)
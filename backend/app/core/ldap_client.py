@@ -0,0 +1,234 @@
+"""
+Async facade over the blocking ldap3-based ``LDAPService``.
+
+ldap3 performs synchronous socket I/O, so calling ``ldap_service`` from an
+``async def`` endpoint would stall the event loop for every other request
+for as long as the directory takes to answer. ``AsyncLDAPClient`` runs
+those calls in a dedicated thread pool (sized to the LDAP connection
+pools, so a slow directory cannot starve the default executor), bounds
+the number of outstanding calls and puts a deadline on each one.
+
+A call that is cancelled or runs past its deadline while still queued
+never reaches the directory; one that is already running finishes in its
+thread and its result is discarded.
+
+Directory health is probed by a background task every
+``LDAP_HEALTH_CHECK_INTERVAL`` seconds, so the health endpoint answers
+from the last probe instead of binding and searching on every hit.
+"""
+import logging
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.ldap_service import DIRECTORY_UNAVAILABLE, LDAPService, ldap_service
+
+logger = logging.getLogger(__name__)
+
+LDAP_BUSY = "LDAP service is busy"
+LDAP_TIMED_OUT = "LDAP request timed out"
+
+# Errors from authenticate() meaning the directory could not answer
+UNAVAILABLE_ERRORS = frozenset({DIRECTORY_UNAVAILABLE, LDAP_BUSY, LDAP_TIMED_OUT})
+
+
+class LDAPTimeout(Exception):
+    """Raised when an LDAP call misses its deadline or cannot be queued."""
+
+
+class AsyncLDAPClient:
+    """
+    Run LDAPService calls off the event loop with deadlines.
+
+    Args:
+        service: Blocking LDAP service to wrap
+        max_workers: Threads dedicated to LDAP calls
+        max_pending: Max queued plus running calls before new calls fail
+        timeout: Default deadline per call in seconds
+    """
+
+    def __init__(
+        self,
+        service: LDAPService,
+        max_workers: int = 10,
+        max_pending: int = 64,
+        timeout: float = 15.0
+    ):
+        self.service = service
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._inline_probe: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._calls = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._cancelled = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get or lazily create the thread pool."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="ldap",
+                )
+            return self._executor
+
+    async def _run(self, func: Callable, *args, timeout: Optional[float] = None):
+        """
+        Run a blocking LDAP call in the pool, enforcing queue and time limits.
+
+        Raises:
+            LDAPTimeout: If the call is rejected or misses its deadline
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise LDAPTimeout(LDAP_BUSY)
+            self._pending += 1
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            future = loop.run_in_executor(self._get_executor(), func, *args)
+            return await asyncio.wait_for(future, timeout=timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise LDAPTimeout(LDAP_TIMED_OUT)
+        except asyncio.CancelledError:
+            with self._lock:
+                self._cancelled += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._pending -= 1
+                self._calls += 1
+                self._total_seconds += elapsed
+                self._max_seconds = max(self._max_seconds, elapsed)
+
+    async def authenticate(
+        self,
+        username: str,
+        password: str,
+        timeout: Optional[float] = None
+    ) -> Tuple[bool, Optional[Dict], Optional[str]]:
+        """
+        Authenticate against LDAP without blocking the event loop.
+
+        Returns:
+            Tuple of (success, user_info_dict, error_message), as
+            ``LDAPService.authenticate``; a missed deadline is an error
+        """
+        # Fail fast during an outage without queueing for a thread
+        if self.service.breaker.is_open():
+            return False, None, DIRECTORY_UNAVAILABLE
+        try:
+            return await self._run(self.service.authenticate, username, password, timeout=timeout)
+        except LDAPTimeout as e:
+            return False, None, str(e)
+
+    async def health_check(self, timeout: Optional[float] = None) -> Dict[str, any]:
+        """Check LDAP health without blocking the event loop."""
+        try:
+            return await self._run(self.service.health_check, timeout=timeout)
+        except LDAPTimeout as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "healthy": False
+            }
+
+    async def probe_health(self) -> Dict[str, any]:
+        """Run a health check and store it as the cached health state."""
+        start = time.perf_counter()
+        health = await self.health_check()
+        self.service.record_health(health, time.perf_counter() - start)
+        return health
+    
+    async def cached_health(self) -> Dict[str, any]:
+        """
+        Return the last health probe result.
+        
+        Probes inline only when no result is recent enough (first call, or
+        the background prober is not running). Concurrent callers share one
+        inline probe rather than each loading the directory.
+        """
+        health = self.service.cached_health()
+        if health is None or health["stale"]:
+            # Shielded so a cancelled caller does not cancel the others' probe
+            await asyncio.shield(self._shared_probe())
+            health = self.service.cached_health()
+        return health
+    
+    def _shared_probe(self) -> asyncio.Task:
+        """Get the inline probe in flight on this event loop, starting one if needed."""
+        task = self._inline_probe
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._inline_probe = asyncio.create_task(self.probe_health())
+        return task
+    
+    async def _probe_periodically(self) -> None:
+        while True:
+            try:
+                await self.probe_health()
+            except Exception as e:
+                logger.error(f"LDAP health probe failed: {e}")
+            await asyncio.sleep(self.service.config.health_check_interval)
+    
+    def start_health_probes(self) -> None:
+        """Start background health probes on the running event loop (if LDAP is enabled)."""
+        if self._health_task is None and self.service.config.enabled:
+            self._health_task = asyncio.create_task(self._probe_periodically())
+    
+    async def stop_health_probes(self) -> None:
+        """Stop the background health probes."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+    
+    def stats(self) -> dict:
+        """Return thread pool metrics."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "timeout": self.timeout,
+                "pending": self._pending,
+                "calls": self._calls,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "cancelled": self._cancelled,
+                "avg_seconds": self._total_seconds / self._calls if self._calls else 0.0,
+                "max_seconds": self._max_seconds,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the thread pool, dropping queued calls."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global async LDAP client
+ldap_client = AsyncLDAPClient(
+    ldap_service,
+    max_workers=settings.LDAP_WORKERS,
+    max_pending=settings.LDAP_MAX_PENDING,
+    timeout=settings.LDAP_CALL_TIMEOUT,
+)
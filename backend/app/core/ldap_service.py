@@ -2,30 +2,68 @@
 LDAP authentication service.
 
 Provides flexible LDAP/Active Directory authentication with:
-- Multiple LDAP server support
-- Automatic user provisioning
+- Multiple LDAP servers with latency-aware failover and hedged searches
+- Automatic user provisioning, and paged incremental searches for the
+  directory sync job
 - Group-based role assignment
 - Connection pooling and health checks
 - Comprehensive error handling and logging
 """
 import logging
-from typing import Optional, Dict, List, Tuple
-from datetime import datetime
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Iterator, Optional, Dict, List, Tuple
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
 
 from ldap3 import Server, Connection, ALL, NTLM, SIMPLE, Tls
 from ldap3.core.exceptions import (
     LDAPException, 
     LDAPBindError, 
+    LDAPCommunicationError,
+    LDAPInvalidCredentialsResult,
+    LDAPResponseTimeoutError,
     LDAPSocketOpenError,
     LDAPSocketReceiveError,
     LDAPOperationsErrorResult
 )
 import ssl
 
+from app.core.cache import TTLCache
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Errors returned by LDAPService.authenticate when the directory has no such
+# user, and when it could not be reached (or the circuit breaker is open)
+USER_NOT_FOUND = "User not found in directory"
+DIRECTORY_UNAVAILABLE = "LDAP server unreachable"
+
+_MISSING = object()
+
+# Simple Paged Results control (RFC 2696)
+_PAGED_RESULTS_OID = '1.2.840.113556.1.4.319'
+
+
+class LDAPPoolExhaustedError(LDAPCommunicationError):
+    """Raised when no pooled connection to a server became free in time."""
+
+
+class LDAPCircuitOpenError(LDAPCommunicationError, CircuitOpenError):
+    """Raised instead of contacting the directory while the circuit breaker is open."""
+
+
+# Errors after which an operation is retried on the next server. Searches
+# are safe to repeat; a user bind is only retried if it was never sent, so
+# a wrong password is not counted twice towards the user's lockout limit.
+_COMMUNICATION_ERRORS = (LDAPCommunicationError, LDAPResponseTimeoutError)
+_SEARCH_FAILOVER_ERRORS = _COMMUNICATION_ERRORS
+_BIND_FAILOVER_ERRORS = (LDAPSocketOpenError, LDAPPoolExhaustedError)
+
 
 class LDAPConfig:
     """LDAP configuration with validation and defaults."""
@@ -48,6 +86,23 @@ class LDAPConfig:
                                            '(member={user_dn})')
         self.admin_groups = self._parse_list(getattr(settings, 'LDAP_ADMIN_GROUPS', ''))
         self.allowed_groups = self._parse_list(getattr(settings, 'LDAP_ALLOWED_GROUPS', ''))
+        self.pool_size = getattr(settings, 'LDAP_POOL_SIZE', 10)
+        self.pool_max_lifetime = getattr(settings, 'LDAP_POOL_MAX_LIFETIME', 300.0)
+        self.pool_idle_check = getattr(settings, 'LDAP_POOL_IDLE_CHECK', 30.0)
+        self.user_cache_size = getattr(settings, 'LDAP_USER_CACHE_SIZE', 10000)
+        self.user_cache_ttl = getattr(settings, 'LDAP_USER_CACHE_TTL', 300.0)
+        self.user_negative_cache_ttl = getattr(settings, 'LDAP_USER_NEGATIVE_CACHE_TTL', 60.0)
+        self.hedge_searches = getattr(settings, 'LDAP_HEDGE_SEARCHES', False)
+        self.hedge_min_delay = getattr(settings, 'LDAP_HEDGE_MIN_DELAY', 0.05)
+        self.breaker_failure_threshold = getattr(settings, 'LDAP_BREAKER_FAILURE_THRESHOLD', 5)
+        self.breaker_recovery_timeout = getattr(settings, 'LDAP_BREAKER_RECOVERY_TIMEOUT', 30.0)
+        self.breaker_half_open_calls = getattr(settings, 'LDAP_BREAKER_HALF_OPEN_CALLS', 1)
+        self.health_check_interval = getattr(settings, 'LDAP_HEALTH_CHECK_INTERVAL', 30.0)
+        self.health_history_size = getattr(settings, 'LDAP_HEALTH_HISTORY_SIZE', 20)
+        self.sync_filter = getattr(settings, 'LDAP_SYNC_FILTER',
+                                   '(&(objectCategory=person)(objectClass=user)(mail=*))')
+        self.sync_change_attribute = getattr(settings, 'LDAP_SYNC_CHANGE_ATTRIBUTE', 'uSNChanged')
+        self.sync_page_size = getattr(settings, 'LDAP_SYNC_PAGE_SIZE', 500)
         
         # Attributes to retrieve
         self.user_attributes = ['cn', 'mail', 'displayName', 'memberOf', 'sAMAccountName']
@@ -59,6 +114,21 @@ class LDAPConfig:
             return []
         return [item.strip() for item in value.split(',') if item.strip()]
     
+    def server_addresses(self) -> List[Tuple[str, int]]:
+        """
+        Parse LDAP_SERVER into (host, port) pairs.
+        
+        Accepts a comma-separated list of ``host``, ``host:port`` or
+        ``ldap[s]://host[:port]`` entries; LDAP_PORT is the default port.
+        """
+        addresses = []
+        for entry in self._parse_list(self.server or ''):
+            if '://' not in entry:
+                entry = f'//{entry}'
+            parsed = urlsplit(entry)
+            addresses.append((parsed.hostname, parsed.port or self.port))
+        return addresses
+    
     def is_valid(self) -> Tuple[bool, Optional[str]]:
         """Validate LDAP configuration."""
         if not self.enabled:
@@ -76,42 +146,341 @@ class LDAPConfig:
         return True, None
 
 
-class LDAPService:
-    """LDAP authentication and user management service."""
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
     
-    def __init__(self):
-        self.config = LDAPConfig()
-        self._server: Optional[Server] = None
-        self._last_health_check: Optional[datetime] = None
-        self._health_check_interval = 300  # 5 minutes
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class LDAPConnectionPool:
+    """
+    Thread-safe pool of open LDAP connections.
+    
+    Connections are created on demand by ``factory`` (up to ``size`` at a
+    time) and kept open after use instead of being unbound. Connections
+    older than ``max_lifetime`` are replaced, and connections idle for more
+    than ``idle_check`` seconds are checked with a Who Am I request before
+    reuse. A connection that raised during use is closed, not reused.
+    
+    Args:
+        name: Pool name (used in stats and log messages)
+        factory: Returns a new open connection; may raise LDAPException
+        size: Max open connections
+        max_lifetime: Seconds before a connection is replaced
+        idle_check: Idle seconds after which a connection is checked
+        acquire_timeout: Max seconds to wait for a free connection
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Connection],
+        size: int,
+        max_lifetime: float,
+        idle_check: float,
+        acquire_timeout: float
+    ):
+        self.name = name
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.idle_check = idle_check
+        self.acquire_timeout = acquire_timeout
+        self._factory = factory
+        self._cond = threading.Condition()
+        self._idle: Deque[_PooledConnection] = deque()
+        self._open = 0
+        self._created = 0
+        self._reused = 0
+        self._discarded = 0
+        self._timeouts = 0
+    
+    def _acquire(self) -> _PooledConnection:
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise LDAPPoolExhaustedError(f"No free connection in LDAP {self.name} pool")
+                    self._cond.wait(remaining)
+                pooled = self._idle.pop() if self._idle else None
+                # Reserve the slot before doing any I/O outside the lock
+                if pooled is None:
+                    self._open += 1
+            
+            if pooled is None:
+                try:
+                    pooled = _PooledConnection(self._factory())
+                except Exception:
+                    self._forget()
+                    raise
+                with self._cond:
+                    self._created += 1
+                return pooled
+            
+            now = time.monotonic()
+            if now - pooled.created_at > self.max_lifetime or pooled.conn.closed:
+                self.discard(pooled)
+                continue
+            if now - pooled.last_used > self.idle_check and not self._is_alive(pooled.conn):
+                self.discard(pooled)
+                continue
+            with self._cond:
+                self._reused += 1
+            return pooled
+    
+    @staticmethod
+    def _is_alive(conn: Connection) -> bool:
+        try:
+            conn.extend.standard.who_am_i()
+            return True
+        except LDAPException:
+            return False
+    
+    def _forget(self) -> None:
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+    
+    def release(self, pooled: _PooledConnection) -> None:
+        """Return a healthy connection to the pool."""
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+    
+    def discard(self, pooled: _PooledConnection) -> None:
+        """Close a connection and free its slot."""
+        try:
+            pooled.conn.unbind()
+        except Exception:
+            pass
+        with self._cond:
+            self._discarded += 1
+        self._forget()
+    
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """
+        Borrow a connection for the duration of a with block.
         
+        Raises:
+            LDAPException: If no connection could be opened in time
+        """
+        pooled = self._acquire()
+        try:
+            yield pooled.conn
+        except BaseException:
+            self.discard(pooled)
+            raise
+        self.release(pooled)
+    
+    def clear(self) -> None:
+        """Close every idle connection."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for pooled in idle:
+            self.discard(pooled)
+    
+    def stats(self) -> dict:
+        """Return pool sizing and counters."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "created": self._created,
+                "reused": self._reused,
+                "discarded": self._discarded,
+                "timeouts": self._timeouts,
+            }
+
+
+class DirectoryServer:
+    """
+    One directory server with its connection pools and observed latency.
+    
+    Keeps a moving average and a window of recent operation latencies (for
+    ordering servers and picking hedge delays) and backs off exponentially
+    after consecutive connection failures.
+    """
+    
+    LATENCY_WINDOW = 100  # Recent latencies kept for percentiles
+    MIN_HEDGE_SAMPLES = 20  # Latencies needed before hedging on this server
+    MAX_BACKOFF = 60.0  # Seconds a failing server is skipped at most
+    
+    def __init__(self, host: str, port: int, service: "LDAPService"):
+        self.host = host
+        self.port = port
+        self.name = f"{host}:{port}"
+        self._ldap_server: Optional[Server] = None
+        self._service = service
+        
+        # Service-account connections for searches, and connections that
+        # are rebound as each user to verify their password
+        self.service_pool = service._create_pool(f"{self.name} service", self._open_service_connection)
+        self.user_pool = service._create_pool(f"{self.name} user", self._open_user_connection)
+        
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=self.LATENCY_WINDOW)
+        self._average: Optional[float] = None
+        self._failures = 0
+        self._down_until = 0.0
+    
     def _get_server(self) -> Server:
-        """Get or create LDAP server instance."""
-        if self._server is None:
+        """Get or create the ldap3 server instance."""
+        if self._ldap_server is None:
+            config = self._service.config
             tls_config = None
-            if self.config.use_ssl:
+            if config.use_ssl:
                 tls_config = Tls(validate=ssl.CERT_REQUIRED)
             
-            self._server = Server(
-                self.config.server,
-                port=self.config.port,
-                use_ssl=self.config.use_ssl,
+            self._ldap_server = Server(
+                self.host,
+                port=self.port,
+                use_ssl=config.use_ssl,
                 tls=tls_config,
                 get_info=ALL,
-                connect_timeout=self.config.timeout
+                connect_timeout=config.timeout
             )
-            logger.info(f"LDAP server initialized: {self.config.server}:{self.config.port}")
+            logger.info(f"LDAP server initialized: {self.name}")
         
-        return self._server
+        return self._ldap_server
+    
+    def _open_service_connection(self) -> Connection:
+        """Open a connection bound as the service account (service pool factory)."""
+        conn = self._service._create_connection(self._get_server())
+        if not conn.bind():
+            raise LDAPBindError(f"Service account bind failed: {conn.result}")
+        return conn
+    
+    def _open_user_connection(self) -> Connection:
+        """Open an unbound connection for user binds (user pool factory)."""
+        conn = self._service._create_connection(self._get_server())
+        conn.open()
+        return conn
+    
+    def record_success(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self._average = seconds if self._average is None else 0.8 * self._average + 0.2 * seconds
+            self._failures = 0
+            self._down_until = 0.0
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            backoff = min(self.MAX_BACKOFF, 2.0 ** (self._failures - 1))
+            self._down_until = time.monotonic() + backoff
+    
+    def is_available(self) -> bool:
+        """False while backing off after connection failures."""
+        return time.monotonic() >= self._down_until
+    
+    def average_latency(self) -> float:
+        """Moving average latency in seconds (0 until measured)."""
+        return self._average or 0.0
+    
+    def p95(self) -> Optional[float]:
+        """95th percentile of recent latencies, or None without enough samples."""
+        with self._lock:
+            if len(self._latencies) < self.MIN_HEDGE_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+    
+    def close(self) -> None:
+        self.service_pool.clear()
+        self.user_pool.clear()
+    
+    def stats(self) -> dict:
+        p95 = self.p95()
+        with self._lock:
+            return {
+                "available": time.monotonic() >= self._down_until,
+                "consecutive_failures": self._failures,
+                "avg_ms": round(self._average * 1000, 3) if self._average is not None else None,
+                "p95_ms": round(p95 * 1000, 3) if p95 is not None else None,
+                "pools": {
+                    "service": self.service_pool.stats(),
+                    "user": self.user_pool.stats(),
+                },
+            }
+
+
+class LDAPService:
+    """LDAP authentication and user management service."""
+    
+    def __init__(self):
+        self.config = LDAPConfig()
+        self._servers: Optional[List[DirectoryServer]] = None
+        self._servers_lock = threading.Lock()
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedges = 0
+        self._hedges_won = 0
+        self._last_health_check: Optional[datetime] = None
+        self._health_check_interval = self.config.health_check_interval
+        # Latest probe result and recent probe outcomes, served by the
+        # health endpoint without contacting the directory
+        self._health_lock = threading.Lock()
+        self._health: Optional[Dict[str, Any]] = None
+        self._health_checked_at = 0.0
+        self._health_history: Deque[Dict[str, Any]] = deque(maxlen=self.config.health_history_size)
+        
+        # Username -> (user_dn, user_info), or (None, None) for users the
+        # directory does not have. Only lookups are cached, never passwords.
+        self._user_cache = TTLCache(
+            maxsize=self.config.user_cache_size,
+            ttl=self.config.user_cache_ttl,
+        )
+        
+        # Opens when operations fail on every server, so an outage costs
+        # callers nothing instead of a connect timeout each
+        self.breaker = CircuitBreaker(
+            "ldap",
+            failure_threshold=self.config.breaker_failure_threshold,
+            recovery_timeout=self.config.breaker_recovery_timeout,
+            half_open_max_calls=self.config.breaker_half_open_calls,
+        )
+    
+    def _create_pool(self, name: str, factory: Callable[[], Connection]) -> LDAPConnectionPool:
+        return LDAPConnectionPool(
+            name,
+            factory,
+            size=self.config.pool_size,
+            max_lifetime=self.config.pool_max_lifetime,
+            idle_check=self.config.pool_idle_check,
+            acquire_timeout=self.config.timeout,
+        )
+    
+    def _get_servers(self) -> List[DirectoryServer]:
+        """Get or create the configured directory servers."""
+        with self._servers_lock:
+            if self._servers is None:
+                self._servers = [
+                    DirectoryServer(host, port, self)
+                    for host, port in self.config.server_addresses()
+                ]
+            return self._servers
+    
+    def _ordered_servers(self) -> List[DirectoryServer]:
+        """Available servers fastest first, then servers backing off after failures."""
+        servers = self._get_servers()
+        available = sorted((s for s in servers if s.is_available()), key=DirectoryServer.average_latency)
+        return available + [s for s in servers if not s.is_available()]
     
     def _create_connection(
         self, 
+        server: Server,
         user_dn: Optional[str] = None, 
         password: Optional[str] = None
     ) -> Connection:
         """Create LDAP connection with appropriate authentication."""
-        server = self._get_server()
-        
         # Use service account credentials if not provided
         bind_user = user_dn or self.config.bind_dn
         bind_pass = password or self.config.bind_password
@@ -131,6 +500,342 @@ class LDAPService:
         
         return conn
     
+    def _attempt(
+        self,
+        server: DirectoryServer,
+        operation: Callable[[DirectoryServer], Any],
+        failover: tuple,
+        measure: bool = True
+    ) -> Any:
+        """Run operation on one server, recording its latency (if measure) or failure."""
+        start = time.perf_counter()
+        try:
+            result = operation(server)
+        except failover:
+            server.record_failure()
+            raise
+        if measure:
+            server.record_success(time.perf_counter() - start)
+        return result
+    
+    def _run(
+        self,
+        operation: Callable[[DirectoryServer], Any],
+        failover: tuple = _SEARCH_FAILOVER_ERRORS,
+        hedge: bool = False,
+        measure: bool = True
+    ) -> Any:
+        """
+        Run operation on the best server, failing over to the next on errors.
+        
+        With hedge (and LDAP_HEDGE_SEARCHES), the operation is also started
+        on the next server once the first has taken longer than its p95
+        latency, and the first result wins. An operation that fails on every
+        server (or a bind that lost its connection) counts as a failure for
+        the circuit breaker. Long-running operations pass measure=False so
+        they do not skew the servers' latency figures.
+        
+        Raises:
+            LDAPCircuitOpenError: If the circuit breaker is open
+            LDAPException: If every server failed, or a non-failover error
+        """
+        if not self.breaker.allow():
+            raise LDAPCircuitOpenError("LDAP circuit breaker is open")
+        
+        failure: Optional[BaseException] = None
+        try:
+            return self._run_on_servers(operation, failover, hedge, measure)
+        except _COMMUNICATION_ERRORS as e:
+            failure = e
+            raise
+        finally:
+            if failure is None:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure(failure)
+    
+    def _run_on_servers(
+        self,
+        operation: Callable[[DirectoryServer], Any],
+        failover: tuple,
+        hedge: bool,
+        measure: bool = True
+    ) -> Any:
+        servers = self._ordered_servers()
+        if not servers:
+            raise LDAPSocketOpenError("No LDAP server configured")
+        
+        if hedge and self.config.hedge_searches and len(servers) > 1:
+            delay = servers[0].p95()
+            if delay is not None:
+                return self._run_hedged(operation, servers, max(delay, self.config.hedge_min_delay))
+        
+        last_error: Optional[LDAPException] = None
+        for server in servers:
+            try:
+                return self._attempt(server, operation, failover, measure)
+            except failover as e:
+                logger.warning(f"LDAP server {server.name} failed, trying next: {e}")
+                last_error = e
+        raise last_error
+    
+    def _run_hedged(
+        self,
+        operation: Callable[[DirectoryServer], Any],
+        servers: List[DirectoryServer],
+        delay: float
+    ) -> Any:
+        """Run a search on servers[0], hedged on servers[1] after delay seconds."""
+        executor = self._get_hedge_executor()
+        primary = executor.submit(self._attempt, servers[0], operation, _SEARCH_FAILOVER_ERRORS)
+        pending = {primary}
+        tried = 1
+        done, _ = wait(pending, timeout=delay)
+        if not done:
+            pending.add(executor.submit(self._attempt, servers[1], operation, _SEARCH_FAILOVER_ERRORS))
+            tried = 2
+            with self._servers_lock:
+                self._hedges += 1
+        
+        last_error: Optional[LDAPException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except _SEARCH_FAILOVER_ERRORS as e:
+                    last_error = e
+                    continue
+                if future is not primary:
+                    with self._servers_lock:
+                        self._hedges_won += 1
+                return result
+        
+        # Every attempt failed (the primary may have failed before the hedge
+        # was due): fall back to the servers not tried yet, in turn
+        for server in servers[tried:]:
+            try:
+                return self._attempt(server, operation, _SEARCH_FAILOVER_ERRORS)
+            except _SEARCH_FAILOVER_ERRORS as e:
+                last_error = e
+        raise last_error
+    
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        with self._servers_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.config.pool_size * 2,
+                    thread_name_prefix="ldap-hedge",
+                )
+            return self._hedge_executor
+    
+    def _search(self, search_filter: str, attributes: List[str], scope: str = 'SUBTREE') -> list:
+        """Search with the service account on the best server (hedged if enabled)."""
+        def search(server: DirectoryServer) -> list:
+            with server.service_pool.connection() as conn:
+                conn.search(
+                    search_base=self.config.search_base,
+                    search_filter=search_filter,
+                    search_scope=scope,
+                    attributes=attributes
+                )
+                return conn.entries
+        
+        return self._run(search, hedge=True)
+    
+    def _verify_password(self, user_dn: str, password: str) -> bool:
+        """Bind as user_dn on a pooled connection to check the password."""
+        # An empty password would be an unauthenticated bind, which succeeds
+        if not password:
+            return False
+        
+        def bind(server: DirectoryServer) -> bool:
+            with server.user_pool.connection() as conn:
+                try:
+                    return bool(conn.rebind(
+                        user=user_dn,
+                        password=password,
+                        authentication=NTLM if self.config.use_ntlm else SIMPLE
+                    ))
+                except (LDAPBindError, LDAPInvalidCredentialsResult):
+                    # A rejected password is an answer, not a broken
+                    # connection, so the connection goes back to the pool
+                    return False
+                finally:
+                    # Don't keep the user's password around on the pooled connection
+                    conn.password = None
+        
+        return self._run(bind, failover=_BIND_FAILOVER_ERRORS)
+    
+    def search_changed_users(
+        self,
+        marks: Dict[str, str],
+        on_page: Callable[[List[Dict]], None],
+        page_size: Optional[int] = None
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Page through users matching LDAP_SYNC_FILTER that changed since the last sync.
+        
+        The whole paged search runs on one server, since paged-results
+        cookies are only valid there, and restarts on the next server if
+        that one fails (so on_page must be idempotent). uSNChanged values
+        are local to each domain controller, so their high-water marks are
+        kept per server; other change attributes (e.g. modifyTimestamp)
+        share one mark.
+        
+        Args:
+            marks: Stored high-water marks by key
+            on_page: Called with the user info dicts of each page
+            page_size: Entries per page (default LDAP_SYNC_PAGE_SIZE)
+        
+        Returns:
+            (mark key for the server used, new high-water mark or None if
+            no entry matched)
+        
+        Raises:
+            LDAPException: If the directory could not be searched
+        """
+        attribute = self.config.sync_change_attribute
+        per_server = attribute.lower() == 'usnchanged'
+        attributes = self.config.user_attributes + [attribute]
+        page_size = page_size or self.config.sync_page_size
+        
+        def page_through(server: DirectoryServer) -> Tuple[str, Optional[str]]:
+            key = f"{attribute}@{server.name}" if per_server else attribute
+            since = marks.get(key)
+            search_filter = self.config.sync_filter
+            if since is not None:
+                # USNs are exact, timestamps only have second precision
+                lower = int(since) + 1 if per_server else since
+                search_filter = f"(&{search_filter}({attribute}>={lower}))"
+            
+            highest = None
+            cookie = None
+            with server.service_pool.connection() as conn:
+                while True:
+                    conn.search(
+                        search_base=self.config.search_base,
+                        search_filter=search_filter,
+                        search_scope='SUBTREE',
+                        attributes=attributes,
+                        paged_size=page_size,
+                        paged_cookie=cookie
+                    )
+                    users = []
+                    for entry in conn.entries:
+                        if hasattr(entry, attribute):
+                            value = self._change_value(getattr(entry, attribute).value, per_server)
+                            if highest is None or value > highest:
+                                highest = value
+                        users.append(self._user_info_from_entry(entry))
+                    on_page(users)
+                    
+                    cookie = (
+                        conn.result.get('controls', {})
+                        .get(_PAGED_RESULTS_OID, {})
+                        .get('value', {})
+                        .get('cookie')
+                    )
+                    if not cookie:
+                        break
+            return key, str(highest) if highest is not None else None
+        
+        return self._run(page_through, measure=False)
+    
+    @staticmethod
+    def _change_value(value: Any, numeric: bool) -> Any:
+        """Normalise a change attribute value so values compare in change order."""
+        if numeric:
+            return int(value)
+        if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc)
+            return value.strftime('%Y%m%d%H%M%SZ')
+        return str(value)
+    
+    def server_stats(self) -> Dict[str, dict]:
+        """Return health, latency and pool stats per directory server."""
+        return {server.name: server.stats() for server in self._get_servers()}
+    
+    def hedge_stats(self) -> dict:
+        """Return how many searches were hedged and how many hedges won."""
+        with self._servers_lock:
+            return {"enabled": self.config.hedge_searches, "fired": self._hedges, "won": self._hedges_won}
+    
+    def user_cache_stats(self) -> dict:
+        """Return size and hit/miss statistics of the user lookup cache."""
+        return self._user_cache.stats()
+    
+    def clear_user_cache(self) -> int:
+        """
+        Forget every cached user lookup.
+        
+        Returns:
+            Number of entries dropped
+        """
+        size = len(self._user_cache)
+        self._user_cache.clear()
+        return size
+    
+    def record_health(self, health: Dict[str, Any], elapsed: float) -> None:
+        """
+        Store the result of a health probe.
+        
+        Args:
+            health: Result of ``health_check`` (or of a probe that timed out)
+            elapsed: Seconds the probe took
+        """
+        now = datetime.utcnow()
+        entry = {
+            "checked_at": now.isoformat(),
+            "healthy": health.get("healthy", False),
+            "latency_ms": round(elapsed * 1000, 3),
+        }
+        if not entry["healthy"]:
+            entry["message"] = health.get("message")
+        with self._health_lock:
+            self._health = health
+            self._health_checked_at = time.monotonic()
+            self._last_health_check = now
+            self._health_history.append(entry)
+    
+    def cached_health(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the latest probe result with the probe history.
+        
+        Returns:
+            The health payload plus ``last_check``, ``age_seconds``, ``stale``
+            (older than two probe intervals) and ``history``; None before
+            the first probe
+        """
+        with self._health_lock:
+            if self._health is None:
+                return None
+            age = time.monotonic() - self._health_checked_at
+            return {
+                **self._health,
+                "last_check": self._last_health_check.isoformat(),
+                "age_seconds": round(age, 3),
+                "stale": age > 2 * self._health_check_interval,
+                "check_interval": self._health_check_interval,
+                "history": list(self._health_history),
+            }
+    
+    def clear_health(self) -> None:
+        """Forget the cached health result and probe history."""
+        with self._health_lock:
+            self._health = None
+            self._health_history.clear()
+    
+    def close(self) -> None:
+        """Close every idle pooled connection and stop hedge threads."""
+        for server in self._get_servers():
+            server.close()
+        with self._servers_lock:
+            executor, self._hedge_executor = self._hedge_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
     def health_check(self) -> Dict[str, any]:
         """
         Check LDAP server health and connectivity.
@@ -153,26 +858,16 @@ class LDAPService:
                 "healthy": False
             }
         
+        health = self._check_directory()
+        health["circuit_breaker"] = self.breaker.stats()
+        return health
+    
+    def _check_directory(self) -> Dict[str, any]:
+        """Run a health check search on the best server."""
         try:
-            conn = self._create_connection()
-            
-            # Try to bind
-            if not conn.bind():
-                return {
-                    "status": "error",
-                    "message": f"Bind failed: {conn.result}",
-                    "healthy": False
-                }
-            
-            # Try a simple search to verify connectivity
-            conn.search(
-                search_base=self.config.search_base,
-                search_filter='(objectClass=*)',
-                search_scope='BASE',
-                attributes=['objectClass']
-            )
-            
-            conn.unbind()
+            # Try a simple search to verify connectivity (binds the service
+            # account if no connection is open)
+            self._search('(objectClass=*)', ['objectClass'], scope='BASE')
             
             self._last_health_check = datetime.utcnow()
             
@@ -183,15 +878,24 @@ class LDAPService:
                 "server": self.config.server,
                 "port": self.config.port,
                 "ssl": self.config.use_ssl,
-                "last_check": self._last_health_check.isoformat()
+                "last_check": self._last_health_check.isoformat(),
+                "servers": self.server_stats(),
+                "hedging": self.hedge_stats()
             }
             
+        except LDAPCircuitOpenError as e:
+            return {
+                "status": "error",
+                "message": f"LDAP directory marked unavailable: {e}",
+                "healthy": False
+            }
         except LDAPSocketOpenError as e:
             logger.error(f"LDAP connection failed: {e}")
             return {
                 "status": "error",
                 "message": f"Cannot connect to LDAP server: {e}",
-                "healthy": False
+                "healthy": False,
+                "servers": self.server_stats()
             }
         except LDAPBindError as e:
             logger.error(f"LDAP bind failed: {e}")
@@ -205,7 +909,8 @@ class LDAPService:
             return {
                 "status": "error",
                 "message": f"LDAP error: {e}",
-                "healthy": False
+                "healthy": False,
+                "servers": self.server_stats()
             }
     
     def authenticate(self, username: str, password: str) -> Tuple[bool, Optional[Dict], Optional[str]]:
@@ -234,34 +939,32 @@ class LDAPService:
             
             if not user_dn:
                 logger.warning(f"User not found in LDAP: {username}")
-                return False, None, "User not found in directory"
+                return False, None, USER_NOT_FOUND
             
             # Check if user is in allowed groups (if configured)
             if self.config.allowed_groups:
-                user_groups = user_info.get('groups', [])
-                if not any(group in user_groups for group in self.config.allowed_groups):
+                if user_info['groups'].isdisjoint(self.config.allowed_groups):
                     logger.warning(f"User {username} not in allowed groups")
                     return False, None, "User not authorized (group membership required)"
             
             # Attempt to bind with user's credentials
-            conn = self._create_connection(user_dn, password)
-            
-            if not conn.bind():
+            if not self._verify_password(user_dn, password):
                 logger.warning(f"LDAP bind failed for user: {username}")
                 return False, None, "Invalid credentials"
             
-            conn.unbind()
-            
             logger.info(f"LDAP authentication successful for user: {username}")
             return True, user_info, None
             
         except LDAPBindError as e:
-            # Bind errors typically mean invalid credentials
-            logger.warning(f"Invalid credentials for user: {username}")
-            return False, None, "Invalid credentials"
-        except LDAPSocketOpenError as e:
+            # User binds are checked by _verify_password, so this is the service account
+            logger.error(f"LDAP service account bind failed: {e}")
+            return False, None, "LDAP service account bind failed"
+        except LDAPCircuitOpenError:
+            logger.warning(f"LDAP circuit breaker open, rejecting login for: {username}")
+            return False, None, DIRECTORY_UNAVAILABLE
+        except _COMMUNICATION_ERRORS as e:
             logger.error(f"LDAP connection failed: {e}")
-            return False, None, "LDAP server unreachable"
+            return False, None, DIRECTORY_UNAVAILABLE
         except LDAPException as e:
             logger.error(f"LDAP authentication error for {username}: {e}")
             return False, None, f"Authentication error: {str(e)}"
@@ -273,66 +976,69 @@ class LDAPService:
         """
         Find user in LDAP directory using service account.
         
-        Returns tuple of (user_dn, user_info_dict)
+        Results are cached per username for LDAP_USER_CACHE_TTL seconds
+        (LDAP_USER_NEGATIVE_CACHE_TTL for users that were not found);
+        directory errors are not cached.
+        
+        Returns tuple of (user_dn, user_info_dict), or (None, None) if the
+        user does not exist
+        
+        Raises:
+            LDAPException: If the directory could not be searched
         """
+        key = username.strip().lower()
+        cached = self._user_cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            user_dn, user_info = cached
+            return user_dn, dict(user_info) if user_info else None
+        
+        user_dn, user_info = self._search_user(username)
+        if user_dn is None:
+            self._user_cache.set(key, (None, None), ttl=self.config.user_negative_cache_ttl)
+        else:
+            self._user_cache.set(key, (user_dn, user_info))
+            user_info = dict(user_info)
+        return user_dn, user_info
+    
+    def _search_user(self, username: str) -> Tuple[Optional[str], Optional[Dict]]:
+        """Search the directory for a user, bypassing the cache."""
         # Handle email format
         if '@' in username:
             search_filter = f'(mail={username})'
         else:
             search_filter = self.config.user_search_filter.format(username=username)
         
-        conn = self._create_connection()
+        # Search for user
+        entries = self._search(search_filter, self.config.user_attributes)
         
-        try:
-            if not conn.bind():
-                logger.error(f"Service account bind failed: {conn.result}")
-                return None, None
-            
-            # Search for user
-            conn.search(
-                search_base=self.config.search_base,
-                search_filter=search_filter,
-                search_scope='SUBTREE',
-                attributes=self.config.user_attributes
-            )
-            
-            if not conn.entries:
-                return None, None
-            
-            # Get first matching entry
-            entry = conn.entries[0]
-            user_dn = entry.entry_dn
-            
-            # Extract user information
-            user_info = {
-                'dn': user_dn,
-                'username': str(entry.sAMAccountName) if hasattr(entry, 'sAMAccountName') else username,
-                'email': str(entry.mail) if hasattr(entry, 'mail') else None,
-                'full_name': str(entry.displayName) if hasattr(entry, 'displayName') else str(entry.cn) if hasattr(entry, 'cn') else None,
-                'groups': []
-            }
-            
-            # Extract group memberships
-            if hasattr(entry, 'memberOf'):
-                user_info['groups'] = [self._extract_cn_from_dn(dn) for dn in entry.memberOf]
-            
-            # Determine if user should be admin based on group membership
-            user_info['is_admin'] = any(
-                group in user_info['groups'] 
-                for group in self.config.admin_groups
-            ) if self.config.admin_groups else False
-            
-            conn.unbind()
-            
-            logger.info(f"Found user in LDAP: {username} -> {user_dn}")
-            return user_dn, user_info
-            
-        except LDAPException as e:
-            logger.error(f"Error finding user {username}: {e}")
+        if not entries:
             return None, None
-        finally:
-            if conn.bound:
-                conn.unbind()
+        
+        # Get first matching entry
+        entry = entries[0]
+        user_dn = entry.entry_dn
+        user_info = self._user_info_from_entry(entry, username)
+        
+        logger.info(f"Found user in LDAP: {username} -> {user_dn}")
+        return user_dn, user_info
+    
+    def _user_info_from_entry(self, entry, username: Optional[str] = None) -> Dict:
+        """Build the user info dict for a directory entry."""
+        user_info = {
+            'dn': entry.entry_dn,
+            'username': str(entry.sAMAccountName) if hasattr(entry, 'sAMAccountName') else username,
+            'email': str(entry.mail) if hasattr(entry, 'mail') else None,
+            'full_name': str(entry.displayName) if hasattr(entry, 'displayName') else str(entry.cn) if hasattr(entry, 'cn') else None,
+            'groups': frozenset()
+        }
+        
+        # Extract group memberships (a frozenset, so group checks are O(1))
+        if hasattr(entry, 'memberOf'):
+            user_info['groups'] = frozenset(self._extract_cn_from_dn(dn) for dn in entry.memberOf)
+        
+        # Determine if user should be admin based on group membership
+        user_info['is_admin'] = not user_info['groups'].isdisjoint(self.config.admin_groups)
+        return user_info
     
     @staticmethod
     def _extract_cn_from_dn(dn: str) -> str:
@@ -346,33 +1052,15 @@ class LDAPService:
     
     def get_user_groups(self, user_dn: str) -> List[str]:
         """Get list of groups for a user."""
-        conn = self._create_connection()
+        # Search for groups containing this user
+        group_filter = self.config.group_search_filter.format(user_dn=user_dn)
         
         try:
-            if not conn.bind():
-                return []
-            
-            # Search for groups containing this user
-            group_filter = self.config.group_search_filter.format(user_dn=user_dn)
-            
-            conn.search(
-                search_base=self.config.search_base,
-                search_filter=group_filter,
-                search_scope='SUBTREE',
-                attributes=['cn']
-            )
-            
-            groups = [str(entry.cn) for entry in conn.entries]
-            conn.unbind()
-            
-            return groups
+            return [str(entry.cn) for entry in self._search(group_filter, ['cn'])]
             
         except LDAPException as e:
             logger.error(f"Error getting groups for {user_dn}: {e}")
             return []
-        finally:
-            if conn.bound:
-                conn.unbind()
 
 
 # Global LDAP service instance
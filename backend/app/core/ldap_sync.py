@@ -0,0 +1,230 @@
+"""
+Incremental sync of directory users into the local user table.
+
+Without it LDAP users are only provisioned by their first login, which
+puts the provisioning writes on the login path and hides directory users
+from admins until then. ``LDAPDirectorySync`` pages through the users
+matching ``LDAP_SYNC_FILTER`` that changed since the last run (tracked by
+a ``uSNChanged`` or ``modifyTimestamp`` high-water mark in the
+``ldap_sync_state`` table) and upserts them one page per transaction:
+
+- new users are created as LDAP accounts (unless ``LDAP_ALLOWED_GROUPS``
+  would keep them from logging in)
+- existing LDAP accounts get their name and admin flag updated; a changed
+  admin flag bumps ``token_epoch`` as a login would
+- local accounts with the same email are left alone
+
+Synced users have no usable local password until their first LDAP login.
+Users deleted from the directory are not seen by an incremental search
+and are not deactivated.
+
+Runs from ``sync_ldap.py`` or every ``LDAP_SYNC_INTERVAL`` seconds in the
+background.
+"""
+import asyncio
+import logging
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.ldap_service import LDAPService, ldap_service
+from app.core.principal import cache_principal
+from app.core.security import get_password_hash
+from app.models.ldap_sync import LDAPSyncState
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class LDAPSyncRunning(Exception):
+    """Raised when a sync is started while another one is running."""
+
+
+class LDAPDirectorySync:
+    """
+    Incremental directory-to-database user sync.
+
+    Args:
+        service: LDAP service to page through
+        interval: Seconds between scheduled runs (0 disables scheduling)
+    """
+
+    def __init__(self, service: LDAPService, interval: float = 0.0):
+        self.service = service
+        self.interval = interval
+        self._run_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._runs = 0
+        self._failures = 0
+        self._last_result: Optional[dict] = None
+        self._last_error: Optional[str] = None
+
+    def run(self, engine: Optional[Engine] = None, full: bool = False) -> dict:
+        """
+        Sync users changed since the last run.
+
+        Args:
+            engine: Database engine (defaults to the application engine)
+            full: Ignore the stored high-water mark and sync every user
+
+        Returns:
+            Counts of created, updated, unchanged and skipped users, with the
+            new high-water mark
+
+        Raises:
+            LDAPSyncRunning: If another sync is in progress
+            LDAPException: If the directory could not be searched
+        """
+        if not self._run_lock.acquire(blocking=False):
+            raise LDAPSyncRunning("LDAP sync already running")
+        try:
+            if engine is None:
+                from app.core.database import engine
+
+            start = time.perf_counter()
+            counts = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+            marks: Dict[str, str] = {}
+            if not full:
+                with Session(engine) as session:
+                    marks = {state.key: state.high_water_mark for state in session.exec(select(LDAPSyncState))}
+
+            # New users get the hash of a random secret; one hash per run
+            # keeps argon2 off the per-user cost
+            placeholder: List[str] = []
+
+            def upsert_page(users: List[Dict]) -> None:
+                if not placeholder:
+                    placeholder.append(get_password_hash(secrets.token_urlsafe(32)))
+                with Session(engine) as session:
+                    for outcome, count in self._upsert_users(session, users, placeholder[0]).items():
+                        counts[outcome] += count
+
+            try:
+                key, mark = self.service.search_changed_users(marks, upsert_page)
+            except Exception as e:
+                with self._lock:
+                    self._failures += 1
+                    self._last_error = str(e)
+                raise
+
+            if mark is not None:
+                with Session(engine) as session:
+                    session.merge(LDAPSyncState(key=key, high_water_mark=mark, updated_at=datetime.utcnow()))
+                    session.commit()
+
+            result = {
+                **counts,
+                "full": full,
+                "high_water_mark": mark or marks.get(key),
+                "seconds": round(time.perf_counter() - start, 3),
+                "finished_at": datetime.utcnow().isoformat(),
+            }
+            with self._lock:
+                self._runs += 1
+                self._last_result = result
+                self._last_error = None
+            logger.info(f"LDAP sync finished: {result}")
+            return result
+        finally:
+            self._run_lock.release()
+
+    def _upsert_users(self, session: Session, users: List[Dict], placeholder_hash: str) -> Dict[str, int]:
+        """Create or update one page of directory users in a single transaction."""
+        counts = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        by_email = {}
+        for info in users:
+            if info.get('email'):
+                by_email[info['email']] = info
+            else:
+                counts["skipped"] += 1
+        if not by_email:
+            return counts
+
+        existing = {
+            user.email: user
+            for user in session.exec(select(User).where(User.email.in_(list(by_email))))
+        }
+        allowed_groups = self.service.config.allowed_groups
+        changed: List[User] = []
+
+        for email, info in by_email.items():
+            full_name = info['full_name'] or info['username'] or email
+            user = existing.get(email)
+            if user is None:
+                if allowed_groups and info['groups'].isdisjoint(allowed_groups):
+                    counts["skipped"] += 1
+                    continue
+                session.add(User(
+                    email=email,
+                    full_name=full_name,
+                    hashed_password=placeholder_hash,
+                    is_admin=info['is_admin'],
+                    is_ldap_user=True,
+                ))
+                counts["created"] += 1
+            elif not user.is_ldap_user:
+                counts["skipped"] += 1
+            elif user.full_name == full_name and user.is_admin == info['is_admin']:
+                counts["unchanged"] += 1
+            else:
+                user.full_name = full_name
+                if user.is_admin != info['is_admin']:
+                    user.is_admin = info['is_admin']
+                    user.token_epoch += 1
+                user.updated_at = datetime.utcnow()
+                changed.append(user)
+                counts["updated"] += 1
+
+        session.commit()
+        for user in changed:
+            cache_principal(user)
+        return counts
+
+    async def _run_periodically(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.run)
+            except LDAPSyncRunning:
+                pass
+            except Exception as e:
+                logger.error(f"LDAP sync failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start scheduled syncs on the running event loop (if LDAP and an interval are set)."""
+        if self._task is None and self.interval > 0 and self.service.config.enabled:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        """Stop scheduled syncs (a run in progress finishes in its thread)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Return run counters and the last result."""
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "scheduled": self._task is not None,
+                "running": self._run_lock.locked(),
+                "runs": self._runs,
+                "failures": self._failures,
+                "last_result": self._last_result,
+                "last_error": self._last_error,
+            }
+
+
+# Global directory sync job
+ldap_sync = LDAPDirectorySync(ldap_service, interval=settings.LDAP_SYNC_INTERVAL)
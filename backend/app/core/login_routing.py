@@ -0,0 +1,77 @@
+"""
+Routing of password logins between the local database and LDAP.
+
+Local accounts never need the directory, and LDAP accounts must not fall
+back to the password hash stored when they were provisioned, so each login
+goes straight to one authenticator:
+
+- ``User.is_ldap_user`` accounts go to LDAP
+- other local accounts go to the password database, or with
+  ``LDAP_LOGIN_RACE`` to both at once until the directory is known not to
+  have them
+- usernames without a local account (e.g. a sAMAccountName) go to LDAP,
+  unless the directory recently reported them as unknown
+
+With ``LDAP_OFFLINE_LOGIN``, LDAP accounts fall back to the local copy of
+their last directory password while the directory is unavailable.
+
+What the directory said about a username is remembered in ``login_routes``
+for ``LDAP_LOGIN_ROUTE_CACHE_TTL`` seconds. Latencies per path are exposed
+through ``login_stats`` on the admin stats endpoint.
+"""
+from typing import Optional
+
+from app.core.authentication import AuthStats
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+LOCAL = "local"
+LDAP = "ldap"
+RACE = "race"
+# LDAP account checked locally because the directory was unavailable
+OFFLINE = "ldap_offline"
+
+# Normalised username -> LOCAL (not in the directory) or LDAP
+login_routes = TTLCache(
+    maxsize=settings.LDAP_LOGIN_ROUTE_CACHE_SIZE,
+    ttl=settings.LDAP_LOGIN_ROUTE_CACHE_TTL,
+)
+
+# Login outcomes and timings per path
+login_stats = AuthStats()
+
+
+def route_key(username: str) -> str:
+    """Normalise a login name for the route cache."""
+    return username.strip().lower()
+
+
+def remember_route(username: str, route: str) -> None:
+    """Record which authenticator knows username."""
+    login_routes.set(route_key(username), route)
+
+
+def route_login(username: str, user: Optional[User]) -> str:
+    """
+    Pick the authenticator for a login attempt.
+
+    Args:
+        username: Name the user logged in with
+        user: Local account matching username, if any
+
+    Returns:
+        LOCAL, LDAP or RACE
+    """
+    if not settings.LDAP_ENABLED:
+        return LOCAL
+
+    if user is not None:
+        if user.is_ldap_user:
+            return LDAP
+        if settings.LDAP_LOGIN_RACE and login_routes.get(route_key(username)) != LOCAL:
+            return RACE
+        return LOCAL
+
+    # No local account: only the directory can know this user
+    return login_routes.get(route_key(username), LDAP)
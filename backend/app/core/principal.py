@@ -0,0 +1,162 @@
+"""Authenticated principal snapshots and the in-process principal cache."""
+import sys
+import time
+from typing import Optional
+
+from sqlmodel import Session
+
+from app.core.cache import CacheMiss, TTLCache
+from app.core.config import settings
+from app.core.token_security import ALL_SCOPES
+from app.models.user import User
+
+
+class Principal:
+    """
+    Compact snapshot of the fields needed to authorize a request.
+    
+    Cached per user id so authenticated requests do not need to load the
+    full ``User`` row just to learn the caller is still active/admin.
+    """
+    
+    __slots__ = ("id", "email", "is_active", "is_admin", "token_epoch", "scopes")
+    
+    def __init__(
+        self,
+        id: int,
+        email: str,
+        is_active: bool,
+        is_admin: bool,
+        token_epoch: int = 0,
+        scopes: int = ALL_SCOPES
+    ):
+        self.id = id
+        self.email = email
+        self.is_active = is_active
+        self.is_admin = is_admin
+        self.token_epoch = token_epoch
+        self.scopes = scopes
+    
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        """Build a snapshot from a user row."""
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=user.is_active,
+            is_admin=user.is_admin,
+            token_epoch=user.token_epoch,
+        )
+    
+    def with_scopes(self, scopes: int) -> "Principal":
+        """Copy of this principal restricted to the given scope bitmask."""
+        if scopes == self.scopes:
+            return self
+        return Principal(
+            self.id, self.email, self.is_active, self.is_admin, self.token_epoch, scopes
+        )
+    
+    def has_scopes(self, mask: int) -> bool:
+        """Check that every scope bit in mask was granted."""
+        return self.scopes & mask == mask
+    
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id!r}, email={self.email!r}, is_admin={self.is_admin!r})"
+
+
+# Global principal cache (user id -> Principal)
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+# Latest token epoch seen per user id. Entries only need to outlive the
+# claims staleness bound: older tokens are re-checked against the database.
+token_epochs = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.CLAIMS_MAX_AGE_SECONDS,
+)
+
+
+def get_principal(session: Optional[Session], user_id: int) -> Optional[Principal]:
+    """
+    Get the principal for a user id, loading it from the database on a miss.
+    
+    Returns:
+        Principal if the user exists, None otherwise
+        
+    Raises:
+        CacheMiss: If session is None and the principal is not cached
+    """
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    if session is None:
+        raise CacheMiss(user_id)
+    
+    user = session.get(User, user_id)
+    if user is None:
+        return None
+    
+    principal = Principal.from_user(user)
+    principal_cache.set(user_id, principal)
+    token_epochs.set(user_id, principal.token_epoch)
+    return principal
+
+
+def cache_principal(user: User) -> None:
+    """Write a fresh snapshot of user (and its token epoch) through to the caches."""
+    principal_cache.set(user.id, Principal.from_user(user))
+    token_epochs.set(user.id, user.token_epoch)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Drop any cached snapshot for user_id."""
+    principal_cache.pop(user_id)
+
+
+def tombstone_principal(user_id: int) -> None:
+    """
+    Forget a deleted user and stop trusting claims in their tokens.
+    
+    The tombstone epoch is newer than any token's, so principal_from_claims
+    sends every token for user_id to the database check until the entry
+    expires with the claims staleness bound.
+    """
+    principal_cache.pop(user_id)
+    token_epochs.set(user_id, sys.maxsize)
+
+
+def principal_from_claims(payload: dict) -> Optional[Principal]:
+    """
+    Build a principal from verified JWT claims without touching the database.
+    
+    Claims are only trusted while the token is younger than
+    CLAIMS_MAX_AGE_SECONDS and its epoch is not older than the latest epoch
+    this process has seen for the user.
+    
+    Returns:
+        Principal, or None if the caller must fall back to a database check
+    """
+    try:
+        user_id = int(payload.get("sub"))
+        issued_at = float(payload["iat"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    
+    if time.time() - issued_at > settings.CLAIMS_MAX_AGE_SECONDS:
+        return None
+    
+    epoch = payload.get("epoch", 0)
+    known_epoch = token_epochs.get(user_id)
+    if known_epoch is not None and epoch < known_epoch:
+        return None
+    
+    return Principal(
+        id=user_id,
+        email=payload.get("email"),
+        is_active=True,
+        is_admin=bool(payload.get("is_admin", False)),
+        token_epoch=epoch,
+        scopes=payload.get("scp", ALL_SCOPES),
+    )
@@ -0,0 +1,220 @@
+"""
+Token-bucket rate limiting per route group.
+
+Each route group (auth, users, admin, items, tokens) has its own limiter.
+Authenticated requests are limited per user (or per PAT), everything else
+per client IP. Buckets refill lazily when they are next hit, so idle keys
+cost nothing but memory, and memory is bounded by evicting the least
+recently used keys. The key space is split over independently locked
+shards so concurrent requests rarely contend.
+
+Limited requests get 429 with Retry-After; every limited route also
+returns X-RateLimit-Limit/Remaining/Reset headers. A group with a rate of
+0 is not limited.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.config import settings
+from app.core.token_security import TOKEN_PREFIX, parse_token
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> [tokens, last refill time]
+        self.buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+
+
+class TokenBucketLimiter:
+    """
+    Sharded, size-bounded token-bucket limiter.
+
+    Args:
+        name: Route group name (used in error messages and stats)
+        rate: Tokens added per second (0 disables the limit)
+        burst: Bucket capacity (max requests in a burst)
+        max_keys: Max tracked keys across all shards (LRU evicted beyond)
+        shards: Number of independently locked shards
+        clock: Monotonic time source (for tests)
+
+    Raises:
+        ValueError: If rate is negative or burst is below 1
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_keys: int,
+        shards: int = 16,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if rate < 0 or burst < 1:
+            raise ValueError(f"Invalid {name} rate limit: rate must be >= 0 and burst >= 1")
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._shards = [_Shard() for _ in range(shards)]
+        self._max_per_shard = max(1, max_keys // shards)
+        self._stats_lock = threading.Lock()
+        self._allowed = 0
+        self._limited = 0
+        self._evictions = 0
+
+    def hit(self, key: Hashable) -> Tuple[bool, int, float]:
+        """
+        Take one token from key's bucket.
+
+        Returns:
+            (allowed, tokens remaining, seconds until a token is available)
+        """
+        if not self.enabled:
+            return True, self.burst, 0.0
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = self._clock()
+        evicted = 0
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now]
+                shard.buckets[key] = bucket
+                while len(shard.buckets) > self._max_per_shard:
+                    shard.buckets.popitem(last=False)
+                    evicted += 1
+            else:
+                shard.buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            allowed = bucket[0] >= 1
+            if allowed:
+                bucket[0] -= 1
+            tokens = bucket[0]
+
+        with self._stats_lock:
+            self._evictions += evicted
+            if allowed:
+                self._allowed += 1
+            else:
+                self._limited += 1
+
+        wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+        return allowed, int(tokens), wait
+
+    @property
+    def enabled(self) -> bool:
+        """False when the rate is 0 (the group is not limited)."""
+        return self.rate > 0
+
+    def seconds_to_full(self, remaining: int) -> int:
+        """Seconds until a bucket with remaining tokens is full again."""
+        if not self.enabled:
+            return 0
+        return math.ceil((self.burst - remaining) / self.rate)
+
+    def clear(self) -> None:
+        """Forget every bucket and reset counters."""
+        for shard in self._shards:
+            with shard.lock:
+                shard.buckets.clear()
+        with self._stats_lock:
+            self._allowed = 0
+            self._limited = 0
+            self._evictions = 0
+
+    def stats(self) -> dict:
+        """Return limiter configuration and counters."""
+        keys = 0
+        for shard in self._shards:
+            with shard.lock:
+                keys += len(shard.buckets)
+        with self._stats_lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "keys": keys,
+                "allowed": self._allowed,
+                "limited": self._limited,
+                "evictions": self._evictions,
+            }
+
+
+# Global limiters per route group
+rate_limiters: Dict[str, TokenBucketLimiter] = {
+    name: TokenBucketLimiter(name, rate, burst, settings.RATE_LIMIT_MAX_KEYS)
+    for name, rate, burst in (
+        ("auth", settings.RATE_LIMIT_AUTH_RATE, settings.RATE_LIMIT_AUTH_BURST),
+        ("users", settings.RATE_LIMIT_USERS_RATE, settings.RATE_LIMIT_USERS_BURST),
+        ("admin", settings.RATE_LIMIT_ADMIN_RATE, settings.RATE_LIMIT_ADMIN_BURST),
+        ("items", settings.RATE_LIMIT_ITEMS_RATE, settings.RATE_LIMIT_ITEMS_BURST),
+        ("tokens", settings.RATE_LIMIT_TOKENS_RATE, settings.RATE_LIMIT_TOKENS_BURST),
+    )
+}
+
+_dependencies: Dict[str, Callable] = {}
+
+
+def rate_limit_key(request: Request) -> Hashable:
+    """
+    Key a request by PAT, by user or by client IP.
+
+    Uses the credentials AuthenticationMiddleware already parsed. A PAT not
+    in the cache yet is keyed by the id embedded in it, so its bucket does
+    not depend on cache state; other requests whose principal is not known
+    (unauthenticated, rejected, or a JWT on a cold cache) fall back to the
+    client IP.
+    """
+    auth = request.scope.get("state", {}).get("auth")
+    if auth is not None:
+        if auth.pat_record is not None:
+            return ("pat", auth.pat_record.id)
+        if auth.principal is not None:
+            return ("user", str(auth.principal.id))
+        if auth.payload is not None and auth.payload.get("sub"):
+            return ("user", str(auth.payload["sub"]))
+        if not auth.resolved and auth.token and auth.token.startswith(TOKEN_PREFIX):
+            token_id, _ = parse_token(auth.token)
+            if token_id is not None:
+                return ("pat", token_id)
+    return ("ip", request.client.host if request.client else "unknown")
+
+
+def use_rate_limit(name: str) -> Callable:
+    """
+    Get a FastAPI dependency that enforces the named group's rate limit.
+
+    Usage: ``dependencies=[Depends(use_rate_limit("items"))]``
+    """
+    if name not in _dependencies:
+        limiter = rate_limiters[name]
+
+        async def rate_limit(request: Request, response: Response) -> None:
+            if not settings.RATE_LIMIT_ENABLED or not limiter.enabled:
+                return
+            allowed, remaining, wait = limiter.hit(rate_limit_key(request))
+            headers = {
+                "X-RateLimit-Limit": str(limiter.burst),
+                "X-RateLimit-Remaining": str(remaining),
+                "X-RateLimit-Reset": str(limiter.seconds_to_full(remaining)),
+            }
+            if not allowed:
+                headers["Retry-After"] = str(max(1, math.ceil(wait)))
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Too many {name} requests",
+                    headers=headers,
+                )
+            response.headers.update(headers)
+
+        _dependencies[name] = rate_limit
+    return _dependencies[name]
@@ -0,0 +1,161 @@
+"""
+In-memory denylist of revoked JWT ids (``jti`` claims).
+
+Revoked jtis are recorded in a Bloom filter backed by an exact set. The
+filter answers "definitely not revoked" for almost every request with a
+few bit probes; only filter hits are confirmed against the exact set, so
+false positives never reject a valid token. Nothing here touches the
+database.
+
+Entries only need to live as long as the tokens they revoke, so both
+structures are kept in two generations that rotate every
+ACCESS_TOKEN_EXPIRE_MINUTES; a generation is discarded once the tokens it
+revoked have expired. Each process keeps its own denylist.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        """Add item to the filter."""
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class _Generation:
+    __slots__ = ("bloom", "expiries", "started_at")
+
+    def __init__(self, capacity: int, error_rate: float, started_at: float):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.expiries: Dict[str, float] = {}
+        self.started_at = started_at
+
+
+class RevocationList:
+    """
+    Thread-safe denylist of revoked token ids, bounded by token lifetime.
+
+    Args:
+        lifetime: Maximum token lifetime in seconds (generation length)
+        capacity: Expected revocations per generation (sizes the Bloom filter)
+        error_rate: Target Bloom filter false positive rate
+        clock: Source of the current Unix time (for tests)
+    """
+
+    def __init__(
+        self,
+        lifetime: float,
+        capacity: int,
+        error_rate: float,
+        clock: Callable[[], float] = time.time
+    ):
+        self.lifetime = lifetime
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._bloom_hits = 0
+        self._rejections = 0
+        self._reset(self._clock())
+
+    def _reset(self, now: float) -> None:
+        self._current = _Generation(self.capacity, self.error_rate, now)
+        self._previous: Optional[_Generation] = None
+
+    def _rotate(self, now: float) -> None:
+        """Start new generations once the current one is a full lifetime old."""
+        if now - self._current.started_at < self.lifetime:
+            return
+        dropped = self._previous
+        self._previous = self._current
+        self._current = _Generation(self.capacity, self.error_rate, now)
+        if dropped is None:
+            return
+        # Carry over the rare entries that outlive their generation (tokens
+        # issued with a longer expires_delta than the default lifetime)
+        for jti, expires_at in dropped.expiries.items():
+            if expires_at > now:
+                self._current.bloom.add(jti)
+                self._current.expiries[jti] = expires_at
+
+    def revoke(self, jti: str, expires_at: Optional[float] = None) -> None:
+        """
+        Revoke a token id until expires_at (a Unix timestamp).
+
+        Tokens without an expiry are kept for one full lifetime.
+        """
+        now = self._clock()
+        if expires_at is None:
+            expires_at = now + self.lifetime
+        if expires_at <= now:
+            return
+        with self._lock:
+            self._rotate(now)
+            self._current.bloom.add(jti)
+            self._current.expiries[jti] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        """Return True if jti was revoked and has not yet expired."""
+        now = self._clock()
+        with self._lock:
+            self._checks += 1
+            self._rotate(now)
+            for generation in (self._current, self._previous):
+                if generation is None or jti not in generation.bloom:
+                    continue
+                self._bloom_hits += 1
+                expires_at = generation.expiries.get(jti)
+                if expires_at is not None and expires_at > now:
+                    self._rejections += 1
+                    return True
+            return False
+
+    def clear(self) -> None:
+        """Forget every revocation and reset counters."""
+        with self._lock:
+            self._reset(self._clock())
+            self._checks = 0
+            self._bloom_hits = 0
+            self._rejections = 0
+
+    def stats(self) -> dict:
+        """Return revocation counters and Bloom filter sizing."""
+        with self._lock:
+            generations = [g for g in (self._current, self._previous) if g is not None]
+            return {
+                "revoked": sum(len(g.expiries) for g in generations),
+                "checks": self._checks,
+                "bloom_hits": self._bloom_hits,
+                "rejections": self._rejections,
+                "bloom_bits": self._current.bloom.num_bits,
+                "bloom_hashes": self._current.bloom.num_hashes,
+                "lifetime": self.lifetime,
+            }
@@ -1,23 +1,57 @@
 """Security utilities for password hashing and JWT tokens."""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from typing import Optional, Union
-from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlmodel import Session, select
 
+from app.core.breached_passwords import is_password_breached
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.database import get_session as get_db_session
+from app.core.jwt_backends import JWTDecodeError, get_codec
+from app.core.revocation import RevocationList
 
 # Password hashing context (using argon2 instead of bcrypt for Python 3.13 compatibility)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 # JWT settings
 ALGORITHM = settings.ALGORITHM
 SECRET_KEY = settings.SECRET_KEY
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
+# JWT codec (python-jose, PyJWT or built-in HS256), selected by JWT_BACKEND
+jwt_codec = get_codec(settings.JWT_BACKEND, SECRET_KEY, ALGORITHM)
+
+# Verified JWT payloads keyed by token digest; each entry expires at the token's exp
+jwt_decode_cache = TTLCache(
+    maxsize=settings.JWT_DECODE_CACHE_SIZE,
+    ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+# Revoked access token ids (jti), kept until the tokens expire
+revoked_tokens = RevocationList(
+    lifetime=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    capacity=settings.JWT_REVOCATION_CAPACITY,
+    error_rate=settings.JWT_REVOCATION_ERROR_RATE,
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
@@ -29,6 +63,151 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password and rehash it if its parameters are outdated.
+    
+    Returns:
+        Tuple of (is_valid, new_hash); new_hash is None unless the stored
+        hash should be replaced
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Async-aware password hashing service.
+    
+    Argon2 is deliberately CPU and memory hard, so hashing inline in an
+    ``async def`` endpoint blocks the event loop for every other request on
+    the worker. This service runs hash/verify calls in a process pool and
+    bounds the number of outstanding calls so a login storm is rejected
+    with 503 instead of queueing without limit.
+    """
+    
+    def __init__(self, max_workers: int = 0, max_pending: int = 64, timeout: float = 5.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._calls = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._errors = 0
+        self._total_seconds = 0.0
+        self._max_seconds = 0.0
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get or lazily create the worker pool."""
+        with self._lock:
+            if self._executor is None:
+                # spawn avoids forking a parent that already runs threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+    
+    def _unavailable(self, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"},
+        )
+    
+    async def _run(self, func, *args):
+        """Run a hashing function in the pool, enforcing queue and time limits."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise self._unavailable("Password hashing service is busy")
+            self._pending += 1
+        
+        start = time.perf_counter()
+        submitted = False
+        try:
+            job = self._get_executor().submit(func, *args)
+            # Hold the slot until the worker is done with the job: a call
+            # that timed out still occupies a worker
+            job.add_done_callback(self._release)
+            submitted = True
+            return await asyncio.wait_for(asyncio.wrap_future(job), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise self._unavailable("Password hashing timed out")
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); drop the pool so the next call rebuilds it
+            with self._lock:
+                self._errors += 1
+                self._executor = None
+            raise self._unavailable("Password hashing service unavailable")
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                if not submitted:
+                    self._pending -= 1
+                self._calls += 1
+                self._total_seconds += elapsed
+                self._max_seconds = max(self._max_seconds, elapsed)
+    
+    def _release(self, _job: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+    
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop."""
+        return await self._run(get_password_hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop."""
+        return await self._run(verify_password, plain_password, hashed_password)
+    
+    async def verify_and_update(
+        self,
+        plain_password: str,
+        hashed_password: str
+    ) -> tuple[bool, Optional[str]]:
+        """Verify a password and get a replacement hash if parameters changed."""
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+    
+    def stats(self) -> dict:
+        """Return pool metrics."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "timeout": self.timeout,
+                "pending": self._pending,
+                "calls": self._calls,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "errors": self._errors,
+                "avg_seconds": self._total_seconds / self._calls if self._calls else 0.0,
+                "max_seconds": self._max_seconds,
+            }
+    
+    def shutdown(self) -> None:
+        """Stop the worker pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global password hashing service
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout=settings.PASSWORD_HASH_TIMEOUT,
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -51,8 +230,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         "exp": expire,
         "iat": datetime.utcnow()
     })
+    to_encode.setdefault("jti", secrets.token_urlsafe(16))
     
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt_codec.encode(to_encode)
     return encoded_jwt
 
 
@@ -60,16 +240,51 @@ def decode_access_token(token: str) -> Optional[dict]:
     """
     Decode and validate a JWT access token.
     
+    Verified payloads are memoized until the token's ``exp`` so a token
+    reused across many requests is only signature-checked once.
+    
     Args:
         token: JWT token string to decode
         
     Returns:
         Decoded token payload dict, or None if invalid
     """
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = jwt_decode_cache.get(cache_key)
+    if payload is not None:
+        return dict(payload)
+    
+    payload = _verify_access_token(token)
+    if payload is None:
+        return None
+    
+    # Only tokens with an expiry are cached, and never beyond it
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        jwt_decode_cache.set(cache_key, payload, ttl=min(exp - time.time(), jwt_decode_cache.ttl))
+    return dict(payload)
+
+
+def revoke_access_token(payload: dict) -> None:
+    """Revoke the access token with the given decoded payload until it expires."""
+    jti = payload.get("jti")
+    if jti:
+        exp = payload.get("exp")
+        revoked_tokens.revoke(jti, exp if isinstance(exp, (int, float)) else None)
+
+
+def is_access_token_revoked(payload: dict) -> bool:
+    """Check a decoded payload against the in-memory revocation denylist."""
+    jti = payload.get("jti")
+    return bool(jti) and revoked_tokens.is_revoked(jti)
+
+
+def _verify_access_token(token: str) -> Optional[dict]:
+    """Verify signature and claims of a JWT without consulting the cache."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt_codec.decode(token)
         return payload
-    except JWTError:
+    except JWTDecodeError:
         return None
 
 
@@ -101,6 +316,10 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
     if not any(c.isdigit() for c in password):
         return False, "Password must contain at least one number"
     
+    # Check against the local breached-password list (if configured)
+    if is_password_breached(password):
+        return False, "Password has appeared in a data breach; please choose a different one"
+    
     return True, ""
 
 
@@ -128,20 +347,16 @@ def get_current_user_from_pat(
         return None
     
     # Import here to avoid circular dependency
-    from app.models.token import PersonalAccessToken
     from app.models.user import User
-    from app.core.token_security import hash_token, is_token_expired
+    from app.core.token_security import get_pat_record, is_token_expired
+    from app.core.token_usage import token_usage
     from app.core.database import get_session
     
     if session is None:
         session = next(get_session())
     
-    # Hash the token and look it up
-    token_hash = hash_token(token)
-    statement = select(PersonalAccessToken).where(
-        PersonalAccessToken.token_hash == token_hash
-    )
-    db_token = session.exec(statement).first()
+    # Look up the token (cached, including unknown tokens)
+    db_token = get_pat_record(session, token)
     
     if not db_token:
         return None
@@ -154,10 +369,8 @@ def get_current_user_from_pat(
     if is_token_expired(db_token.expires_at):
         return None
     
-    # Update last used time
-    db_token.last_used_at = datetime.utcnow()
-    session.add(db_token)
-    session.commit()
+    # Record usage; last_used_at is flushed to the database in batches
+    token_usage.record(db_token.id)
     
     # Get the user
     user_statement = select(User).where(User.id == db_token.user_id)
@@ -1,18 +1,70 @@
-"""Security utilities for Personal Access Tokens."""
+"""
+Security utilities for Personal Access Tokens.
+
+Tokens are issued as ``pat_<id>_<secret><checksum>``: the row id makes
+lookup a primary-key fetch, the secret is 40 hex characters and the
+checksum is the CRC32 of ``<id>_<secret>`` in hex, so typos and scanner
+noise are rejected before any database access. Only the SHA-256 digest
+of the full token is stored.
+
+Tokens from before this format (``pat_`` + 54 URL-safe characters) are
+still accepted and looked up through the ``token_hash`` index.
+"""
+import hmac
+import re
 import secrets
 import hashlib
+import zlib
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app.core.cache import CacheMiss, TTLCache
+from app.core.config import settings
+from app.models.token import PersonalAccessToken
 
 # PAT prefix for easy identification
 TOKEN_PREFIX = "pat_"
-TOKEN_LENGTH = 40  # characters after prefix
+TOKEN_LENGTH = 40  # random bytes in legacy tokens, hex characters in the secret
+
+_TOKEN_PATTERN = re.compile(r"pat_([1-9][0-9]{0,18})_([0-9a-f]{40})([0-9a-f]{8})")
+_LEGACY_TOKEN_PATTERN = re.compile(r"pat_[A-Za-z0-9_-]{54}")
+
+# Refresh token prefix
+REFRESH_TOKEN_PREFIX = "rt_"
+
+
+def _checksum(body: str) -> str:
+    return f"{zlib.crc32(body.encode()):08x}"
 
 
-def generate_token() -> str:
-    """Generate a secure random token."""
-    random_part = secrets.token_urlsafe(TOKEN_LENGTH)
-    return f"{TOKEN_PREFIX}{random_part}"
+def generate_token(token_id: int) -> str:
+    """Generate a secure random token that embeds its row id."""
+    body = f"{token_id}_{secrets.token_hex(TOKEN_LENGTH // 2)}"
+    return f"{TOKEN_PREFIX}{body}{_checksum(body)}"
+
+
+def parse_token(token: str) -> Tuple[Optional[int], bool]:
+    """
+    Parse a PAT without touching the database.
+    
+    Returns:
+        (token id, True) for a well-formed token with a valid checksum,
+        (None, True) for a legacy-format token and (None, False) otherwise
+    """
+    match = _TOKEN_PATTERN.fullmatch(token)
+    if match:
+        token_id, secret, checksum = match.groups()
+        if hmac.compare_digest(checksum, _checksum(f"{token_id}_{secret}")):
+            return int(token_id), True
+        return None, False
+    return None, _LEGACY_TOKEN_PATTERN.fullmatch(token) is not None
+
+
+def generate_refresh_token() -> str:
+    """Generate a secure random refresh token."""
+    return f"{REFRESH_TOKEN_PREFIX}{secrets.token_urlsafe(TOKEN_LENGTH)}"
 
 
 def hash_token(token: str) -> str:
@@ -20,6 +72,11 @@ def hash_token(token: str) -> str:
     return hashlib.sha256(token.encode()).hexdigest()
 
 
+def digest_token(token: str) -> bytes:
+    """Binary SHA-256 digest of a token (the stored form of new-format PATs)."""
+    return hashlib.sha256(token.encode()).digest()
+
+
 def calculate_expiry(days: Optional[int]) -> Optional[datetime]:
     """Calculate expiration datetime from days."""
     if days is None:
@@ -34,6 +91,11 @@ def is_token_expired(expires_at: Optional[datetime]) -> bool:
     return datetime.utcnow() > expires_at
 
 
+# Scope name -> bit in PersonalAccessToken.scope_mask / Principal.scopes
+SCOPE_BITS = {"read": 1, "write": 2, "admin": 4}
+ALL_SCOPES = sum(SCOPE_BITS.values())
+
+
 def parse_scopes(scopes_str: str) -> list[str]:
     """Parse comma-separated scopes string into list."""
     return [s.strip() for s in scopes_str.split(",") if s.strip()]
@@ -41,6 +103,112 @@ def parse_scopes(scopes_str: str) -> list[str]:
 
 def validate_scopes(scopes: str) -> bool:
     """Validate that scopes are valid."""
-    valid_scopes = {"read", "write", "admin"}
     scope_list = parse_scopes(scopes)
-    return all(scope in valid_scopes for scope in scope_list)
+    return all(scope in SCOPE_BITS for scope in scope_list)
+
+
+def compile_scopes(scopes: str) -> int:
+    """Compile a comma-separated scopes string into a bitmask (unknown scopes are ignored)."""
+    mask = 0
+    for scope in parse_scopes(scopes):
+        mask |= SCOPE_BITS.get(scope, 0)
+    return mask
+
+
+class PATRecord:
+    """Cached subset of a PersonalAccessToken row needed to authenticate."""
+    
+    __slots__ = ("id", "user_id", "scopes", "scope_mask", "expires_at", "is_active")
+    
+    def __init__(
+        self,
+        id: int,
+        user_id: int,
+        scopes: str,
+        expires_at: Optional[datetime],
+        is_active: bool,
+        scope_mask: Optional[int] = None
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.scopes = scopes
+        self.scope_mask = compile_scopes(scopes) if scope_mask is None else scope_mask
+        self.expires_at = expires_at
+        self.is_active = is_active
+    
+    @classmethod
+    def from_token(cls, token: PersonalAccessToken) -> "PATRecord":
+        """Build a record from a token row."""
+        return cls(
+            id=token.id,
+            user_id=token.user_id,
+            scopes=token.scopes,
+            expires_at=token.expires_at,
+            is_active=token.is_active,
+            scope_mask=token.scope_mask,
+        )
+
+
+# Token hash -> PATRecord for known tokens
+pat_cache = TTLCache(maxsize=settings.PAT_CACHE_SIZE, ttl=settings.PAT_CACHE_TTL)
+
+# Token hashes known not to exist, so repeated bogus tokens skip the database
+pat_negative_cache = TTLCache(
+    maxsize=settings.PAT_NEGATIVE_CACHE_SIZE,
+    ttl=settings.PAT_NEGATIVE_CACHE_TTL,
+)
+
+
+def get_pat_record(session: Optional[Session], token: str) -> Optional[PATRecord]:
+    """
+    Look up a plaintext token, consulting the positive and negative caches.
+    
+    Malformed tokens are rejected without any cache or database access.
+    New-format tokens are fetched by primary key and their digest compared
+    in constant time; legacy tokens are looked up by hash.
+    
+    Returns:
+        PATRecord if the token exists (active or not), None otherwise
+        
+    Raises:
+        CacheMiss: If session is None and the token is in neither cache
+    """
+    token_id, well_formed = parse_token(token)
+    if not well_formed:
+        return None
+    
+    digest = digest_token(token)
+    token_hash = digest.hex()
+    record = pat_cache.get(token_hash)
+    if record is not None:
+        return record
+    if pat_negative_cache.get(token_hash) is not None:
+        return None
+    if session is None:
+        raise CacheMiss(token_hash)
+    
+    if token_id is not None:
+        db_token = session.get(PersonalAccessToken, token_id)
+        if db_token is not None and (
+            db_token.token_digest is None
+            or not hmac.compare_digest(db_token.token_digest, digest)
+        ):
+            db_token = None
+    else:
+        statement = select(PersonalAccessToken).where(
+            PersonalAccessToken.token_hash == token_hash
+        )
+        db_token = session.exec(statement).first()
+    if db_token is None:
+        pat_negative_cache.set(token_hash, True)
+        return None
+    
+    record = PATRecord.from_token(db_token)
+    pat_cache.set(token_hash, record)
+    return record
+
+
+def invalidate_pat(token_hash: str) -> None:
+    """Drop cached lookups for a token hash (after create, revoke or deactivate)."""
+    pat_cache.pop(token_hash)
+    pat_negative_cache.pop(token_hash)
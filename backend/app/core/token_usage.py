@@ -0,0 +1,137 @@
+"""Write-behind buffering of Personal Access Token usage timestamps."""
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.models.token import PersonalAccessToken
+
+logger = logging.getLogger(__name__)
+
+
+class TokenUsageBuffer:
+    """
+    Records PAT last-use times in memory and flushes them in batches.
+    
+    Updating ``last_used_at`` inline turns every PAT-authenticated read into
+    a write that takes the SQLite write lock. Instead, uses are coalesced
+    per token (latest timestamp wins) and written in one transaction every
+    ``flush_interval`` seconds and on shutdown.
+    """
+    
+    def __init__(self, flush_interval: float = 30.0):
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._flushes = 0
+        self._rows_written = 0
+    
+    def record(self, token_id: int, used_at: Optional[datetime] = None) -> None:
+        """Record a use of token_id (no database access)."""
+        used_at = used_at or datetime.utcnow()
+        with self._lock:
+            current = self._pending.get(token_id)
+            if current is None or used_at > current:
+                self._pending[token_id] = used_at
+    
+    def last_used(self, token_id: int, stored: Optional[datetime]) -> Optional[datetime]:
+        """Return the most recent use, including uses not yet flushed."""
+        with self._lock:
+            pending = self._pending.get(token_id)
+        if pending is None:
+            return stored
+        if stored is None or pending > stored:
+            return pending
+        return stored
+    
+    def discard(self, token_id: int) -> None:
+        """Forget pending uses of a token (e.g. after it is deleted)."""
+        with self._lock:
+            self._pending.pop(token_id, None)
+    
+    def clear(self) -> None:
+        """Drop all pending uses without writing them."""
+        with self._lock:
+            self._pending.clear()
+    
+    def flush(self, engine: Optional[Engine] = None) -> int:
+        """
+        Write all pending timestamps in a single transaction.
+        
+        Returns:
+            Number of tokens flushed
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        
+        if engine is None:
+            from app.core.database import engine
+        
+        table = PersonalAccessToken.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("token_id"))
+            .values(last_used_at=bindparam("used_at"))
+        )
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    statement,
+                    [{"token_id": token_id, "used_at": used_at} for token_id, used_at in batch.items()]
+                )
+        except Exception:
+            # Put the batch back so the next flush retries it
+            for token_id, used_at in batch.items():
+                self.record(token_id, used_at)
+            raise
+        
+        with self._lock:
+            self._flushes += 1
+            self._rows_written += len(batch)
+        return len(batch)
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Failed to flush PAT usage: {e}")
+    
+    def start(self) -> None:
+        """Start the periodic flush task on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop the periodic flush task and flush what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+    
+    def stats(self) -> dict:
+        """Return buffer statistics."""
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "flush_interval": self.flush_interval,
+                "flushes": self._flushes,
+                "rows_written": self._rows_written,
+            }
+
+
+# Global PAT usage buffer
+token_usage = TokenUsageBuffer(flush_interval=settings.PAT_USAGE_FLUSH_INTERVAL)
@@ -0,0 +1,124 @@
+"""CRUD operations for refresh tokens."""
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.token_security import generate_refresh_token, hash_token
+from app.models.refresh_token import RefreshToken
+
+
+def create_refresh_token(
+    session: Session,
+    user_id: int,
+    family_id: Optional[str] = None,
+    commit: bool = True
+) -> Tuple[str, RefreshToken]:
+    """
+    Issue a new refresh token.
+    
+    Args:
+        session: Database session
+        user_id: Owner of the token
+        family_id: Rotation family to join (a new family is started if None)
+        commit: Whether to commit the session
+        
+    Returns:
+        Tuple of (plaintext token, token record)
+    """
+    plaintext = generate_refresh_token()
+    db_token = RefreshToken(
+        token_hash=hash_token(plaintext),
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4().hex,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    session.add(db_token)
+    if commit:
+        session.commit()
+        session.refresh(db_token)
+    return plaintext, db_token
+
+
+def get_refresh_token(session: Session, plaintext: str) -> Optional[RefreshToken]:
+    """Look up a refresh token by its plaintext value."""
+    statement = select(RefreshToken).where(RefreshToken.token_hash == hash_token(plaintext))
+    return session.exec(statement).first()
+
+
+def rotate_refresh_token(session: Session, plaintext: str) -> Optional[Tuple[str, RefreshToken]]:
+    """
+    Exchange a refresh token for a new one in the same family.
+    
+    Presenting a token that was already rotated or revoked is treated as
+    theft: the whole family is revoked. The token is claimed with a
+    conditional UPDATE, so of two concurrent rotations only one succeeds
+    and the other counts as reuse.
+    
+    Returns:
+        Tuple of (new plaintext token, new record), or None if the token is
+        unknown, expired or revoked
+    """
+    db_token = get_refresh_token(session, plaintext)
+    if db_token is None:
+        return None
+    
+    if db_token.revoked_at is not None:
+        revoke_refresh_token_family(session, db_token.family_id)
+        return None
+    
+    now = datetime.utcnow()
+    if db_token.expires_at <= now:
+        return None
+    
+    claim = session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == db_token.id, RefreshToken.revoked_at == None)  # noqa: E711
+        .values(revoked_at=now)
+    )
+    if claim.rowcount != 1:
+        # Rotated by a concurrent request since we read it
+        session.rollback()
+        revoke_refresh_token_family(session, db_token.family_id)
+        return None
+    
+    new_plaintext, new_token = create_refresh_token(
+        session, db_token.user_id, family_id=db_token.family_id, commit=False
+    )
+    session.flush()
+    db_token.revoked_at = now
+    db_token.replaced_by_id = new_token.id
+    session.add(db_token)
+    session.commit()
+    session.refresh(new_token)
+    
+    return new_plaintext, new_token
+
+
+def revoke_refresh_token_family(session: Session, family_id: str) -> None:
+    """Revoke every active token in a rotation family."""
+    statement = select(RefreshToken).where(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at == None,  # noqa: E711
+    )
+    _revoke_all(session, statement)
+
+
+def revoke_user_refresh_tokens(session: Session, user_id: int, commit: bool = True) -> None:
+    """Revoke every active refresh token of a user."""
+    statement = select(RefreshToken).where(
+        RefreshToken.user_id == user_id,
+        RefreshToken.revoked_at == None,  # noqa: E711
+    )
+    _revoke_all(session, statement, commit=commit)
+
+
+def _revoke_all(session: Session, statement, commit: bool = True) -> None:
+    now = datetime.utcnow()
+    for db_token in session.exec(statement).all():
+        db_token.revoked_at = now
+        session.add(db_token)
+    if commit:
+        session.commit()
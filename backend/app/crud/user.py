@@ -3,8 +3,10 @@ from typing import Optional
 from datetime import datetime
 from sqlmodel import Session, select
 
+from app.crud.refresh_token import revoke_user_refresh_tokens
 from app.models.user import User, UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.principal import cache_principal, tombstone_principal
+from app.core.security import get_password_hash, password_hasher
 
 
 def get_user_by_email(session: Session, email: str) -> Optional[User]:
@@ -37,19 +39,26 @@ def get_user_by_id(session: Session, user_id: int) -> Optional[User]:
     return session.get(User, user_id)
 
 
-def create_user(session: Session, user_create: UserCreate) -> User:
+def create_user(
+    session: Session,
+    user_create: UserCreate,
+    hashed_password: Optional[str] = None
+) -> User:
     """
     Create a new user.
     
     Args:
         session: Database session
         user_create: User creation data
+        hashed_password: Pre-computed password hash (e.g. from password_hasher);
+            hashed inline when omitted
         
     Returns:
         Created user
     """
     # Hash password
-    hashed_password = get_password_hash(user_create.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user_create.password)
     
     # Create user instance
     db_user = User(
@@ -68,7 +77,7 @@ def create_user(session: Session, user_create: UserCreate) -> User:
     return db_user
 
 
-def update_user(session: Session, user: User, user_update: UserUpdate) -> User:
+async def update_user(session: Session, user: User, user_update: UserUpdate) -> User:
     """
     Update a user.
     
@@ -85,7 +94,19 @@ def update_user(session: Session, user: User, user_update: UserUpdate) -> User:
     # Handle password update separately
     if "password" in update_data:
         password = update_data.pop("password")
-        update_data["hashed_password"] = get_password_hash(password)
+        update_data["hashed_password"] = await password_hasher.hash(password)
+    
+    # Changing the claims carried in issued JWTs, or the password, invalidates
+    # every access token issued so far
+    if "hashed_password" in update_data or any(
+        field in update_data and update_data[field] != getattr(user, field)
+        for field in ("is_active", "is_admin")
+    ):
+        user.token_epoch += 1
+    
+    # A password change or deactivation ends every refresh-token session
+    if "hashed_password" in update_data or update_data.get("is_active") is False:
+        revoke_user_refresh_tokens(session, user.id, commit=False)
     
     # Update fields
     for field, value in update_data.items():
@@ -97,13 +118,19 @@ def update_user(session: Session, user: User, user_update: UserUpdate) -> User:
     session.commit()
     session.refresh(user)
     
+    # Write the new active/admin state through to the principal cache
+    cache_principal(user)
+    
     return user
 
 
-def authenticate_user(session: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(session: Session, email: str, password: str) -> Optional[User]:
     """
     Authenticate a user by email and password.
     
+    Hashes made with outdated argon2 parameters are replaced with a hash
+    using the current parameters on successful login.
+    
     Args:
         session: Database session
         email: User email
@@ -116,12 +143,38 @@ def authenticate_user(session: Session, email: str, password: str) -> Optional[U
     if not user:
         return None
     
-    if not verify_password(password, user.hashed_password):
+    if not await check_user_password(session, user, password):
         return None
     
     return user
 
 
+async def check_user_password(session: Session, user: User, password: str) -> bool:
+    """
+    Verify a user's local password, upgrading outdated hashes.
+    
+    Args:
+        session: Database session
+        user: User to check
+        password: Plain text password
+        
+    Returns:
+        True if the password matches
+    """
+    is_valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+    if not is_valid:
+        return False
+    
+    # Transparently upgrade hashes made with outdated argon2 parameters
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+    
+    return True
+
+
 def delete_user(session: Session, user: User) -> None:
     """
     Delete a user.
@@ -130,5 +183,7 @@ def delete_user(session: Session, user: User) -> None:
         session: Database session
         user: User to delete
     """
+    user_id = user.id
     session.delete(user)
     session.commit()
+    tombstone_principal(user_id)
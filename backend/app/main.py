@@ -2,12 +2,15 @@
 FastAPI Intranet Demo - Main Application
 """
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.authentication import AuthenticationMiddleware
+from app.core.bulkhead import use_bulkhead
+from app.core.rate_limit import use_rate_limit
 from app.core.config import settings
 from app.core.database import create_db_and_tables
-from app.api import auth, users, tokens, items
+from app.api import auth, users, tokens, items, admin
 
 
 @asynccontextmanager
@@ -34,9 +37,29 @@ async def lifespan(app: FastAPI):
         crud_user.create_user(session, admin_create)
         print(f"✅ Created admin user: {settings.FIRST_SUPERUSER_EMAIL}")
     
+    # Start periodic flush of buffered PAT usage
+    from app.core.token_usage import token_usage
+    token_usage.start()
+    
+    # Start background LDAP health probes (served by /api/auth/ldap/health)
+    from app.core.ldap_client import ldap_client
+    ldap_client.start_health_probes()
+    
+    # Start scheduled LDAP directory syncs (if LDAP_SYNC_INTERVAL is set)
+    from app.core.ldap_sync import ldap_sync
+    ldap_sync.start()
+    
     yield
     
-    # Shutdown: cleanup if needed
+    # Shutdown: stop health probes and syncs, flush buffered PAT usage, stop
+    # the password hashing and LDAP worker pools and close pooled LDAP connections
+    await ldap_sync.stop()
+    await ldap_client.stop_health_probes()
+    await token_usage.stop()
+    from app.core.security import password_hasher
+    password_hasher.shutdown()
+    ldap_client.shutdown()
+    ldap_client.service.close()
 
 
 # Create FastAPI app
@@ -116,11 +139,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(tokens.router, prefix="/api/users", tags=["tokens"])
-app.include_router(items.router)
+# Authenticate each request once, from in-process caches where possible
+app.add_middleware(AuthenticationMiddleware)
+
+# Include routers (each route group has its own rate limit, checked before
+# queueing, and runs in its own concurrency bulkhead; users.py assigns its
+# routes to the auth/admin bulkheads individually)
+app.include_router(
+    auth.router,
+    dependencies=[Depends(use_rate_limit("auth")), Depends(use_bulkhead("auth"))],
+)
+app.include_router(users.router, dependencies=[Depends(use_rate_limit("users"))])
+app.include_router(
+    tokens.router,
+    prefix="/api/users",
+    tags=["tokens"],
+    dependencies=[Depends(use_rate_limit("tokens")), Depends(use_bulkhead("tokens"))],
+)
+app.include_router(
+    items.router,
+    dependencies=[Depends(use_rate_limit("items")), Depends(use_bulkhead("items"))],
+)
+app.include_router(
+    admin.router,
+    dependencies=[Depends(use_rate_limit("admin")), Depends(use_bulkhead("admin"))],
+)
 
 
 @app.get("/")
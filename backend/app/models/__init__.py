@@ -2,9 +2,13 @@
 from app.models.user import User, UserCreate, UserUpdate, UserInDB
 from app.models.token import PersonalAccessToken, TokenCreate, TokenResponse, TokenInfo
 from app.models.item import Item, ItemCreate, ItemUpdate, ItemRead
+from app.models.refresh_token import RefreshToken, RefreshRequest, LogoutRequest
+from app.models.ldap_sync import LDAPSyncState
 
 __all__ = [
     "User", "UserCreate", "UserUpdate", "UserInDB",
     "PersonalAccessToken", "TokenCreate", "TokenResponse", "TokenInfo",
-    "Item", "ItemCreate", "ItemUpdate", "ItemRead"
+    "Item", "ItemCreate", "ItemUpdate", "ItemRead",
+    "RefreshToken", "RefreshRequest", "LogoutRequest",
+    "LDAPSyncState"
 ]
@@ -0,0 +1,11 @@
+from datetime import datetime
+from sqlmodel import Field, SQLModel
+
+
+class LDAPSyncState(SQLModel, table=True):
+    """High-water mark of the incremental LDAP directory sync"""
+    __tablename__ = "ldap_sync_state"
+    
+    key: str = Field(primary_key=True, max_length=255, description="Change attribute, plus server for uSNChanged")
+    high_water_mark: str = Field(description="Highest change value already synced")
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import Field, SQLModel
+
+
+class RefreshToken(SQLModel, table=True):
+    """Opaque refresh token (stored hashed) used to renew access tokens"""
+    __tablename__ = "refresh_tokens"
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    token_hash: str = Field(index=True, unique=True, description="Hashed token value")
+    user_id: int = Field(foreign_key="users.id", index=True)
+    family_id: str = Field(index=True, description="Shared by all rotations of one login")
+    expires_at: datetime = Field(description="Expiration datetime")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    revoked_at: Optional[datetime] = Field(default=None, description="Set when rotated or revoked")
+    replaced_by_id: Optional[int] = Field(default=None, description="Token issued when this one was rotated")
+
+
+class RefreshRequest(SQLModel):
+    """Request body for the refresh grant"""
+    refresh_token: str
+
+
+class LogoutRequest(SQLModel):
+    """Optional request body for logout"""
+    refresh_token: Optional[str] = None
@@ -10,8 +10,13 @@ class PersonalAccessToken(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True, description="Human-readable name for the token")
     token_hash: str = Field(index=True, unique=True, description="Hashed token value")
+    token_digest: Optional[bytes] = Field(
+        default=None,
+        description="SHA-256 digest of the token (None for legacy-format tokens)"
+    )
     user_id: int = Field(foreign_key="users.id", index=True)
     scopes: str = Field(default="read", description="Comma-separated list of scopes")
+    scope_mask: int = Field(default=1, description="Scopes compiled to a bitmask (see SCOPE_BITS)")
     expires_at: Optional[datetime] = Field(default=None, description="Expiration datetime (None = never)")
     last_used_at: Optional[datetime] = Field(default=None, description="Last time token was used")
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -22,6 +22,7 @@ class User(UserBase, table=True):
     
     id: Optional[int] = Field(default=None, primary_key=True)
     hashed_password: str
+    token_epoch: int = Field(default=0, description="Bumped to invalidate previously issued JWTs")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
     
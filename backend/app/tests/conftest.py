@@ -9,8 +9,15 @@ from sqlmodel import Session, create_engine, SQLModel
 from sqlmodel.pool import StaticPool
 
 from app.main import app
+from app.core.authentication import auth_stats
 from app.core.deps import get_session
-from app.core.security import get_password_hash
+from app.core.ldap_service import ldap_service
+from app.core.login_routing import login_routes, login_stats
+from app.core.principal import principal_cache, token_epochs
+from app.core.rate_limit import rate_limiters
+from app.core.token_security import pat_cache, pat_negative_cache
+from app.core.token_usage import token_usage
+from app.core.security import get_password_hash, jwt_decode_cache, revoked_tokens
 from app.models.user import User
 from app.models.token import PersonalAccessToken
 
@@ -19,6 +26,29 @@ from app.models.token import PersonalAccessToken
 TEST_DATABASE_URL = "sqlite:///:memory:"
 
 
+@pytest.fixture(autouse=True)
+def reset_auth_caches():
+    """Clear in-process auth caches so ids reused across tests don't leak state."""
+    caches = (
+        principal_cache, token_epochs, pat_cache, pat_negative_cache, jwt_decode_cache, login_routes
+    )
+    for cache in caches:
+        cache.clear()
+    token_usage.clear()
+    revoked_tokens.clear()
+    auth_stats.clear()
+    login_stats.clear()
+    ldap_service.breaker.reset()
+    ldap_service.clear_health()
+    for limiter in rate_limiters.values():
+        limiter.clear()
+    yield
+    for cache in caches:
+        cache.clear()
+    token_usage.clear()
+    revoked_tokens.clear()
+
+
 @pytest.fixture(name="engine")
 def engine_fixture():
     """Create a test database engine."""
@@ -136,6 +136,30 @@ class TestLogout:
         response = client.post("/api/auth/logout")
         assert response.status_code == 401
 
+    def test_logout_revokes_access_token(self, client: TestClient, auth_headers: dict):
+        """Test that the access token stops working after logout."""
+        assert client.get("/api/users/me", headers=auth_headers).status_code == 200
+        assert client.get("/api/items", headers=auth_headers).status_code == 200
+
+        response = client.post("/api/auth/logout", headers=auth_headers)
+        assert response.status_code == 200
+
+        assert client.get("/api/users/me", headers=auth_headers).status_code == 401
+        assert client.get("/api/items", headers=auth_headers).status_code == 401
+
+    def test_logout_keeps_other_sessions(self, client: TestClient, test_user: User):
+        """Test that logging out one token leaves other tokens valid."""
+        tokens = [
+            client.post(
+                "/api/auth/login",
+                data={"username": test_user.email, "password": "testpassword123"}
+            ).json()["access_token"]
+            for _ in range(2)
+        ]
+        client.post("/api/auth/logout", headers={"Authorization": f"Bearer {tokens[0]}"})
+        response = client.get("/api/users/me", headers={"Authorization": f"Bearer {tokens[1]}"})
+        assert response.status_code == 200
+
 
 class TestGetCurrentUser:
     """Test getting current user information."""
@@ -161,3 +185,191 @@ class TestGetCurrentUser:
             headers={"Authorization": "Bearer invalid_token"}
         )
         assert response.status_code == 401
+
+
+class TestClaimsPrincipal:
+    """Test claims-only authorization."""
+
+    def test_test_token_returns_claims(self, client: TestClient, auth_headers: dict, test_user: User):
+        """Test that test-token reports the identity in the token."""
+        response = client.post("/api/auth/test-token", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == test_user.id
+        assert data["email"] == test_user.email
+        assert data["is_admin"] is False
+
+    def test_fresh_claims_skip_user_lookup(self, client: TestClient):
+        """Test that fresh JWT claims are trusted without loading the user."""
+        from app.core.security import create_access_token
+
+        token = create_access_token(data={"sub": "999", "email": "ghost@example.com"})
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/items", headers=headers).status_code == 200
+        # Routes that need the user row still reject the unknown user
+        assert client.get("/api/users/me", headers=headers).status_code == 401
+
+    def test_stale_claims_fall_back_to_database(self, client: TestClient, monkeypatch):
+        """Test that claims older than the staleness bound are re-checked."""
+        from app.core.config import settings
+        from app.core.security import create_access_token
+
+        monkeypatch.setattr(settings, "CLAIMS_MAX_AGE_SECONDS", -1)
+        token = create_access_token(data={"sub": "999", "email": "ghost@example.com"})
+        response = client.get("/api/items", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 401
+
+    def test_epoch_bump_rejects_existing_tokens(
+        self, client: TestClient, auth_headers: dict, admin_headers: dict, test_user: User
+    ):
+        """Test that deactivation invalidates tokens on the claims path too."""
+        assert client.get("/api/items", headers=auth_headers).status_code == 200
+        client.put(f"/api/users/{test_user.id}", headers=admin_headers, json={"is_active": False})
+        client.put(f"/api/users/{test_user.id}", headers=admin_headers, json={"is_active": True})
+        assert client.get("/api/items", headers=auth_headers).status_code == 401
+        assert client.post("/api/auth/test-token", headers=auth_headers).status_code == 401
+
+
+    def test_deleted_user_claims_rejected(self, client: TestClient, session: Session):
+        """Test that a deleted user's fresh JWT no longer passes the claims path."""
+        from app.core.security import create_access_token
+        from app.crud.user import delete_user
+
+        user = User(email="doomed@example.com", hashed_password="x", full_name="Doomed", is_admin=True)
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        token = create_access_token(data={"sub": str(user.id), "email": user.email, "is_admin": True})
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/api/items?all=true", headers=headers).status_code == 200
+
+        delete_user(session, user)
+        assert client.get("/api/items?all=true", headers=headers).status_code == 401
+        assert client.post("/api/auth/test-token", headers=headers).status_code == 401
+
+
+class TestPasswordRehash:
+    """Test transparent rehashing of outdated password hashes."""
+
+    def test_login_upgrades_outdated_hash(self, client: TestClient, session: Session):
+        """Test that a hash with old argon2 parameters is replaced on login."""
+        from passlib.context import CryptContext
+        from app.core.security import pwd_context
+
+        old_context = CryptContext(schemes=["argon2"], argon2__rounds=1, argon2__memory_cost=8192)
+        user = User(
+            email="legacy@example.com",
+            hashed_password=old_context.hash("LegacyPass123"),
+            full_name="Legacy User"
+        )
+        session.add(user)
+        session.commit()
+        assert pwd_context.needs_update(user.hashed_password)
+
+        response = client.post(
+            "/api/auth/login",
+            data={"username": "legacy@example.com", "password": "LegacyPass123"}
+        )
+        assert response.status_code == 200
+
+        session.refresh(user)
+        assert not pwd_context.needs_update(user.hashed_password)
+        assert pwd_context.verify("LegacyPass123", user.hashed_password)
+
+
+class TestRefreshTokens:
+    """Test rotating refresh tokens."""
+
+    def _login(self, client: TestClient, test_user: User) -> dict:
+        response = client.post(
+            "/api/auth/login",
+            data={"username": test_user.email, "password": "testpassword123"}
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    def test_login_returns_refresh_token(self, client: TestClient, test_user: User):
+        """Test that login issues a refresh token alongside the access token."""
+        data = self._login(client, test_user)
+        assert data["refresh_token"].startswith("rt_")
+
+    def test_refresh_rotates_token(self, client: TestClient, test_user: User):
+        """Test that refreshing returns a new pair and consumes the old token."""
+        old = self._login(client, test_user)["refresh_token"]
+
+        response = client.post("/api/auth/refresh", json={"refresh_token": old})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["refresh_token"] != old
+
+        headers = {"Authorization": f"Bearer {data['access_token']}"}
+        assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    def test_refresh_invalid_token(self, client: TestClient):
+        """Test that an unknown refresh token is rejected."""
+        response = client.post("/api/auth/refresh", json={"refresh_token": "rt_bogus"})
+        assert response.status_code == 401
+
+    def test_reuse_revokes_family(self, client: TestClient, test_user: User):
+        """Test that replaying a rotated token revokes its successors too."""
+        old = self._login(client, test_user)["refresh_token"]
+        new = client.post("/api/auth/refresh", json={"refresh_token": old}).json()["refresh_token"]
+
+        assert client.post("/api/auth/refresh", json={"refresh_token": old}).status_code == 401
+        assert client.post("/api/auth/refresh", json={"refresh_token": new}).status_code == 401
+
+    def test_concurrent_rotation_counts_as_reuse(self, tmp_path):
+        """Test that two sessions rotating the same token mint only one successor."""
+        from sqlmodel import SQLModel, create_engine, select
+        from app.crud.refresh_token import create_refresh_token, get_refresh_token, rotate_refresh_token
+        from app.models.refresh_token import RefreshToken
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as setup:
+            user = User(email="race@example.com", hashed_password="x", full_name="Race")
+            setup.add(user)
+            setup.commit()
+            plaintext, _ = create_refresh_token(setup, user.id)
+
+        with Session(engine) as first, Session(engine) as second:
+            # Both requests have read the token before either rotates it
+            seen = [get_refresh_token(first, plaintext), get_refresh_token(second, plaintext)]
+            assert all(token.revoked_at is None for token in seen)
+            assert rotate_refresh_token(first, plaintext) is not None
+            assert rotate_refresh_token(second, plaintext) is None
+
+        with Session(engine) as check:
+            tokens = check.exec(select(RefreshToken)).all()
+            assert len(tokens) == 2
+            assert all(token.revoked_at is not None for token in tokens)
+        engine.dispose()
+
+    def test_logout_revokes_refresh_token(self, client: TestClient, test_user: User):
+        """Test that logout revokes the given refresh token."""
+        data = self._login(client, test_user)
+        headers = {"Authorization": f"Bearer {data['access_token']}"}
+
+        response = client.post(
+            "/api/auth/logout",
+            headers=headers,
+            json={"refresh_token": data["refresh_token"]}
+        )
+        assert response.status_code == 200
+        response = client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]})
+        assert response.status_code == 401
+
+    def test_password_change_revokes_refresh_tokens(self, client: TestClient, test_user: User):
+        """Test that changing the password ends existing refresh sessions."""
+        data = self._login(client, test_user)
+        headers = {"Authorization": f"Bearer {data['access_token']}"}
+
+        response = client.post(
+            "/api/users/me/password",
+            headers=headers,
+            params={"current_password": "testpassword123", "new_password": "NewPassword456"}
+        )
+        assert response.status_code == 200
+        response = client.post("/api/auth/refresh", json={"refresh_token": data["refresh_token"]})
+        assert response.status_code == 401
+        assert client.get("/api/users/me", headers=headers).status_code == 401
@@ -0,0 +1,97 @@
+"""
+Tests for the request authentication middleware.
+"""
+import asyncio
+
+import pytest
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.authentication import (
+    AuthBackend,
+    AuthenticationMiddleware,
+    JWTBackend,
+    PATBackend,
+    auth_stats,
+    authenticate_header,
+    parse_authorization,
+)
+from app.core.principal import Principal
+
+
+class TestAuthorizationHeader:
+    """Test Authorization header parsing."""
+
+    def test_parse_bearer(self):
+        """Test that only non-empty Bearer credentials are accepted."""
+        assert parse_authorization("Bearer abc") == "abc"
+        assert parse_authorization("bearer  abc ") == "abc"
+        assert parse_authorization("Basic abc") is None
+        assert parse_authorization("Bearer ") is None
+        assert parse_authorization(None) is None
+
+    def test_backend_selected_by_token_shape(self):
+        """Test that PATs and JWTs are routed to their backends."""
+        assert isinstance(authenticate_header(f"Bearer pat_{'x' * 54}").backend, PATBackend)
+        assert isinstance(authenticate_header("Bearer eyJ.abc.def").backend, JWTBackend)
+        assert authenticate_header(None).backend is None
+
+
+class TestAuthenticationMiddleware:
+    """Test cache-first authentication in the middleware."""
+
+    def test_cached_principal_skips_database(self, client: TestClient, auth_headers: dict, engine):
+        """Test that a warm principal cache authenticates without any query."""
+        assert client.get("/api/items", headers=auth_headers).status_code == 200
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            response = client.get("/api/users/me/tokens", headers=auth_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert response.status_code == 200
+        assert not any("FROM users" in statement for statement in statements)
+
+    def test_cold_cache_falls_back_to_session(self, client: TestClient, auth_headers: dict):
+        """Test that cache misses are resolved by the dependency and timed."""
+        auth_stats.clear()
+        assert client.get("/api/users/me/tokens", headers=auth_headers).status_code == 200
+        jwt_stats = auth_stats.stats()["jwt"]
+        assert jwt_stats["deferred"]["count"] == 1
+        assert jwt_stats["db_authenticated"]["count"] == 1
+
+        assert client.get("/api/users/me/tokens", headers=auth_headers).status_code == 200
+        assert auth_stats.stats()["jwt"]["authenticated"]["count"] == 1
+
+    def test_custom_backend(self, test_user):
+        """Test that backends are pluggable."""
+        class StaticBackend(AuthBackend):
+            name = "static"
+
+            def matches(self, token):
+                return token == "let-me-in"
+
+            def authenticate(self, state, session):
+                return Principal(id=test_user.id, email=test_user.email, is_active=True, is_admin=False)
+
+        async def downstream(scope, receive, send):
+            pass
+
+        middleware = AuthenticationMiddleware(downstream, backends=[StaticBackend(), JWTBackend()])
+        scope = {"type": "http", "headers": [(b"authorization", b"Bearer let-me-in")]}
+        asyncio.run(middleware(scope, None, None))
+
+        assert scope["state"]["auth"].principal.email == test_user.email
+        assert auth_stats.stats()["static"]["authenticated"]["count"] >= 1
+
+    def test_incomplete_backend_cannot_be_instantiated(self):
+        """Test that a backend missing authenticate fails at construction."""
+        class MatchOnlyBackend(AuthBackend):
+            def matches(self, token):
+                return True
+
+        with pytest.raises(TypeError):
+            MatchOnlyBackend()
@@ -0,0 +1,159 @@
+"""
+Micro-benchmarks for authentication hot paths.
+
+Run with ``pytest -m slow -s`` to see the timings.
+"""
+import base64
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core import security
+from app.core.jwt_backends import JWT_BACKENDS, JWTDecodeError, get_codec
+
+SECRET = "benchmark-secret-key"
+
+
+def _codec_or_skip(name: str):
+    """Build a codec, skipping when its optional dependency is missing."""
+    try:
+        return get_codec(name, SECRET, "HS256")
+    except RuntimeError as e:
+        pytest.skip(str(e))
+
+
+def _claims(minutes: int = 30) -> dict:
+    now = datetime.utcnow()
+    return {
+        "sub": "1",
+        "email": "bench@example.com",
+        "is_admin": False,
+        "exp": now + timedelta(minutes=minutes),
+        "iat": now,
+    }
+
+
+def _per_call_us(func, iterations: int) -> float:
+    """Return the average cost of func() in microseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+@pytest.mark.slow
+class TestJWTDecodeBenchmark:
+    """Benchmark verified-JWT decoding with and without the decode cache."""
+
+    def test_cached_decode_is_faster(self):
+        """Test that the per-request decode cost drops once a token is cached."""
+        token = security.create_access_token(
+            data={"sub": "1", "email": "bench@example.com", "is_admin": False},
+            expires_delta=timedelta(minutes=30)
+        )
+
+        def uncached():
+            security.jwt_decode_cache.clear()
+            security.decode_access_token(token)
+
+        uncached_us = _per_call_us(uncached, 2000)
+        security.decode_access_token(token)
+        cached_us = _per_call_us(lambda: security.decode_access_token(token), 2000)
+
+        print(f"\njwt decode: uncached {uncached_us:.1f}us, cached {cached_us:.1f}us")
+        assert cached_us < uncached_us
+
+
+class TestJWTDecodeCache:
+    """Test decode cache correctness."""
+
+    def test_cached_payload_is_a_copy(self):
+        """Test that callers cannot mutate the cached payload."""
+        token = security.create_access_token(data={"sub": "1"})
+        payload = security.decode_access_token(token)
+        payload["sub"] = "2"
+        assert security.decode_access_token(token)["sub"] == "1"
+
+    def test_invalid_and_expired_tokens_are_not_cached(self):
+        """Test that only verified, unexpired tokens are cached."""
+        expired = security.create_access_token(
+            data={"sub": "1"}, expires_delta=timedelta(minutes=-1)
+        )
+        assert security.decode_access_token(expired) is None
+        assert security.decode_access_token("not-a-jwt") is None
+        assert len(security.jwt_decode_cache) == 0
+
+
+@pytest.mark.parametrize("backend", list(JWT_BACKENDS))
+class TestJWTBackends:
+    """Test that every JWT backend enforces the checks test_security.py relies on."""
+
+    def test_roundtrip(self, backend):
+        """Test that encoded claims decode unchanged."""
+        codec = _codec_or_skip(backend)
+        claims = codec.decode(codec.encode(_claims()))
+        assert claims["sub"] == "1"
+        assert isinstance(claims["exp"], int)
+
+    def test_interoperates_with_jose(self, backend):
+        """Test that tokens are interchangeable with the default backend."""
+        codec = _codec_or_skip(backend)
+        jose = get_codec("jose", SECRET, "HS256")
+        assert jose.decode(codec.encode(_claims()))["email"] == "bench@example.com"
+        assert codec.decode(jose.encode(_claims()))["email"] == "bench@example.com"
+
+    def test_expired_token_rejected(self, backend):
+        """Test that expired tokens fail verification."""
+        codec = _codec_or_skip(backend)
+        with pytest.raises(JWTDecodeError):
+            codec.decode(codec.encode(_claims(minutes=-10)))
+
+    def test_tampered_and_foreign_tokens_rejected(self, backend):
+        """Test bad signatures, wrong keys, alg=none and garbage."""
+        codec = _codec_or_skip(backend)
+        token = codec.encode(_claims())
+        header, payload, signature = token.split(".")
+        other_key = get_codec("jose", "another-secret", "HS256").encode(_claims())
+        none_header = base64.urlsafe_b64encode(b'{"alg":"none","typ":"JWT"}').rstrip(b"=").decode()
+        unsigned = f"{none_header}.{payload}."
+        for bad in (
+            f"{header}.{payload}x.{signature}",
+            f"{header}.{payload}.{signature[:-2]}AA",
+            other_key,
+            unsigned,
+            "invalid_token_here",
+            "a.b.c.d",
+        ):
+            with pytest.raises(JWTDecodeError):
+                codec.decode(bad)
+
+    def test_non_string_subject_rejected(self, backend):
+        """Test that numeric subjects are rejected like python-jose does."""
+        codec = _codec_or_skip(backend)
+        claims = _claims()
+        claims["sub"] = 1
+        with pytest.raises(JWTDecodeError):
+            codec.decode(codec.encode(claims))
+
+    @pytest.mark.slow
+    def test_encode_decode_throughput(self, backend):
+        """Benchmark encode/decode cost per backend."""
+        codec = _codec_or_skip(backend)
+        claims = _claims()
+        token = codec.encode(claims)
+        encode_us = _per_call_us(lambda: codec.encode(claims), 2000)
+        decode_us = _per_call_us(lambda: codec.decode(token), 2000)
+        print(f"\n{backend}: encode {encode_us:.1f}us, decode {decode_us:.1f}us")
+
+
+def test_incomplete_codec_cannot_be_instantiated():
+    """Test that a codec missing decode fails at construction, not first use."""
+    from app.core.jwt_backends import JWTCodec
+
+    class EncodeOnlyCodec(JWTCodec):
+        def encode(self, claims: dict) -> str:
+            return ""
+
+    with pytest.raises(TypeError):
+        EncodeOnlyCodec(SECRET, "HS256")
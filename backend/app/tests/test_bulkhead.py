@@ -0,0 +1,74 @@
+"""
+Tests for route-group concurrency bulkheads.
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.bulkhead import Bulkhead
+
+
+class TestBulkhead:
+    """Test the bulkhead limiter."""
+
+    def test_queue_overflow_rejected_with_retry_after(self):
+        """Test that requests beyond concurrency + queue get 503."""
+        bulkhead = Bulkhead("test", max_concurrent=1, max_queue=0, queue_timeout=1.0)
+
+        async def scenario():
+            await bulkhead.acquire()
+            with pytest.raises(HTTPException) as exc_info:
+                await bulkhead.acquire()
+            bulkhead.release()
+            return exc_info.value
+
+        error = asyncio.run(scenario())
+        assert error.status_code == 503
+        assert error.headers["Retry-After"] == "1"
+        assert bulkhead.stats()["rejected"] == 1
+        assert bulkhead.stats()["active"] == 0
+
+    def test_queued_request_gets_released_slot(self):
+        """Test that a waiter is admitted when a slot frees up."""
+        bulkhead = Bulkhead("test", max_concurrent=1, max_queue=1, queue_timeout=1.0)
+
+        async def scenario():
+            await bulkhead.acquire()
+            waiter = asyncio.create_task(bulkhead.acquire())
+            await asyncio.sleep(0.01)
+            assert bulkhead.stats()["queued"] == 1
+            bulkhead.release()
+            await waiter
+            bulkhead.release()
+
+        asyncio.run(scenario())
+        stats = bulkhead.stats()
+        assert stats["admitted"] == 2
+        assert stats["active"] == 0
+        assert sum(stats["queue_time_histogram"].values()) == 2
+
+    def test_queue_timeout(self):
+        """Test that waiting longer than the queue timeout gets 503."""
+        bulkhead = Bulkhead("test", max_concurrent=1, max_queue=1, queue_timeout=0.01)
+
+        async def scenario():
+            await bulkhead.acquire()
+            with pytest.raises(HTTPException):
+                await bulkhead.acquire()
+            bulkhead.release()
+
+        asyncio.run(scenario())
+        assert bulkhead.stats()["timeouts"] == 1
+        assert bulkhead.stats()["queued"] == 0
+        assert bulkhead.stats()["active"] == 0
+
+    def test_routes_release_their_slots(self, client: TestClient, auth_headers: dict, admin_headers: dict):
+        """Test that route groups release slots after each request."""
+        for _ in range(3):
+            assert client.get("/api/items", headers=auth_headers).status_code == 200
+        stats = client.get("/api/admin/stats", headers=admin_headers).json()["bulkheads"]
+        assert stats["items"]["active"] == 0
+        assert stats["items"]["admitted"] >= 3
+        assert set(stats) == {"auth", "admin", "items", "tokens"}
@@ -4,7 +4,7 @@ from unittest.mock import Mock, patch, MagicMock
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.core.ldap_service import LDAPService, LDAPConfig
+from app.core.ldap_service import LDAPService, LDAPConfig, LDAPConnectionPool
 
 
 class TestLDAPConfig:
@@ -160,6 +160,7 @@ class TestLDAPService:
         mock_connection.return_value = mock_conn_instance
         
         service = LDAPService()
+        service.config.server = 'ldap://test.com'
         with patch.object(service.config, 'enabled', True):
             with patch.object(service.config, 'is_valid', return_value=(True, None)):
                 success, user_info, error = service.authenticate("nonexistent", "password")
@@ -192,6 +193,7 @@ class TestLDAPService:
         mock_connection.side_effect = [mock_find_conn, mock_auth_conn]
         
         service = LDAPService()
+        service.config.server = 'ldap://test.com'
         with patch.object(service.config, 'enabled', True):
             with patch.object(service.config, 'is_valid', return_value=(True, None)):
                 with patch.object(service.config, 'search_base', 'DC=test'):
@@ -204,6 +206,568 @@ class TestLDAPService:
                         assert error is None
 
 
+class TestLDAPConnectionPool:
+    """Test pooled LDAP connections."""
+    
+    def _pool(self, factory, **kwargs):
+        options = dict(size=2, max_lifetime=60, idle_check=30, acquire_timeout=0.1)
+        options.update(kwargs)
+        return LDAPConnectionPool("test", factory, **options)
+    
+    def _factory(self):
+        def factory():
+            conn = MagicMock()
+            conn.closed = False
+            return conn
+        return MagicMock(side_effect=factory)
+    
+    def test_connections_are_reused(self):
+        """Test that released connections are reused instead of reopened."""
+        factory = self._factory()
+        pool = self._pool(factory)
+        for _ in range(3):
+            with pool.connection() as conn:
+                conn.search()
+        assert factory.call_count == 1
+        stats = pool.stats()
+        assert stats["reused"] == 2
+        assert stats["open"] == 1 and stats["idle"] == 1
+    
+    def test_failed_connection_is_discarded(self):
+        """Test that a connection that raised during use is not reused."""
+        from ldap3.core.exceptions import LDAPSocketReceiveError
+        
+        factory = self._factory()
+        pool = self._pool(factory)
+        with pytest.raises(LDAPSocketReceiveError):
+            with pool.connection():
+                raise LDAPSocketReceiveError("connection reset")
+        with pool.connection():
+            pass
+        assert factory.call_count == 2
+        assert pool.stats()["discarded"] == 1
+    
+    def test_expired_and_dead_connections_are_replaced(self):
+        """Test max lifetime and the idle liveness check."""
+        from ldap3.core.exceptions import LDAPSocketOpenError
+        
+        factory = self._factory()
+        pool = self._pool(factory, max_lifetime=0)
+        with pool.connection():
+            pass
+        with pool.connection():
+            pass
+        assert factory.call_count == 2
+        
+        factory = self._factory()
+        pool = self._pool(factory, idle_check=0)
+        with pool.connection() as conn:
+            conn.extend.standard.who_am_i.side_effect = LDAPSocketOpenError("gone")
+        with pool.connection():
+            pass
+        assert factory.call_count == 2
+    
+    def test_pool_size_is_bounded(self):
+        """Test that acquiring beyond the pool size times out."""
+        from ldap3.core.exceptions import LDAPException
+        
+        pool = self._pool(self._factory(), size=1)
+        with pool.connection():
+            with pytest.raises(LDAPException):
+                with pool.connection():
+                    pass
+        assert pool.stats()["timeouts"] == 1
+        with pool.connection():
+            pass
+    
+    @patch('app.core.ldap_service.Connection')
+    @patch('app.core.ldap_service.Server')
+    def test_user_binds_reuse_connection(self, mock_server, mock_connection):
+        """Test that password checks rebind a pooled connection."""
+        mock_conn = MagicMock()
+        mock_conn.closed = False
+        mock_conn.rebind.return_value = True
+        mock_connection.return_value = mock_conn
+        
+        service = LDAPService()
+        service.config.server = 'dc1.test.com'
+        assert service._verify_password("CN=A,DC=test", "secret") is True
+        assert service._verify_password("CN=B,DC=test", "secret") is True
+        assert service._verify_password("CN=B,DC=test", "") is False
+        assert mock_connection.call_count == 1
+        assert mock_conn.rebind.call_count == 2
+        assert mock_conn.password is None
+        assert service.server_stats()["dc1.test.com:389"]["pools"]["user"]["reused"] == 1
+    
+    @patch('app.core.ldap_service.Connection')
+    @patch('app.core.ldap_service.Server')
+    def test_wrong_password_keeps_connection(self, mock_server, mock_connection):
+        """Test that a rejected user bind is a failed login, not a broken connection."""
+        from ldap3.core.exceptions import LDAPInvalidCredentialsResult
+        
+        mock_conn = MagicMock()
+        mock_conn.closed = False
+        mock_conn.rebind.side_effect = LDAPInvalidCredentialsResult("invalidCredentials")
+        mock_connection.return_value = mock_conn
+        
+        service = LDAPService()
+        service.config.server = 'dc1.test.com'
+        with patch.object(service.config, 'enabled', True), \
+                patch.object(service.config, 'is_valid', return_value=(True, None)), \
+                patch.object(service.config, 'allowed_groups', []), \
+                patch.object(service, '_find_user', return_value=("CN=A,DC=test", {"groups": frozenset()})):
+            assert service.authenticate("a", "wrong") == (False, None, "Invalid credentials")
+        assert service._verify_password("CN=A,DC=test", "wrong") is False
+        pool = service.server_stats()["dc1.test.com:389"]["pools"]["user"]
+        assert pool["discarded"] == 0
+        assert pool["reused"] == 1
+
+
+class TestDirectoryFailover:
+    """Test multi-server failover, latency ordering and hedged searches."""
+    
+    def _service(self, behaviours, **config):
+        """Build a service whose servers behave per host (dict of host -> callable(conn))."""
+        def make_connection(server, **kwargs):
+            conn = MagicMock()
+            conn.closed = False
+            conn.bind.return_value = True
+            conn.entries = []
+            behaviours[server](conn)
+            return conn
+        
+        server_patch = patch('app.core.ldap_service.Server', side_effect=lambda host, **kwargs: host)
+        connection_patch = patch('app.core.ldap_service.Connection', side_effect=make_connection)
+        server_patch.start()
+        connection_patch.start()
+        self._patches = [server_patch, connection_patch]
+        
+        service = LDAPService()
+        service.config.server = ",".join(behaviours)
+        for name, value in config.items():
+            setattr(service.config, name, value)
+        return service
+    
+    def teardown_method(self):
+        for active in getattr(self, '_patches', []):
+            active.stop()
+    
+    def test_parse_server_list(self):
+        """Test that LDAP_SERVER accepts several hosts, ports and URLs."""
+        config = LDAPConfig()
+        config.port = 389
+        config.server = "dc1.example.com, dc2.example.com:3268, ldaps://dc3.example.com:636"
+        assert config.server_addresses() == [
+            ("dc1.example.com", 389), ("dc2.example.com", 3268), ("dc3.example.com", 636)
+        ]
+    
+    def test_search_fails_over_to_next_server(self):
+        """Test that an unreachable server is skipped and backed off."""
+        from ldap3.core.exceptions import LDAPSocketOpenError
+        
+        def down(conn):
+            conn.bind.side_effect = LDAPSocketOpenError("connection refused")
+        
+        service = self._service({"dc1": down, "dc2": lambda conn: None})
+        assert service._search("(objectClass=*)", ["cn"]) == []
+        
+        stats = service.server_stats()
+        assert stats["dc1:389"]["available"] is False
+        assert stats["dc2:389"]["available"] is True
+        assert [s.host for s in service._ordered_servers()] == ["dc2", "dc1"]
+    
+    def test_servers_ordered_by_latency(self):
+        """Test that the fastest available server is tried first."""
+        service = self._service({"dc1": lambda conn: None, "dc2": lambda conn: None})
+        dc1, dc2 = service._get_servers()
+        dc1.record_success(0.200)
+        dc2.record_success(0.020)
+        assert service._ordered_servers() == [dc2, dc1]
+    
+    def test_user_bind_not_retried_after_it_was_sent(self):
+        """Test that a bind that may have reached the server is not repeated elsewhere."""
+        from ldap3.core.exceptions import LDAPSocketReceiveError
+        
+        def drops(conn):
+            conn.rebind.side_effect = LDAPSocketReceiveError("connection reset")
+        
+        dc2 = MagicMock()
+        service = self._service({"dc1": drops, "dc2": dc2})
+        with pytest.raises(LDAPSocketReceiveError):
+            service._verify_password("CN=User,DC=test", "password")
+        assert dc2.call_count == 0
+    
+    def test_slow_search_is_hedged(self):
+        """Test that a search slower than the server's p95 is raced on a replica."""
+        import time
+        
+        def slow(conn):
+            conn.search.side_effect = lambda **kwargs: time.sleep(0.5)
+        
+        service = self._service(
+            {"dc1": slow, "dc2": lambda conn: None},
+            hedge_searches=True, hedge_min_delay=0.01
+        )
+        dc1, dc2 = service._get_servers()
+        for _ in range(dc1.MIN_HEDGE_SAMPLES):
+            dc1.record_success(0.01)
+        dc2.record_success(0.02)
+        
+        start = time.perf_counter()
+        assert service._search("(cn=someone)", ["cn"]) == []
+        assert time.perf_counter() - start < 0.4
+        assert service.hedge_stats() == {"enabled": True, "fired": 1, "won": 1}
+        service.close()
+    
+    def test_fast_failure_falls_back_to_replica(self):
+        """Test that a primary failing before the hedge is due still fails over."""
+        from ldap3.core.exceptions import LDAPSocketOpenError
+        
+        def down(conn):
+            conn.search.side_effect = LDAPSocketOpenError("connection refused")
+        
+        service = self._service(
+            {"dc1": down, "dc2": lambda conn: None},
+            hedge_searches=True, hedge_min_delay=0.5
+        )
+        dc1, dc2 = service._get_servers()
+        for _ in range(dc1.MIN_HEDGE_SAMPLES):
+            dc1.record_success(0.01)
+        dc2.record_success(0.02)
+        
+        assert service._search("(cn=someone)", ["cn"]) == []
+        assert service.hedge_stats() == {"enabled": True, "fired": 0, "won": 0}
+        service.close()
+
+
+class TestCircuitBreaker:
+    """Test the circuit breaker and its use around the directory."""
+    
+    def test_state_transitions(self):
+        """Test closed -> open -> half-open -> closed/open."""
+        from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+        
+        breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=0.05)
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure(RuntimeError("down"))
+        assert breaker.state == OPEN
+        assert breaker.allow() is False
+        
+        import time
+        time.sleep(0.06)
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() is True
+        assert breaker.allow() is False
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        
+        time.sleep(0.06)
+        assert breaker.allow() is True
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        stats = breaker.stats()
+        assert stats["times_opened"] == 2
+        assert stats["last_failure"] == "down"
+    
+    @patch('app.core.ldap_service.Connection')
+    @patch('app.core.ldap_service.Server')
+    def test_outage_opens_breaker(self, mock_server, mock_connection):
+        """Test that repeated directory failures fail fast without connecting."""
+        from ldap3.core.exceptions import LDAPSocketOpenError
+        from app.core.ldap_service import DIRECTORY_UNAVAILABLE
+        
+        mock_connection.return_value.bind.side_effect = LDAPSocketOpenError("connection refused")
+        service = LDAPService()
+        service.config.enabled = True
+        service.config.server = 'ldap://test.com'
+        service.config.base_dn = 'DC=test,DC=com'
+        service.config.bind_dn = 'CN=Service,DC=test,DC=com'
+        service.config.bind_password = 'password'
+        service.config.search_base = 'DC=test,DC=com'
+        
+        for _ in range(service.breaker.failure_threshold):
+            assert service.authenticate("user", "pw") == (False, None, DIRECTORY_UNAVAILABLE)
+        attempts = mock_connection.call_count
+        
+        assert service.authenticate("user", "pw") == (False, None, DIRECTORY_UNAVAILABLE)
+        assert mock_connection.call_count == attempts
+        
+        health = service.health_check()
+        assert health["healthy"] is False
+        assert health["circuit_breaker"]["state"] == "open"
+        assert mock_connection.call_count == attempts
+        
+        from app.core.circuit_breaker import CircuitOpenError
+        with pytest.raises(CircuitOpenError):
+            service._search("(cn=someone)", ["cn"])
+
+
+class TestLDAPUserCache:
+    """Test caching of LDAP user lookups."""
+    
+    def _entry(self):
+        entry = MagicMock()
+        entry.entry_dn = "CN=Test User,OU=Users,DC=test,DC=com"
+        entry.sAMAccountName = "testuser"
+        entry.mail = "testuser@test.com"
+        entry.displayName = "Test User"
+        entry.memberOf = ["CN=Users,DC=test,DC=com", "CN=App Admins,OU=Groups,DC=test,DC=com"]
+        return entry
+    
+    @patch('app.core.ldap_service.Connection')
+    @patch('app.core.ldap_service.Server')
+    def test_lookups_are_cached(self, mock_server, mock_connection):
+        """Test that repeated logins reuse the cached DN and groups."""
+        mock_conn = MagicMock()
+        mock_conn.closed = False
+        mock_conn.bind.return_value = True
+        mock_conn.rebind.return_value = True
+        mock_conn.entries = [self._entry()]
+        mock_connection.return_value = mock_conn
+        
+        service = LDAPService()
+        service.config.server = 'ldap://test.com'
+        with patch.object(service.config, 'enabled', True), \
+                patch.object(service.config, 'is_valid', return_value=(True, None)), \
+                patch.object(service.config, 'admin_groups', ['App Admins']), \
+                patch.object(service.config, 'allowed_groups', ['Users']):
+            for _ in range(3):
+                success, user_info, error = service.authenticate("TestUser", "password")
+                assert success is True
+            assert user_info['groups'] == frozenset({"Users", "App Admins"})
+            assert user_info['is_admin'] is True
+        
+        assert mock_conn.search.call_count == 1
+        assert mock_conn.rebind.call_count == 3
+        assert service.user_cache_stats()["hits"] == 2
+    
+    @patch('app.core.ldap_service.Connection')
+    @patch('app.core.ldap_service.Server')
+    def test_unknown_users_are_cached_but_errors_are_not(self, mock_server, mock_connection):
+        """Test negative entries and that failed searches are retried."""
+        from ldap3.core.exceptions import LDAPSocketOpenError
+        from app.core.ldap_service import USER_NOT_FOUND
+        
+        mock_conn = MagicMock()
+        mock_conn.closed = False
+        mock_conn.bind.return_value = True
+        mock_conn.entries = []
+        mock_connection.return_value = mock_conn
+        
+        service = LDAPService()
+        service.config.server = 'ldap://test.com'
+        with patch.object(service.config, 'enabled', True), \
+                patch.object(service.config, 'is_valid', return_value=(True, None)):
+            assert service.authenticate("nobody", "pw")[2] == USER_NOT_FOUND
+            assert service.authenticate("nobody", "pw")[2] == USER_NOT_FOUND
+            assert mock_conn.search.call_count == 1
+            
+            mock_conn.search.side_effect = LDAPSocketOpenError("down")
+            assert service.authenticate("someone", "pw")[2] == "LDAP server unreachable"
+            assert service.authenticate("someone", "pw")[2] == "LDAP server unreachable"
+            assert mock_conn.search.call_count == 3
+        
+        assert service.clear_user_cache() == 1
+    
+    def test_flush_endpoint_requires_admin(self, client, auth_headers, admin_headers):
+        """Test that only admins can flush the LDAP cache."""
+        from app.core.ldap_service import ldap_service
+        
+        ldap_service._user_cache.set("someone", (None, None))
+        assert client.delete("/api/admin/ldap/cache", headers=auth_headers).status_code == 403
+        response = client.delete("/api/admin/ldap/cache", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["flushed"] == 1
+        assert ldap_service.user_cache_stats()["size"] == 0
+
+
+class TestDirectorySync:
+    """Test the incremental directory sync job."""
+    
+    def _entry(self, name, usn, groups=()):
+        from types import SimpleNamespace
+        return SimpleNamespace(
+            entry_dn=f"CN={name},OU=Users,DC=test,DC=com",
+            sAMAccountName=name,
+            mail=f"{name}@example.com",
+            displayName=name.title(),
+            memberOf=[f"CN={group},OU=Groups,DC=test,DC=com" for group in groups],
+            uSNChanged=SimpleNamespace(value=usn),
+        )
+    
+    def _sync(self, pages):
+        """Build a sync job over a directory returning pages (lists of entries) per search."""
+        from app.core.ldap_sync import LDAPDirectorySync
+        
+        self.filters = []
+        
+        def search(search_filter, paged_cookie=None, **kwargs):
+            if paged_cookie is None:
+                self.filters.append(search_filter)
+                self._pages = list(pages)
+            conn.entries = self._pages.pop(0)
+            conn.result = {'controls': {'1.2.840.113556.1.4.319': {
+                'value': {'cookie': b'next' if self._pages else b''}
+            }}}
+        
+        conn = MagicMock()
+        conn.closed = False
+        conn.search.side_effect = search
+        server_patch = patch('app.core.ldap_service.Server')
+        connection_patch = patch('app.core.ldap_service.Connection', return_value=conn)
+        server_patch.start()
+        connection_patch.start()
+        self._patches = [server_patch, connection_patch]
+        
+        service = LDAPService()
+        service.config.enabled = True
+        service.config.server = 'dc1'
+        service.config.admin_groups = ['Admins']
+        return LDAPDirectorySync(service)
+    
+    def teardown_method(self):
+        for active in getattr(self, '_patches', []):
+            active.stop()
+    
+    def test_pages_are_upserted_and_mark_advances(self, engine, session, test_user):
+        """Test a full page-through, then an incremental run from the high-water mark."""
+        from sqlmodel import select
+        from app.models.user import User
+        
+        sync = self._sync([
+            [self._entry("alice", 10), self._entry("bob", 12, ["Admins"])],
+            [self._entry("testuser", 11)],
+        ])
+        result = sync.run(engine=engine)
+        assert (result["created"], result["skipped"], result["high_water_mark"]) == (2, 1, "12")
+        assert self.filters[0] == sync.service.config.sync_filter
+        
+        users = {user.email: user for user in session.exec(select(User))}
+        assert users["alice@example.com"].is_ldap_user is True
+        assert users["bob@example.com"].is_admin is True
+        assert users["testuser@example.com"].is_ldap_user is False
+        
+        sync = self._sync([[self._entry("alice", 20, ["Admins"])]])
+        result = sync.run(engine=engine)
+        assert self.filters[0].endswith("(uSNChanged>=13))")
+        assert (result["updated"], result["high_water_mark"]) == (1, "20")
+        
+        alice = session.exec(select(User).where(User.email == "alice@example.com")).one()
+        session.refresh(alice)
+        assert alice.is_admin is True
+        assert alice.token_epoch == 1
+        assert sync.stats()["runs"] == 1
+    
+    def test_synced_user_logs_in_through_ldap(self, client, engine, session, monkeypatch):
+        """Test that pre-provisioned users have no local password and route to LDAP."""
+        from app.core.config import settings
+        
+        sync = self._sync([[self._entry("carol", 5)]])
+        sync.run(engine=engine)
+        monkeypatch.setattr(settings, "LDAP_ENABLED", True)
+        
+        with patch('app.api.auth.ldap_service.authenticate') as mock_ldap_auth:
+            mock_ldap_auth.return_value = (False, None, "Invalid credentials")
+            response = client.post(
+                "/api/auth/login", data={"username": "carol@example.com", "password": "anything"}
+            )
+            assert response.status_code == 401
+            mock_ldap_auth.assert_called_once()
+
+
+class TestAsyncLDAPClient:
+    """Test the async facade over the blocking LDAP service."""
+    
+    def _client(self, delay, **kwargs):
+        import time
+        from app.core.ldap_client import AsyncLDAPClient
+        
+        service = MagicMock()
+        service.breaker.is_open.return_value = False
+        
+        def slow_authenticate(username, password):
+            time.sleep(delay)
+            return True, {'username': username}, None
+        
+        service.authenticate.side_effect = slow_authenticate
+        return AsyncLDAPClient(service, **kwargs), service
+    
+    def test_calls_do_not_block_event_loop(self):
+        """Test that concurrent LDAP calls run in parallel off the loop."""
+        import asyncio
+        import time
+        
+        client, _ = self._client(0.2, max_workers=4)
+        
+        async def run():
+            start = time.perf_counter()
+            results = await asyncio.gather(*(client.authenticate(f"u{i}", "pw") for i in range(4)))
+            return results, time.perf_counter() - start
+        
+        results, elapsed = asyncio.run(run())
+        assert all(success for success, _, _ in results)
+        assert elapsed < 0.6
+        client.shutdown()
+    
+    def test_deadline_returns_error(self):
+        """Test that a call past its deadline fails without waiting for LDAP."""
+        import asyncio
+        
+        client, _ = self._client(0.5)
+        success, user_info, error = asyncio.run(client.authenticate("slow", "pw", timeout=0.05))
+        assert success is False and user_info is None
+        assert "timed out" in error
+        assert client.stats()["timeouts"] == 1
+        client.shutdown()
+    
+    def test_queued_call_is_dropped_after_deadline(self):
+        """Test that a call still queued at its deadline never reaches LDAP."""
+        import asyncio
+        import time
+        
+        client, service = self._client(0.3, max_workers=1)
+        
+        async def run():
+            first = asyncio.ensure_future(client.authenticate("first", "pw"))
+            await asyncio.sleep(0.05)
+            second = await client.authenticate("second", "pw", timeout=0.05)
+            return await first, second
+        
+        first, second = asyncio.run(run())
+        time.sleep(0.1)
+        assert first[0] is True and second[0] is False
+        assert service.authenticate.call_count == 1
+        client.shutdown()
+    
+    def test_stale_health_probed_once(self):
+        """Test that concurrent callers with stale health share one probe."""
+        import asyncio
+        import time
+        from app.core.ldap_client import AsyncLDAPClient
+        
+        service = LDAPService()
+        service.health_check = Mock(side_effect=lambda: time.sleep(0.1) or {'status': 'ok', 'healthy': True})
+        client = AsyncLDAPClient(service, max_workers=4)
+        
+        async def run():
+            return await asyncio.gather(*(client.cached_health() for _ in range(5)))
+        
+        results = asyncio.run(run())
+        assert all(health['healthy'] for health in results)
+        assert service.health_check.call_count == 1
+        client.shutdown()
+    
+    def test_pending_limit_rejects(self):
+        """Test that calls beyond max_pending fail immediately."""
+        import asyncio
+        
+        client, service = self._client(0.0, max_pending=0)
+        success, _, error = asyncio.run(client.authenticate("user", "pw"))
+        assert success is False and "busy" in error
+        assert service.authenticate.call_count == 0
+
+
 class TestLDAPEndpoints:
     """Test LDAP API endpoints."""
     
@@ -234,6 +798,51 @@ class TestLDAPEndpoints:
             response = client.get("/api/auth/ldap/health")
             assert response.status_code == 503
     
+    def test_ldap_health_is_served_from_cache(self):
+        """Test that the health endpoint reuses the last probe and reports history."""
+        with patch('app.api.auth.ldap_service.health_check') as mock_health:
+            mock_health.return_value = {'status': 'ok', 'message': 'ok', 'healthy': True}
+            
+            client = TestClient(app)
+            for _ in range(3):
+                response = client.get("/api/auth/ldap/health")
+                assert response.status_code == 200
+            assert mock_health.call_count == 1
+            
+            body = response.json()
+            assert body['stale'] is False
+            assert len(body['history']) == 1
+            assert body['history'][0]['healthy'] is True
+            assert 'latency_ms' in body['history'][0]
+    
+    def test_background_probes_refresh_health(self):
+        """Test that background probes keep the cached health and history current."""
+        import asyncio
+        from app.core.ldap_client import AsyncLDAPClient
+        
+        service = LDAPService()
+        service.config.enabled = True
+        service.config.health_check_interval = 0.01
+        results = iter([
+            {'status': 'ok', 'message': 'ok', 'healthy': True},
+            {'status': 'error', 'message': 'Connection failed', 'healthy': False},
+        ])
+        service.health_check = lambda: next(results, {'status': 'ok', 'message': 'ok', 'healthy': True})
+        client = AsyncLDAPClient(service, max_workers=1)
+        
+        async def probe():
+            client.start_health_probes()
+            await asyncio.sleep(0.1)
+            await client.stop_health_probes()
+        
+        asyncio.run(probe())
+        client.shutdown()
+        
+        history = service.cached_health()['history']
+        assert len(history) >= 3
+        assert [entry['healthy'] for entry in history[:2]] == [True, False]
+        assert history[1]['message'] == 'Connection failed'
+    
     def test_ldap_config_requires_auth(self):
         """Test that LDAP config endpoint requires authentication."""
         client = TestClient(app)
@@ -265,6 +874,108 @@ class TestLDAPEndpoints:
             assert response.status_code == 401
 
 
+class TestLoginRouting:
+    """Test routing of logins between LDAP and the local database."""
+    
+    @pytest.fixture(autouse=True)
+    def ldap_enabled(self, monkeypatch):
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "LDAP_ENABLED", True)
+        monkeypatch.setattr(settings, "LDAP_LOGIN_RACE", False)
+        monkeypatch.setattr(settings, "LDAP_OFFLINE_LOGIN", False)
+        return settings
+    
+    def _login(self, client, username, password):
+        return client.post("/api/auth/login", data={"username": username, "password": password})
+    
+    def test_local_account_skips_ldap(self, client, test_user):
+        """Test that local accounts never reach the directory."""
+        with patch('app.api.auth.ldap_service.authenticate') as mock_ldap_auth:
+            response = self._login(client, "testuser@example.com", "testpassword123")
+            assert response.status_code == 200
+            assert mock_ldap_auth.call_count == 0
+    
+    def test_ldap_account_does_not_fall_back_to_local(self, client, session, test_user):
+        """Test that LDAP accounts are only checked against the directory."""
+        test_user.is_ldap_user = True
+        session.add(test_user)
+        session.commit()
+        
+        with patch('app.api.auth.ldap_service.authenticate') as mock_ldap_auth:
+            mock_ldap_auth.return_value = (False, None, "Invalid credentials")
+            response = self._login(client, "testuser@example.com", "testpassword123")
+            assert response.status_code == 401
+            mock_ldap_auth.assert_called_once()
+    
+    def test_unknown_user_route_is_cached(self, client):
+        """Test that usernames the directory does not know skip LDAP next time."""
+        from app.core.ldap_service import USER_NOT_FOUND
+        
+        with patch('app.api.auth.ldap_service.authenticate') as mock_ldap_auth:
+            mock_ldap_auth.return_value = (False, None, USER_NOT_FOUND)
+            assert self._login(client, "nobody", "whatever").status_code == 401
+            assert self._login(client, "Nobody", "whatever").status_code == 401
+            assert mock_ldap_auth.call_count == 1
+    
+    def test_ldap_login_provisions_user(self, client, session):
+        """Test that a directory login creates the local LDAP account."""
+        from app.crud.user import get_user_by_email
+        
+        info = {
+            'email': 'jdoe@example.com', 'username': 'jdoe',
+            'full_name': 'Jane Doe', 'groups': [], 'is_admin': False
+        }
+        with patch('app.api.auth.ldap_service.authenticate') as mock_ldap_auth:
+            mock_ldap_auth.return_value = (True, info, None)
+            assert self._login(client, "jdoe", "DirectoryPass1").status_code == 200
+        
+        user = get_user_by_email(session, "jdoe@example.com")
+        assert user is not None and user.is_ldap_user is True
+    
+    def test_race_mode_local_password_wins(self, client, admin_headers, ldap_enabled):
+        """Test that race mode accepts the local password and records the path."""
+        import time
+        
+        ldap_enabled.LDAP_LOGIN_RACE = True
+        
+        def slow_ldap(username, password):
+            time.sleep(1.0)
+            return False, None, "LDAP server unreachable"
+        
+        with patch('app.api.auth.ldap_service.authenticate', side_effect=slow_ldap):
+            start = time.perf_counter()
+            response = self._login(client, "admin@example.com", "adminpass123")
+            assert response.status_code == 200
+            assert time.perf_counter() - start < 1.0
+        
+        logins = client.get("/api/admin/stats", headers=admin_headers).json()["logins"]
+        assert logins["race"]["success"]["count"] >= 1
+    
+    def test_offline_login_while_directory_unavailable(
+        self, client, session, test_user, admin_headers, ldap_enabled
+    ):
+        """Test that LDAP_OFFLINE_LOGIN checks the local hash only during an outage."""
+        from app.core.ldap_service import DIRECTORY_UNAVAILABLE
+        
+        test_user.is_ldap_user = True
+        session.add(test_user)
+        session.commit()
+        
+        with patch('app.api.auth.ldap_service.authenticate') as mock_ldap_auth:
+            mock_ldap_auth.return_value = (False, None, DIRECTORY_UNAVAILABLE)
+            assert self._login(client, "testuser@example.com", "testpassword123").status_code == 401
+            
+            ldap_enabled.LDAP_OFFLINE_LOGIN = True
+            assert self._login(client, "testuser@example.com", "testpassword123").status_code == 200
+            assert self._login(client, "testuser@example.com", "wrongpassword").status_code == 401
+            
+            mock_ldap_auth.return_value = (False, None, "Invalid credentials")
+            assert self._login(client, "testuser@example.com", "testpassword123").status_code == 401
+        
+        logins = client.get("/api/admin/stats", headers=admin_headers).json()["logins"]
+        assert logins["ldap_offline"]["success"]["count"] == 1
+
+
 class TestLDAPIntegration:
     """Integration tests for LDAP functionality."""
     
@@ -0,0 +1,103 @@
+"""
+Tests for token-bucket rate limiting.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit import TokenBucketLimiter, rate_limiters
+
+
+class TestTokenBucketLimiter:
+    """Test the limiter itself."""
+
+    def test_burst_then_limited(self):
+        """Test that a key gets burst requests and then waits for refill."""
+        limiter = TokenBucketLimiter("test", rate=1.0, burst=3, max_keys=100)
+        assert [limiter.hit("a")[0] for _ in range(4)] == [True, True, True, False]
+        allowed, remaining, wait = limiter.hit("a")
+        assert not allowed and remaining == 0 and 0 < wait <= 1
+        assert limiter.hit("b")[0] is True
+        assert limiter.stats()["limited"] == 2
+
+    def test_lazy_refill(self):
+        """Test that buckets refill with elapsed time when next hit."""
+        now = [100.0]
+        limiter = TokenBucketLimiter("test", rate=2.0, burst=2, max_keys=100, clock=lambda: now[0])
+        limiter.hit("a")
+        limiter.hit("a")
+        assert limiter.hit("a")[0] is False
+        now[0] += 0.5
+        assert limiter.hit("a")[0] is True
+        now[0] += 60
+        assert limiter.hit("a")[1] == 1  # capped at burst
+
+    def test_lru_eviction_bounds_memory(self):
+        """Test that the least recently used keys are evicted."""
+        limiter = TokenBucketLimiter("test", rate=1.0, burst=1, max_keys=4, shards=1)
+        for key in range(6):
+            limiter.hit(key)
+        stats = limiter.stats()
+        assert stats["keys"] == 4
+        assert stats["evictions"] == 2
+        assert limiter.hit(0)[0] is True  # evicted, so a fresh bucket
+
+    def test_zero_rate_disables_limit(self):
+        """Test that a rate of 0 means unlimited rather than dividing by zero."""
+        limiter = TokenBucketLimiter("test", rate=0, burst=1, max_keys=100)
+        assert all(limiter.hit("a")[0] for _ in range(5))
+        assert limiter.seconds_to_full(0) == 0
+        with pytest.raises(ValueError):
+            TokenBucketLimiter("test", rate=-1, burst=1, max_keys=100)
+
+    def test_cold_pat_keyed_by_embedded_id(self):
+        """Test that an uncached PAT is keyed like a cached one, not by IP."""
+        from starlette.requests import Request
+        from app.core.authentication import AuthState, PATBackend
+        from app.core.rate_limit import rate_limit_key
+        from app.core.token_security import generate_token
+
+        state = AuthState(generate_token(42), PATBackend())
+        request = Request({"type": "http", "state": {"auth": state}, "client": ("10.0.0.1", 1234)})
+        assert rate_limit_key(request) == ("pat", 42)
+
+        state.resolved = True  # rejected by the middleware
+        assert rate_limit_key(request) == ("ip", "10.0.0.1")
+
+
+class TestRateLimitedRoutes:
+    """Test rate limits on the API."""
+
+    def test_login_limited_per_ip(self, client: TestClient, monkeypatch):
+        """Test that login floods get 429 with Retry-After."""
+        monkeypatch.setattr(rate_limiters["auth"], "burst", 2)
+        monkeypatch.setattr(rate_limiters["auth"], "rate", 0.01)
+        data = {"username": "nobody@example.com", "password": "wrongpassword"}
+
+        responses = [client.post("/api/auth/login", data=data) for _ in range(3)]
+        assert [r.status_code for r in responses] == [401, 401, 429]
+        assert int(responses[2].headers["Retry-After"]) >= 1
+        assert responses[2].headers["X-RateLimit-Remaining"] == "0"
+
+    def test_authenticated_requests_limited_per_user(
+        self, client: TestClient, auth_headers: dict, admin_headers: dict, monkeypatch
+    ):
+        """Test that one user's flood does not limit another user."""
+        monkeypatch.setattr(rate_limiters["items"], "burst", 2)
+        monkeypatch.setattr(rate_limiters["items"], "rate", 0.01)
+
+        first = client.get("/api/items", headers=auth_headers)
+        assert first.headers["X-RateLimit-Limit"] == "2"
+        assert first.headers["X-RateLimit-Remaining"] == "1"
+        client.get("/api/items", headers=auth_headers)
+        assert client.get("/api/items", headers=auth_headers).status_code == 429
+        assert client.get("/api/items", headers=admin_headers).status_code == 200
+
+    def test_disabled(self, client: TestClient, auth_headers: dict, monkeypatch):
+        """Test that RATE_LIMIT_ENABLED=false turns limiting off."""
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+        monkeypatch.setattr(rate_limiters["items"], "burst", 0)
+        response = client.get("/api/items", headers=auth_headers)
+        assert response.status_code == 200
+        assert "X-RateLimit-Limit" not in response.headers
@@ -131,6 +131,168 @@ class TestAuthenticationSecurity:
         assert "password" in response.json()["detail"][0]["loc"]
 
 
+class TestPasswordHasher:
+    """Test the process-pool password hashing service"""
+    
+    def test_hash_and_verify_roundtrip(self):
+        """Test that hashing in the pool produces verifiable argon2 hashes"""
+        import asyncio
+        
+        async def roundtrip():
+            hashed = await security.password_hasher.hash("PoolPass123")
+            return hashed, await security.password_hasher.verify("PoolPass123", hashed)
+        
+        hashed, valid = asyncio.run(roundtrip())
+        assert hashed.startswith("$argon2")
+        assert valid is True
+        assert security.verify_password("wrong", hashed) is False
+    
+    def test_queue_limit_rejects_with_503(self):
+        """Test that calls beyond the pending limit are rejected"""
+        import asyncio
+        from fastapi import HTTPException
+        
+        hasher = security.PasswordHasher(max_workers=1, max_pending=0, timeout=1.0)
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(hasher.hash("Whatever123"))
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "1"
+        assert hasher.stats()["rejected"] == 1
+    
+    def test_timed_out_call_keeps_its_slot(self):
+        """Test that a timed out call counts as pending until the worker finishes it"""
+        import asyncio
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from fastapi import HTTPException
+        
+        hasher = security.PasswordHasher(max_workers=1, max_pending=1, timeout=0.05)
+        hasher._executor = ThreadPoolExecutor(max_workers=1)
+        
+        async def run(seconds):
+            with pytest.raises(HTTPException) as exc_info:
+                await hasher._run(time.sleep, seconds)
+            return exc_info.value.detail
+        
+        assert asyncio.run(run(0.3)) == "Password hashing timed out"
+        assert hasher.stats()["pending"] == 1
+        assert asyncio.run(run(0)) == "Password hashing service is busy"
+        hasher._executor.shutdown(wait=True)
+        assert hasher.stats()["pending"] == 0
+    
+    def test_stats_endpoint_requires_admin(
+        self, client: TestClient, auth_headers: dict, admin_headers: dict
+    ):
+        """Test that runtime stats are admin only"""
+        assert client.get("/api/admin/stats", headers=auth_headers).status_code == 403
+        response = client.get("/api/admin/stats", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["password_hashing"]["calls"] >= 1
+
+
+class TestTokenRevocation:
+    """Test the in-memory access token denylist"""
+    
+    def test_revoked_jti_is_rejected_until_expiry(self):
+        """Test that revocations are exact and expire with the token"""
+        import time
+        from app.core.revocation import RevocationList
+        
+        revoked = RevocationList(lifetime=60, capacity=100, error_rate=0.01)
+        revoked.revoke("jti-1", time.time() + 30)
+        revoked.revoke("jti-2", time.time() - 1)
+        assert revoked.is_revoked("jti-1") is True
+        assert revoked.is_revoked("jti-2") is False
+        assert revoked.is_revoked("jti-3") is False
+    
+    def test_generations_rotate(self):
+        """Test that entries survive one rotation and are dropped after expiry"""
+        from app.core.revocation import RevocationList
+        
+        now = [1000.0]
+        revoked = RevocationList(lifetime=60, capacity=100, error_rate=0.01, clock=lambda: now[0])
+        revoked.revoke("short", now[0] + 60)
+        revoked.revoke("long", now[0] + 300)
+        
+        now[0] += 61
+        assert revoked.is_revoked("long") is True
+        assert revoked.stats()["revoked"] == 2
+        
+        now[0] += 61
+        assert revoked.is_revoked("short") is False
+        assert revoked.is_revoked("long") is True
+        assert revoked.stats()["revoked"] == 1
+    
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test that every added item is reported as present"""
+        from app.core.revocation import BloomFilter
+        
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f"token-{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        assert all(item in bloom for item in items)
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300
+    
+    def test_access_tokens_carry_jti(self):
+        """Test that every access token gets a unique jti"""
+        first = security.decode_access_token(security.create_access_token({"sub": "1"}))
+        second = security.decode_access_token(security.create_access_token({"sub": "1"}))
+        assert first["jti"] and first["jti"] != second["jti"]
+
+
+class TestBreachedPasswords:
+    """Test the offline breached-password list"""
+    
+    @staticmethod
+    def _build(path, passwords):
+        import hashlib
+        from app.core.breached_passwords import build_breached_password_file
+        
+        lines = sorted(f"{hashlib.sha1(p.encode()).hexdigest().upper()}:{i + 1}" for i, p in enumerate(passwords))
+        return build_breached_password_file(lines, str(path))
+    
+    def test_lookup_matches_only_listed_passwords(self, tmp_path):
+        """Test that listed passwords are found and others are not"""
+        from app.core.breached_passwords import BreachedPasswordList
+        
+        passwords = [f"Leaked{i}Pass" for i in range(500)]
+        path = tmp_path / "breached.bin"
+        assert self._build(path, passwords + passwords[:10]) == 500
+        
+        breached = BreachedPasswordList(str(path))
+        assert len(breached) == 500
+        assert all(breached.contains(p) for p in passwords)
+        assert not any(breached.contains(f"Unique{i}Pass") for i in range(500))
+        breached.close()
+    
+    def test_unsorted_input_rejected(self, tmp_path):
+        """Test that the builder refuses input not sorted by hash"""
+        from app.core.breached_passwords import build_breached_password_file
+        
+        with pytest.raises(ValueError, match="not sorted"):
+            build_breached_password_file(["F" * 40 + ":1", "0" * 40 + ":1"], str(tmp_path / "out.bin"))
+        with pytest.raises(ValueError):
+            build_breached_password_file(["not-a-hash:1"], str(tmp_path / "out.bin"))
+    
+    def test_breached_password_rejected_at_registration(
+        self, client: TestClient, tmp_path, monkeypatch
+    ):
+        """Test that registration rejects a listed password and fails open without a file"""
+        path = tmp_path / "breached.bin"
+        self._build(path, ["Password123"])
+        monkeypatch.setattr(security.settings, "BREACHED_PASSWORDS_FILE", str(path))
+        
+        payload = {"email": "leaked@example.com", "password": "Password123", "full_name": "Leaked"}
+        response = client.post("/api/auth/register", json=payload)
+        assert response.status_code == 400
+        assert "breach" in response.json()["detail"]
+        
+        monkeypatch.setattr(security.settings, "BREACHED_PASSWORDS_FILE", str(tmp_path / "missing.bin"))
+        assert client.post("/api/auth/register", json=payload).status_code == 201
+
+
 class TestAccessControl:
     """Test access control and authorization"""
     
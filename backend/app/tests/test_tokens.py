@@ -2,6 +2,7 @@
 Tests for Personal Access Token (PAT) endpoints.
 """
 import pytest
+from unittest.mock import patch
 from datetime import datetime, timedelta
 from fastapi.testclient import TestClient
 from sqlmodel import Session
@@ -255,3 +256,295 @@ class TestPATAuthentication:
             headers={"Authorization": "Bearer inactive_pat_token"}
         )
         assert response.status_code == 401
+
+
+class TestPATUsageWriteBehind:
+    """Test batched last_used_at updates."""
+
+    def test_pat_requests_do_not_write(self, client: TestClient, auth_headers: dict, session: Session, engine):
+        """Test that PAT use is buffered and flushed in one batch."""
+        from app.core.token_usage import token_usage
+
+        pat_response = client.post(
+            "/api/users/me/tokens",
+            headers=auth_headers,
+            json={"name": "Buffered Token", "scopes": "read"}
+        )
+        token_id = pat_response.json()["id"]
+        pat_headers = {"Authorization": f"Bearer {pat_response.json()['token']}"}
+
+        for _ in range(3):
+            assert client.get("/api/users/me", headers=pat_headers).status_code == 200
+
+        db_token = session.get(PersonalAccessToken, token_id)
+        assert db_token.last_used_at is None
+
+        # Listing overlays the buffered timestamp
+        listed = client.get("/api/users/me/tokens", headers=auth_headers).json()
+        assert next(t for t in listed if t["id"] == token_id)["last_used_at"] is not None
+
+        assert token_usage.flush(engine) == 1
+        session.refresh(db_token)
+        assert db_token.last_used_at is not None
+        assert token_usage.flush(engine) == 0
+
+
+class TestPATLookupCache:
+    """Test PAT lookup caching."""
+
+    def test_unknown_token_is_negatively_cached(self, client: TestClient):
+        """Test that repeated bogus tokens only hit the database once."""
+        from app.core.token_security import pat_negative_cache
+
+        headers = {"Authorization": f"Bearer pat_{'x' * 54}"}
+        for _ in range(3):
+            assert client.get("/api/users/me", headers=headers).status_code == 401
+        stats = pat_negative_cache.stats()
+        assert stats["size"] == 1
+        assert stats["hits"] == 2
+
+    def test_deactivate_invalidates_cached_token(self, client: TestClient, auth_headers: dict):
+        """Test that a cached token stops working once deactivated."""
+        pat_response = client.post(
+            "/api/users/me/tokens",
+            headers=auth_headers,
+            json={"name": "Cached Token", "scopes": "read"}
+        )
+        token_id = pat_response.json()["id"]
+        pat_headers = {"Authorization": f"Bearer {pat_response.json()['token']}"}
+        assert client.get("/api/users/me", headers=pat_headers).status_code == 200
+
+        client.patch(f"/api/users/me/tokens/{token_id}/deactivate", headers=auth_headers)
+        assert client.get("/api/users/me", headers=pat_headers).status_code == 401
+
+    def test_revoke_invalidates_cached_token(self, client: TestClient, auth_headers: dict):
+        """Test that a cached token stops working once revoked."""
+        pat_response = client.post(
+            "/api/users/me/tokens",
+            headers=auth_headers,
+            json={"name": "Revoked Token", "scopes": "read"}
+        )
+        token_id = pat_response.json()["id"]
+        pat_headers = {"Authorization": f"Bearer {pat_response.json()['token']}"}
+        assert client.get("/api/users/me", headers=pat_headers).status_code == 200
+
+        client.delete(f"/api/users/me/tokens/{token_id}", headers=auth_headers)
+        assert client.get("/api/users/me", headers=pat_headers).status_code == 401
+
+
+class TestPATFormat:
+    """Test self-locating PATs and legacy token compatibility."""
+
+    def _create(self, client: TestClient, auth_headers: dict, name: str = "Format Token") -> dict:
+        response = client.post(
+            "/api/users/me/tokens",
+            headers=auth_headers,
+            json={"name": name, "scopes": "read"}
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    def test_token_embeds_id(self, client: TestClient, auth_headers: dict, session: Session):
+        """Test that new tokens embed their row id and store a binary digest."""
+        from app.core.token_security import digest_token, parse_token
+
+        data = self._create(client, auth_headers)
+        assert data["token"].startswith(f"pat_{data['id']}_")
+        assert parse_token(data["token"]) == (data["id"], True)
+
+        db_token = session.get(PersonalAccessToken, data["id"])
+        assert db_token.token_digest == digest_token(data["token"])
+        assert db_token.token_hash == db_token.token_digest.hex()
+
+    def test_bad_checksum_rejected_without_lookup(self, client: TestClient, auth_headers: dict):
+        """Test that a token with a corrupted checksum never reaches the caches."""
+        from app.core.token_security import pat_cache, pat_negative_cache
+
+        token = self._create(client, auth_headers)["token"]
+        tampered = token[:-1] + ("0" if token[-1] != "0" else "1")
+        headers = {"Authorization": f"Bearer {tampered}"}
+        assert client.get("/api/users/me", headers=headers).status_code == 401
+        assert pat_cache.stats()["misses"] == 0
+        assert pat_negative_cache.stats()["size"] == 0
+
+    def test_wrong_secret_for_existing_id_rejected(self, client: TestClient, auth_headers: dict):
+        """Test that a well-formed token with another token's id is rejected."""
+        import zlib
+
+        token_id = self._create(client, auth_headers)["id"]
+        body = f"{token_id}_{'a' * 40}"
+        forged = f"pat_{body}{zlib.crc32(body.encode()):08x}"
+        headers = {"Authorization": f"Bearer {forged}"}
+        assert client.get("/api/users/me", headers=headers).status_code == 401
+
+    def test_legacy_token_still_works(self, client: TestClient, session: Session, test_user: User):
+        """Test that tokens issued in the old format authenticate via the hash index."""
+        import secrets
+        from app.core.token_security import hash_token
+
+        legacy = f"pat_{secrets.token_urlsafe(40)}"
+        session.add(PersonalAccessToken(
+            user_id=test_user.id,
+            name="Legacy Token",
+            token_hash=hash_token(legacy),
+            scopes="read",
+        ))
+        session.commit()
+
+        response = client.get("/api/users/me", headers={"Authorization": f"Bearer {legacy}"})
+        assert response.status_code == 200
+        assert response.json()["email"] == test_user.email
+
+
+class TestPATScopes:
+    """Test scope bitmask enforcement for PATs."""
+
+    def _pat_headers(self, client: TestClient, headers: dict, scopes: str) -> dict:
+        response = client.post(
+            "/api/users/me/tokens",
+            headers=headers,
+            json={"name": f"Scoped {scopes}", "scopes": scopes}
+        )
+        assert response.status_code == 201
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    def test_scopes_compiled_at_creation(self, client: TestClient, auth_headers: dict, session: Session):
+        """Test that the scope string is stored as a bitmask too."""
+        from app.core.token_security import SCOPE_BITS
+
+        response = client.post(
+            "/api/users/me/tokens",
+            headers=auth_headers,
+            json={"name": "Mask Token", "scopes": "read,write"}
+        )
+        db_token = session.get(PersonalAccessToken, response.json()["id"])
+        assert db_token.scope_mask == SCOPE_BITS["read"] | SCOPE_BITS["write"]
+
+    def test_read_scope_cannot_write(self, client: TestClient, auth_headers: dict):
+        """Test that a read-only PAT can list but not create items."""
+        pat_headers = self._pat_headers(client, auth_headers, "read")
+        assert client.get("/api/items", headers=pat_headers).status_code == 200
+        response = client.post("/api/items", headers=pat_headers, json={"title": "Nope"})
+        assert response.status_code == 403
+        response = client.post(
+            "/api/users/me/tokens", headers=pat_headers, json={"name": "Escalated", "scopes": "write"}
+        )
+        assert response.status_code == 403
+
+    def test_pat_cannot_grant_scopes_it_lacks(self, client: TestClient, admin_headers: dict):
+        """Test that a write-only PAT cannot mint an admin PAT."""
+        pat_headers = self._pat_headers(client, admin_headers, "write")
+        response = client.post(
+            "/api/users/me/tokens", headers=pat_headers, json={"name": "Escalated", "scopes": "read,write,admin"}
+        )
+        assert response.status_code == 403
+        response = client.post(
+            "/api/users/me/tokens", headers=pat_headers, json={"name": "Narrower", "scopes": "write"}
+        )
+        assert response.status_code == 201
+
+    def test_write_scope_can_write(self, client: TestClient, auth_headers: dict):
+        """Test that a write PAT can create items."""
+        pat_headers = self._pat_headers(client, auth_headers, "write")
+        response = client.post("/api/items", headers=pat_headers, json={"title": "Allowed"})
+        assert response.status_code == 201
+
+    def test_admin_routes_need_admin_scope(self, client: TestClient, admin_headers: dict):
+        """Test that an admin's PAT only reaches admin routes with the admin scope."""
+        read_headers = self._pat_headers(client, admin_headers, "read")
+        assert client.get("/api/users/", headers=read_headers).status_code == 403
+        admin_pat_headers = self._pat_headers(client, admin_headers, "read,admin")
+        assert client.get("/api/users/", headers=admin_pat_headers).status_code == 200
+
+    def test_auth_routes_need_scopes(self, client: TestClient, admin_headers: dict):
+        """Test that a read-only PAT can neither log out nor read the LDAP config."""
+        read_headers = self._pat_headers(client, admin_headers, "read")
+        assert client.get("/api/auth/ldap/config", headers=read_headers).status_code == 403
+        assert client.post("/api/auth/logout", headers=read_headers).status_code == 403
+        admin_pat_headers = self._pat_headers(client, admin_headers, "read,admin")
+        assert client.get("/api/auth/ldap/config", headers=admin_pat_headers).status_code == 200
+
+    def test_jwt_sessions_have_all_scopes(self, client: TestClient, auth_headers: dict):
+        """Test that interactive JWT sessions are not scope restricted."""
+        response = client.post("/api/items", headers=auth_headers, json={"title": "Mine"})
+        assert response.status_code == 201
+
+    def test_scoped_route_authenticates_pat_once(self, client: TestClient, auth_headers: dict):
+        """Test that the scope check and the handler share one PAT authentication."""
+        from app.core.token_usage import token_usage
+
+        pat_headers = self._pat_headers(client, auth_headers, "write")
+        with patch.object(token_usage, "record", wraps=token_usage.record) as record:
+            response = client.post("/api/items", headers=pat_headers, json={"title": "Once"})
+            assert response.status_code == 201
+            assert record.call_count == 1
+
+    def test_unknown_scope_rejected_at_definition(self):
+        """Test that require_scopes fails fast on typos."""
+        from app.core.deps import require_scopes
+
+        with pytest.raises(ValueError):
+            require_scopes("reed")
+
+
+class TestTokenExchange:
+    """Test exchanging PATs for short-lived JWTs."""
+
+    def _pat(self, client: TestClient, auth_headers: dict, scopes: str = "read", **extra) -> str:
+        response = client.post(
+            "/api/users/me/tokens",
+            headers=auth_headers,
+            json={"name": f"Exchange {scopes}", "scopes": scopes, **extra}
+        )
+        return response.json()["token"]
+
+    def test_exchange_returns_short_lived_jwt(self, client: TestClient, auth_headers: dict, test_user: User):
+        """Test that a PAT can be traded for a working JWT."""
+        from app.core.config import settings
+        from app.core.security import decode_access_token
+
+        pat = self._pat(client, auth_headers)
+        response = client.post("/api/auth/token-exchange", headers={"Authorization": f"Bearer {pat}"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["expires_in"] == settings.PAT_EXCHANGE_TOKEN_EXPIRE_MINUTES * 60
+        assert decode_access_token(data["access_token"])["sub"] == str(test_user.id)
+
+        jwt_headers = {"Authorization": f"Bearer {data['access_token']}"}
+        response = client.get("/api/users/me", headers=jwt_headers)
+        assert response.status_code == 200
+        assert response.json()["email"] == test_user.email
+
+    def test_exchanged_jwt_keeps_pat_scopes(self, client: TestClient, auth_headers: dict):
+        """Test that a JWT exchanged for a read-only PAT cannot write."""
+        pat = self._pat(client, auth_headers, "read")
+        access_token = client.post(
+            "/api/auth/token-exchange", headers={"Authorization": f"Bearer {pat}"}
+        ).json()["access_token"]
+
+        jwt_headers = {"Authorization": f"Bearer {access_token}"}
+        assert client.get("/api/items", headers=jwt_headers).status_code == 200
+        assert client.get("/api/items/1", headers=jwt_headers).status_code == 404
+        assert client.post("/api/items", headers=jwt_headers, json={"title": "No"}).status_code == 403
+
+    def test_exchange_requires_pat(self, client: TestClient, auth_headers: dict):
+        """Test that JWTs and bogus tokens cannot be exchanged."""
+        assert client.post("/api/auth/token-exchange", headers=auth_headers).status_code == 401
+        assert client.post("/api/auth/token-exchange").status_code == 401
+        response = client.post(
+            "/api/auth/token-exchange", headers={"Authorization": f"Bearer pat_{'x' * 54}"}
+        )
+        assert response.status_code == 401
+
+    def test_exchange_rejects_inactive_pat(self, client: TestClient, auth_headers: dict):
+        """Test that a deactivated PAT cannot be exchanged."""
+        response = client.post(
+            "/api/users/me/tokens",
+            headers=auth_headers,
+            json={"name": "Soon Inactive", "scopes": "read"}
+        )
+        token_id, pat = response.json()["id"], response.json()["token"]
+        client.patch(f"/api/users/me/tokens/{token_id}/deactivate", headers=auth_headers)
+
+        response = client.post("/api/auth/token-exchange", headers={"Authorization": f"Bearer {pat}"})
+        assert response.status_code == 401
@@ -164,3 +164,50 @@ class TestAdminUserManagement:
             headers=auth_headers
         )
         assert response.status_code == 403
+
+
+class TestPrincipalCache:
+    """Test the in-process principal cache."""
+
+    def test_ttl_cache_expires_and_evicts(self):
+        """Test TTL expiry and LRU eviction."""
+        from app.core.cache import TTLCache
+
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)  # evicts "b", the least recently used
+        assert cache.get("b") is None
+        cache.set("d", 4, ttl=-1)  # non-positive TTL is never stored
+        assert cache.get("d") is None
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["evictions"] == 1
+
+    def test_repeat_requests_hit_cache(self, client: TestClient, auth_headers: dict):
+        """Test that authenticated requests are served from the cache."""
+        from app.core.principal import principal_cache
+
+        client.get("/api/users/me/tokens", headers=auth_headers)
+        client.get("/api/users/me/tokens", headers=auth_headers)
+        assert principal_cache.stats()["hits"] >= 1
+
+    def test_deactivation_invalidates_cached_principal(
+        self, client: TestClient, auth_headers: dict, admin_headers: dict, test_user: User
+    ):
+        """Test that admin deactivation takes effect on the next request."""
+        assert client.get("/api/items", headers=auth_headers).status_code == 200
+        response = client.put(
+            f"/api/users/{test_user.id}",
+            headers=admin_headers,
+            json={"is_active": False}
+        )
+        assert response.status_code == 200
+        assert client.get("/api/items", headers=auth_headers).status_code == 401
+
+    def test_admin_stats_include_principal_cache(self, client: TestClient, admin_headers: dict):
+        """Test that cache statistics are exposed to admins."""
+        response = client.get("/api/admin/stats", headers=admin_headers)
+        assert response.status_code == 200
+        assert "hit_rate" in response.json()["principal_cache"]
@@ -0,0 +1,38 @@
+"""
+Build the binary breached-password file used by BREACHED_PASSWORDS_FILE.
+
+Usage:
+    python build_breached_passwords.py pwned-passwords-sha1-ordered-by-hash.txt breached.bin
+    python build_breached_passwords.py dump.txt breached.bin --min-count 10
+
+The input is a Have I Been Pwned style dump with one ``SHA1HEX:COUNT``
+line per hash, sorted by hash (use the "ordered by hash" download, or
+``sort`` the file first). ``--min-count`` drops hashes seen fewer times,
+trading coverage for a smaller file. Use ``-`` to read from stdin.
+"""
+import argparse
+import sys
+import time
+
+from app.core.breached_passwords import build_breached_password_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Sorted SHA1HEX:COUNT text dump ('-' for stdin)")
+    parser.add_argument("output", help="Binary file to write")
+    parser.add_argument("--min-count", type=int, default=1, help="Skip hashes seen fewer times")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.input == "-":
+        count = build_breached_password_file(sys.stdin, args.output, args.min_count)
+    else:
+        with open(args.input, encoding="ascii") as lines:
+            count = build_breached_password_file(lines, args.output, args.min_count)
+    print(f"✓ Wrote {count:,} hashes to {args.output} in {time.perf_counter() - start:.1f}s")
+    print(f"  Set BREACHED_PASSWORDS_FILE={args.output} to enable the check")
+
+
+if __name__ == "__main__":
+    main()
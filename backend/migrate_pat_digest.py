@@ -0,0 +1,23 @@
+"""Add token_digest field to personal_access_tokens table.
+
+Existing tokens keep a NULL digest and continue to authenticate through
+the token_hash index; tokens created afterwards embed their id and are
+looked up by primary key.
+"""
+from app.core.database import engine
+from sqlmodel import text
+
+def migrate():
+    with engine.begin() as conn:
+        try:
+            conn.execute(text("ALTER TABLE personal_access_tokens ADD COLUMN token_digest BLOB"))
+            print("✓ Migration successful: Added token_digest column")
+        except Exception as e:
+            if "duplicate column name" in str(e).lower():
+                print("✓ Column already exists, skipping migration")
+            else:
+                print(f"✗ Migration failed: {e}")
+                raise
+
+if __name__ == "__main__":
+    migrate()
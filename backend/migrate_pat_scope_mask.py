@@ -0,0 +1,27 @@
+"""Add scope_mask field to personal_access_tokens table and backfill it from scopes."""
+from app.core.database import engine
+from app.core.token_security import compile_scopes
+from sqlmodel import text
+
+def migrate():
+    with engine.begin() as conn:
+        try:
+            conn.execute(text("ALTER TABLE personal_access_tokens ADD COLUMN scope_mask INTEGER NOT NULL DEFAULT 1"))
+            print("✓ Migration successful: Added scope_mask column")
+        except Exception as e:
+            if "duplicate column name" in str(e).lower():
+                print("✓ Column already exists, skipping migration")
+            else:
+                print(f"✗ Migration failed: {e}")
+                raise
+        
+        rows = conn.execute(text("SELECT id, scopes FROM personal_access_tokens")).all()
+        for token_id, scopes in rows:
+            conn.execute(
+                text("UPDATE personal_access_tokens SET scope_mask = :mask WHERE id = :id"),
+                {"mask": compile_scopes(scopes or ""), "id": token_id}
+            )
+        print(f"✓ Backfilled scope_mask for {len(rows)} tokens")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,18 @@
+"""Add token_epoch field to users table."""
+from app.core.database import engine
+from sqlmodel import text
+
+def migrate():
+    with engine.begin() as conn:
+        try:
+            conn.execute(text("ALTER TABLE users ADD COLUMN token_epoch INTEGER NOT NULL DEFAULT 0"))
+            print("✓ Migration successful: Added token_epoch column")
+        except Exception as e:
+            if "duplicate column name" in str(e).lower():
+                print("✓ Column already exists, skipping migration")
+            else:
+                print(f"✗ Migration failed: {e}")
+                raise
+
+if __name__ == "__main__":
+    migrate()
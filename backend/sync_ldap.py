@@ -0,0 +1,47 @@
+"""
+Sync directory users into the local user table.
+
+Usage:
+    python sync_ldap.py           # users changed since the last sync
+    python sync_ldap.py --full    # every user matching LDAP_SYNC_FILTER
+
+Creates LDAP accounts for directory users who have not logged in yet and
+updates names and admin flags of existing ones, so admins see directory
+users before their first login. Set LDAP_SYNC_INTERVAL to also run the
+sync in the background.
+"""
+import argparse
+import sys
+
+from app.core.database import create_db_and_tables
+from app.core.ldap_sync import ldap_sync
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="Ignore the high-water mark and sync every user")
+    args = parser.parse_args()
+
+    is_valid, error = ldap_sync.service.config.is_valid()
+    if not ldap_sync.service.config.enabled or not is_valid:
+        print(f"✗ LDAP is not configured: {error or 'LDAP_ENABLED is false'}")
+        sys.exit(1)
+
+    create_db_and_tables()
+    try:
+        result = ldap_sync.run(full=args.full)
+    except Exception as e:
+        print(f"✗ Sync failed: {e}")
+        sys.exit(1)
+    finally:
+        ldap_sync.service.close()
+
+    print(
+        f"✓ Synced in {result['seconds']:.1f}s: {result['created']} created, "
+        f"{result['updated']} updated, {result['unchanged']} unchanged, {result['skipped']} skipped"
+    )
+    print(f"  High-water mark: {result['high_water_mark']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark argon2 on this host and pick cost parameters for a target verify latency.
+
+Usage:
+    python tune_argon2.py --target-ms 250
+    python tune_argon2.py --target-ms 250 --write-env .env
+
+The memory cost is kept at the requested value (halved if even one pass is
+too slow) and the time cost is raised until a verify takes at least the
+target. Results are printed as ARGON2_* settings and optionally written to
+an env file. Existing hashes are rehashed on each user's next login.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from passlib.context import CryptContext
+
+MIN_MEMORY_COST = 8 * 1024  # KiB
+MAX_TIME_COST = 20
+
+
+def measure_verify_ms(time_cost: int, memory_cost: int, parallelism: int, samples: int = 5) -> float:
+    """Return the median verify latency in milliseconds for the given parameters."""
+    context = CryptContext(
+        schemes=["argon2"],
+        argon2__rounds=time_cost,
+        argon2__memory_cost=memory_cost,
+        argon2__parallelism=parallelism,
+    )
+    hashed = context.hash("tune-argon2-benchmark")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("tune-argon2-benchmark", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def tune(target_ms: float, memory_cost: int, parallelism: int) -> dict:
+    """Find the cheapest parameters whose verify latency reaches target_ms."""
+    # Reduce memory until a single pass fits in the budget
+    latency = measure_verify_ms(1, memory_cost, parallelism)
+    while latency > target_ms and memory_cost > MIN_MEMORY_COST:
+        memory_cost //= 2
+        latency = measure_verify_ms(1, memory_cost, parallelism)
+
+    time_cost = 1
+    while latency < target_ms and time_cost < MAX_TIME_COST:
+        time_cost += 1
+        latency = measure_verify_ms(time_cost, memory_cost, parallelism)
+
+    return {
+        "ARGON2_TIME_COST": time_cost,
+        "ARGON2_MEMORY_COST": memory_cost,
+        "ARGON2_PARALLELISM": parallelism,
+        "latency_ms": latency,
+    }
+
+
+def write_env(path: str, values: dict) -> None:
+    """Set KEY=value lines in an env file, replacing existing keys."""
+    lines = []
+    if os.path.exists(path):
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0].strip()
+        if key in remaining:
+            lines[i] = f"{key}={remaining.pop(key)}"
+    lines.extend(f"{key}={value}" for key, value in remaining.items())
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Target verify latency")
+    parser.add_argument("--memory-cost", type=int, default=65536, help="Starting memory cost in KiB")
+    parser.add_argument("--parallelism", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--write-env", metavar="PATH", help="Write the settings to this env file")
+    args = parser.parse_args()
+
+    result = tune(args.target_ms, args.memory_cost, args.parallelism)
+    latency = result.pop("latency_ms")
+    print(f"✓ Verify latency {latency:.1f}ms (target {args.target_ms:.0f}ms)")
+    for key, value in result.items():
+        print(f"{key}={value}")
+
+    if args.write_env:
+        write_env(args.write_env, result)
+        print(f"✓ Wrote settings to {args.write_env}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
  * Manages global authentication state and provides auth functions
  */
 import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
-import { authAPI, User } from '../services/api';
+import { authAPI, clearTokens, storeTokens, User } from '../services/api';
 
 interface AuthContextType {
   user: User | null;
@@ -38,8 +38,7 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
           localStorage.setItem('user', JSON.stringify(currentUser));
         } catch (error) {
           // Token invalid, clear storage
-          localStorage.removeItem('access_token');
-          localStorage.removeItem('user');
+          clearTokens();
           setUser(null);
         }
       }
@@ -53,15 +52,14 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
     try {
       // Get token
       const tokenResponse = await authAPI.login(email, password);
-      localStorage.setItem('access_token', tokenResponse.access_token);
+      storeTokens(tokenResponse);
 
       // Get user info
       const userData = await authAPI.getCurrentUser();
       setUser(userData);
       localStorage.setItem('user', JSON.stringify(userData));
     } catch (error) {
-      localStorage.removeItem('access_token');
-      localStorage.removeItem('user');
+      clearTokens();
       throw error;
     }
   };
@@ -29,20 +29,70 @@ api.interceptors.request.use(
   }
 );
 
+// Single in-flight refresh shared by concurrent 401 responses
+let refreshPromise: Promise<string> | null = null;
+
+const refreshAccessToken = (): Promise<string> => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshPromise = (async () => {
+      if (!refreshToken) {
+        throw new Error('No refresh token');
+      }
+      const response = await axios.post<TokenResponse>(
+        `${API_BASE_URL}/api/auth/refresh`,
+        { refresh_token: refreshToken },
+        { withCredentials: true }
+      );
+      storeTokens(response.data);
+      return response.data.access_token;
+    })().finally(() => {
+      refreshPromise = null;
+    });
+  }
+  return refreshPromise;
+};
+
 // Response interceptor for error handling
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
-    if (error.response?.status === 401) {
-      // Token expired or invalid
-      localStorage.removeItem('access_token');
-      localStorage.removeItem('user');
-      window.location.href = '/login';
+  async (error) => {
+    const originalRequest = error.config;
+    if (error.response?.status === 401 && originalRequest && !originalRequest._retry) {
+      // Access token expired or invalid: try one refresh, then give up
+      originalRequest._retry = true;
+      try {
+        const accessToken = await refreshAccessToken();
+        originalRequest.headers.Authorization = `Bearer ${accessToken}`;
+        return api(originalRequest);
+      } catch (refreshError) {
+        clearTokens();
+        window.location.href = '/login';
+      }
     }
     return Promise.reject(error);
   }
 );
 
+/**
+ * Persist the tokens from a login or refresh response
+ */
+export const storeTokens = (tokens: TokenResponse): void => {
+  localStorage.setItem('access_token', tokens.access_token);
+  if (tokens.refresh_token) {
+    localStorage.setItem('refresh_token', tokens.refresh_token);
+  }
+};
+
+/**
+ * Remove all locally stored credentials
+ */
+export const clearTokens = (): void => {
+  localStorage.removeItem('access_token');
+  localStorage.removeItem('refresh_token');
+  localStorage.removeItem('user');
+};
+
 // Auth service types
 export interface LoginRequest {
   username: string;
@@ -67,6 +117,7 @@ export interface User {
 export interface TokenResponse {
   access_token: string;
   token_type: string;
+  refresh_token?: string;
 }
 
 // Authentication API
@@ -113,17 +164,18 @@ export const authAPI = {
   },
 
   /**
-   * Logout (client-side token removal)
+   * Logout (revokes the refresh token, then removes local tokens)
    */
   logout: async (): Promise<void> => {
     try {
-      await api.post('/api/auth/logout');
+      await api.post('/api/auth/logout', {
+        refresh_token: localStorage.getItem('refresh_token'),
+      });
     } catch (error) {
       // Even if server request fails, still clear local storage
       console.error('Logout error:', error);
     } finally {
-      localStorage.removeItem('access_token');
-      localStorage.removeItem('user');
+      clearTokens();
     }
   },
 };